@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite: times the main pipeline stages on seeded synthetic XAUUSD bars and stores the
+results as JSON so two revisions can be compared.
+
+Cases (each timed --repeat times, best run reported):
+    csv_load          pd.read_csv + UTC timestamp parse of the bars CSV
+    csv_load_cached   load_ohlc from the columnar cache (scripts/ohlc_cache.py)
+    csv_load_range    load_ohlc_range of the middle ~quarter of the bars (memory-mapped view)
+    csv_load_stream   read_ohlc_csv of the same range (chunked CSV read from the offset index)
+    rma               Wilder RMA of the true range
+    supertrend        supertrend_arrays
+    bar_loop          run_supertrend_trades, numpy engine (13-16 UTC entries, both sides)
+    bar_loop_jit      same on the compiled kernel (only when numba is installed)
+    news_join         entry gates with a NewsSentimentFilter over a synthetic sentiment table
+    trend_generation  EMA200 per-day trend for the 1m,5m,15m,30m,1h,4h timeframes
+    summary_metrics   metrics.trade_metrics over the bar-loop trades
+
+Synthetic CSVs are generated once per (bars, seed) under --data-dir and reused. Nothing is
+downloaded, so the suite runs offline.
+
+Usage:
+    python benchmarks/bench_suite.py                                   # 100k, 1M, 5M, 10M bars
+    python benchmarks/bench_suite.py --sizes 100000,1000000 --cases supertrend,bar_loop
+    python benchmarks/bench_suite.py --sizes 1000000 --compare results/benchmarks/bench_<rev>_<time>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+from backtest_engine import bar_arrays, index_ns, run_supertrend_trades  # noqa: E402
+from base_strategy import StrategyConfig, prepare_backtest  # noqa: E402
+from calendar_index import CalendarIndex  # noqa: E402
+from csv_stream import load_offsets, read_ohlc_csv  # noqa: E402
+from engine_jit import jit_available  # noqa: E402
+from entry_filters import NewsSentimentFilter, build_gates  # noqa: E402
+from generate_ema200_trend import trend_by_date  # noqa: E402
+from indicators import rma_values, supertrend_arrays, true_range  # noqa: E402
+from metrics import trade_metrics  # noqa: E402
+from ohlc_cache import load_ohlc, load_ohlc_range  # noqa: E402
+from synthetic_xauusd import synthetic_xauusd, write_csv  # noqa: E402
+
+CASES = [
+    "csv_load",
+    "csv_load_cached",
+    "csv_load_range",
+    "csv_load_stream",
+    "rma",
+    "supertrend",
+    "bar_loop",
+    "bar_loop_jit",
+    "news_join",
+    "trend_generation",
+    "summary_metrics",
+]
+TREND_TIMEFRAMES = {"1min": "11:59", "5min": "11:55", "15min": "11:45", "30min": "11:30", "1h": "12:00", "4h": "12:00"}
+DEFAULT_OUT_DIR = os.path.join("results", "benchmarks")
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> List[float]:
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return runs
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "describe", "--always", "--dirty"], cwd=ROOT, capture_output=True, text=True, timeout=30
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def environment() -> dict:
+    """Revision and machine details stored with the timings."""
+    return {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "numba": jit_available(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def bars_csv(n: int, seed: int, data_dir: str) -> str:
+    """Path of the synthetic CSV for (n, seed), written on first use."""
+    os.makedirs(data_dir, exist_ok=True)
+    path = os.path.join(data_dir, f"synthetic_xauusd_{n}_s{seed}.csv")
+    if not os.path.exists(path):
+        t0 = time.perf_counter()
+        tmp = f"{path}.tmp{os.getpid()}"
+        write_csv(synthetic_xauusd(n, seed), tmp)
+        os.replace(tmp, path)
+        print(f"  generated {path} in {time.perf_counter() - t0:.1f}s")
+    return path
+
+
+def synthetic_sentiment(index: pd.DatetimeIndex, seed: int) -> pd.DataFrame:
+    """One sentiment row for every other bar (the news filter joins on exact entry times)."""
+    rng = np.random.default_rng(seed)
+    times = index[::2]
+    return pd.DataFrame({
+        "entry_time": times,
+        "headline_count": rng.integers(0, 20, len(times)),
+        "net_sentiment": rng.uniform(-1.0, 1.0, len(times)),
+    })
+
+
+def run_size(n: int, cases: List[str], repeat: int, seed: int, data_dir: str, cache_dir: str) -> List[dict]:
+    """Time the selected cases on n bars; one result row per case."""
+    csv_path = bars_csv(n, seed, data_dir)
+    cfg = StrategyConfig(entry_hours=(13, 16))
+    timed: Dict[str, Callable[[], object]] = {}
+
+    def parse_csv():
+        df = pd.read_csv(csv_path)
+        df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
+        return df
+
+    timed["csv_load"] = parse_csv
+    if "csv_load_cached" in cases:
+        load_ohlc(csv_path, cache_dir)  # build the cache entry outside the timing
+        timed["csv_load_cached"] = lambda: load_ohlc(csv_path, cache_dir)
+
+    df = load_ohlc(csv_path, cache_dir)
+    first, last = df["timestamp"].iloc[len(df) * 3 // 8], df["timestamp"].iloc[len(df) * 5 // 8]
+    start, end = first.strftime("%Y-%m-%d"), last.strftime("%Y-%m-%d")
+    if "csv_load_range" in cases:
+        timed["csv_load_range"] = lambda: load_ohlc_range(csv_path, cache_dir, start, end)
+    if "csv_load_stream" in cases:
+        load_offsets(csv_path)  # build the .offsets.json sidecar outside the timing
+        timed["csv_load_stream"] = lambda: read_ohlc_csv(csv_path, start, end)
+    high, low, close = (df[c].to_numpy(dtype=float) for c in ("High", "Low", "Close"))
+    tr = true_range(high, low, close)
+    timed["rma"] = lambda: rma_values(tr, cfg.st_length)
+    timed["supertrend"] = lambda: supertrend_arrays(high, low, close, cfg.st_length, cfg.st_multiplier)
+
+    dfi, cal, gates = prepare_backtest(df, cfg)
+    bars = bar_arrays(dfi)
+    run_loop = lambda engine: run_supertrend_trades(
+        bars, gates.in_hours, gates.allowed_sides, cfg.max_sl_distance_pips, cfg.pip_size, engine=engine
+    )
+    timed["bar_loop"] = lambda: run_loop("numpy")
+    if jit_available() and "bar_loop_jit" in cases:
+        run_loop("jit")  # compile (or load the cached kernel) outside the timing
+        timed["bar_loop_jit"] = lambda: run_loop("jit")
+
+    if "news_join" in cases:
+        news = NewsSentimentFilter(synthetic_sentiment(dfi.index, seed), 5, "combined")
+        day_cal = CalendarIndex.from_ns(index_ns(dfi.index))
+        timed["news_join"] = lambda: build_gates([news], day_cal, dfi)
+
+    close_utc = pd.Series(close, index=df["timestamp"])
+    timed["trend_generation"] = lambda: [trend_by_date(close_utc, f, t) for f, t in TREND_TIMEFRAMES.items()]
+
+    trades = run_loop("numpy")
+    pips, entry_ns = trades.column("pips"), trades.column("entry_ns")
+    timed["summary_metrics"] = lambda: trade_metrics(pips, entry_ns)
+
+    rows = []
+    for case in cases:
+        if case not in timed:
+            print(f"  {case:<17} skipped")
+            continue
+        runs = _best_of(timed[case], repeat)
+        best = min(runs)
+        rows.append({"case": case, "bars": n, "seconds": best, "runs": runs, "bars_per_sec": n / best if best > 0 else None})
+        print(f"  {case:<17} {best:9.4f}s  ({n / best if best > 0 else float('inf'):>14,.0f} bars/s)")
+    return rows
+
+
+def compare(rows: List[dict], baseline_path: str) -> None:
+    """Print current vs baseline best times for the (case, bars) pairs both runs have."""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    base = {(r["case"], r["bars"]): r["seconds"] for r in baseline["results"]}
+    table = [
+        {"case": r["case"], "bars": r["bars"], "baseline_s": base[(r["case"], r["bars"])], "current_s": r["seconds"],
+         "speedup": base[(r["case"], r["bars"])] / r["seconds"] if r["seconds"] > 0 else float("nan")}
+        for r in rows if (r["case"], r["bars"]) in base
+    ]
+    print(f"\nvs {baseline_path} (revision {baseline['environment'].get('revision')}):")
+    print(pd.DataFrame(table).to_string(index=False) if table else "  no common (case, bars) pairs")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the pipeline stages on synthetic XAUUSD bars and save JSON results")
+    parser.add_argument("--sizes", default="100000,1000000,5000000,10000000", help="Comma-separated bar counts")
+    parser.add_argument("--cases", default=",".join(CASES), help=f"Comma-separated subset of: {','.join(CASES)}")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per case; the best is reported (default: 3)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--data-dir", default=os.path.join("data", "bench"), help="Where the synthetic CSVs are kept (default: data/bench)")
+    parser.add_argument("--ohlc-cache-dir", default=os.path.join("data", "bench", "ohlc_cache"))
+    parser.add_argument("--out-json", default=None, help=f"Results path (default: {DEFAULT_OUT_DIR}/bench_<revision>_<time>.json)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    cases = [c.strip() for c in args.cases.split(",") if c.strip()]
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        raise SystemExit(f"Unknown cases: {', '.join(unknown)}")
+    sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+
+    env = environment()
+    print(f"Revision {env['revision']} — numpy {env['numpy']}, pandas {env['pandas']}, numba {'yes' if env['numba'] else 'no'}")
+    rows = []
+    for n in sizes:
+        print(f"{n:,} bars")
+        rows.extend(run_size(n, cases, args.repeat, args.seed, args.data_dir, args.ohlc_cache_dir))
+
+    out_json = args.out_json or os.path.join(
+        DEFAULT_OUT_DIR, f"bench_{env['revision'] or 'unknown'}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(out_json) or ".", exist_ok=True)
+    with open(out_json, "w", encoding="utf-8") as f:
+        json.dump({"environment": env, "seed": args.seed, "repeat": args.repeat, "results": rows}, f, indent=2)
+    print(f"\nSaved results to: {out_json}")
+
+    if args.compare:
+        compare(rows, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
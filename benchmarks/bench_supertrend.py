@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Benchmark: array SuperTrend kernel and vectorised RMA vs the legacy per-bar pandas loops.
+
+Generates seeded synthetic 1-minute XAUUSD bars, checks that the exact kernel reproduces the legacy
+direction/line bit-for-bit (and the vectorised default to within float rounding), checks RMA parity
+including NaN warm-up, then reports bars/sec for both implementations.
+
+Usage:
+    python benchmarks/bench_supertrend.py                        # 1M, 3.5M, 10M bars
+    python benchmarks/bench_supertrend.py --sizes 100000,1000000 --legacy-max-bars 0
+    python benchmarks/bench_supertrend.py --sizes 1000000 --grid-lengths 7,10,14   # also time the grid
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "scripts"))
+from indicators import SuperTrendState, rma_values, supertrend_arrays, supertrend_grid_arrays, true_range  # noqa: E402
+
+
+def legacy_rma(series: pd.Series, length: int) -> pd.Series:
+    """Original per-bar RMA from base_strategy.py, kept verbatim as the benchmark baseline."""
+    alpha = 1.0 / length
+    sma = series.rolling(length, min_periods=length).mean()
+    r = pd.Series(index=series.index, dtype=float)
+    if len(series) >= length:
+        r.iloc[length - 1] = sma.iloc[length - 1]
+    for i in range(length, len(series)):
+        prev = r.iloc[i - 1]
+        r.iloc[i] = alpha * series.iloc[i] + (1 - alpha) * prev
+    return r
+
+
+def legacy_compute_supertrend(df: pd.DataFrame, length: int, multiplier: float) -> Tuple[pd.Series, pd.Series]:
+    """Original per-bar SuperTrend from base_strategy.py, kept verbatim as the benchmark baseline."""
+    high = df["High"].astype(float)
+    low = df["Low"].astype(float)
+    close = df["Close"].astype(float)
+
+    hl2 = (high + low) / 2.0
+    tr = pd.concat([
+        (high - low),
+        (high - close.shift()).abs(),
+        (low - close.shift()).abs(),
+    ], axis=1).max(axis=1, skipna=True)
+    atr = legacy_rma(tr, length)
+
+    upperband = hl2 + multiplier * atr
+    lowerband = hl2 - multiplier * atr
+
+    direction = pd.Series(index=df.index, dtype=float)
+    supertrend = pd.Series(index=df.index, dtype=float)
+
+    for i in range(len(df)):
+        if i == 0 or np.isnan(atr.iloc[i]):
+            direction.iloc[i] = np.nan
+            supertrend.iloc[i] = np.nan
+            continue
+
+        if direction.iloc[i - 1] == 1:
+            lowerband.iloc[i] = max(lowerband.iloc[i], lowerband.iloc[i - 1])
+            if close.iloc[i] < lowerband.iloc[i]:
+                direction.iloc[i] = -1
+                supertrend.iloc[i] = upperband.iloc[i]
+            else:
+                direction.iloc[i] = 1
+                supertrend.iloc[i] = lowerband.iloc[i]
+        elif direction.iloc[i - 1] == -1:
+            upperband.iloc[i] = min(upperband.iloc[i], upperband.iloc[i - 1])
+            if close.iloc[i] > upperband.iloc[i]:
+                direction.iloc[i] = 1
+                supertrend.iloc[i] = lowerband.iloc[i]
+            else:
+                direction.iloc[i] = -1
+                supertrend.iloc[i] = upperband.iloc[i]
+        else:
+            if close.iloc[i] >= hl2.iloc[i]:
+                direction.iloc[i] = 1
+                supertrend.iloc[i] = lowerband.iloc[i]
+            else:
+                direction.iloc[i] = -1
+                supertrend.iloc[i] = upperband.iloc[i]
+
+    return direction, supertrend
+
+
+def synthetic_bars(n: int, seed: int = 42) -> pd.DataFrame:
+    """Random-walk 1-minute OHLC around 2000 USD, rounded to the 0.01 pip grid."""
+    rng = np.random.default_rng(seed)
+    close = np.round(2000.0 + np.cumsum(rng.normal(0.0, 0.35, n)), 2)
+    open_ = np.empty(n)
+    open_[0] = close[0]
+    open_[1:] = close[:-1]
+    high = np.maximum(open_, close) + np.round(np.abs(rng.normal(0.0, 0.2, n)), 2)
+    low = np.minimum(open_, close) - np.round(np.abs(rng.normal(0.0, 0.2, n)), 2)
+    ts = pd.date_range("2015-01-01", periods=n, freq="1min", tz="UTC")
+    return pd.DataFrame({"timestamp": ts, "Open": open_, "High": high, "Low": low, "Close": close})
+
+
+def _time(fn, *args, **kwargs):
+    t0 = time.perf_counter()
+    out = fn(*args, **kwargs)
+    return out, time.perf_counter() - t0
+
+
+def _rate(n: int, sec: float) -> float:
+    return n / sec if sec == sec and sec > 0 else float("nan")
+
+
+def check_rma_warmup(length: int) -> bool:
+    """Vectorised RMA vs legacy on short / NaN-bearing inputs (warm-up handling)."""
+    cases = [
+        np.array([], dtype=float),
+        np.arange(1.0, length),  # shorter than length -> all NaN
+        np.r_[np.nan, np.arange(1.0, 3 * length)],  # NaN inside the seed window
+        np.r_[np.arange(1.0, 2 * length), np.nan, np.arange(1.0, length)],  # NaN after the seed
+        np.full(3 * length, 1.25),  # constant window
+    ]
+    ok = True
+    for vals in cases:
+        legacy = legacy_rma(pd.Series(vals, dtype=float), length).to_numpy()
+        fast = rma_values(vals, length)
+        if not (np.array_equal(np.isnan(legacy), np.isnan(fast)) and np.allclose(legacy, fast, rtol=1e-12, atol=0.0, equal_nan=True)):
+            ok = False
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark array SuperTrend kernel and vectorised RMA against the legacy pandas loops")
+    parser.add_argument("--sizes", default="1000000,3500000,10000000", help="Comma-separated bar counts")
+    parser.add_argument("--st-length", type=int, default=10)
+    parser.add_argument("--st-multiplier", type=float, default=3.6)
+    parser.add_argument(
+        "--legacy-max-bars",
+        type=int,
+        default=1_000_000,
+        help="Skip the legacy loops above this many bars (they run for many minutes); 0 = always run",
+    )
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--grid-lengths", default="", help="Optional comma-separated lengths to also time the one-pass grid, e.g. 7,10,14")
+    parser.add_argument("--grid-multipliers", default="2.0,3.0,3.6,4.0", help="Multipliers for the grid timing")
+    parser.add_argument("--stream-bars", type=int, default=200_000, help="Bars fed through SuperTrendState for the streaming check; 0 = skip")
+    args = parser.parse_args(argv)
+
+    warmup_ok = check_rma_warmup(args.st_length)
+    print(f"RMA NaN warm-up parity: {'ok' if warmup_ok else 'MISMATCH'}")
+
+    sizes = [int(float(s)) for s in args.sizes.split(",") if s.strip()]
+    rows = []
+    for n in sizes:
+        df = synthetic_bars(n, seed=args.seed)
+        h = df["High"].to_numpy(dtype=float)
+        l = df["Low"].to_numpy(dtype=float)
+        c = df["Close"].to_numpy(dtype=float)
+        tr = true_range(h, l, c)
+        rma_fast, rma_sec = _time(rma_values, tr, args.st_length)
+        (k_dir, k_st), k_sec = _time(supertrend_arrays, h, l, c, args.st_length, args.st_multiplier)
+        (x_dir, x_st), x_sec = _time(supertrend_arrays, h, l, c, args.st_length, args.st_multiplier, exact=True)
+        kernel_ok = np.array_equal(k_dir, x_dir, equal_nan=True) and np.allclose(k_st, x_st, rtol=1e-12, atol=0.0, equal_nan=True)
+
+        legacy_sec = legacy_rma_sec = float("nan")
+        parity = "skipped"
+        if args.legacy_max_bars == 0 or n <= args.legacy_max_bars:
+            legacy_atr, legacy_rma_sec = _time(legacy_rma, pd.Series(tr), args.st_length)
+            (l_dir, l_st), legacy_sec = _time(legacy_compute_supertrend, df, args.st_length, args.st_multiplier)
+            exact_ok = np.array_equal(l_dir.to_numpy(), x_dir, equal_nan=True) and np.array_equal(l_st.to_numpy(), x_st, equal_nan=True)
+            rma_ok = np.allclose(legacy_atr.to_numpy(), rma_fast, rtol=1e-12, atol=0.0, equal_nan=True)
+            parity = "ok" if (exact_ok and rma_ok and kernel_ok) else "MISMATCH"
+        elif not kernel_ok:
+            parity = "MISMATCH"
+        if parity == "MISMATCH":
+            print(f"❌ Kernel/RMA output differs from legacy at {n:,} bars")
+
+        rows.append({
+            "bars": n,
+            "rma_sec": rma_sec,
+            "legacy_rma_sec": legacy_rma_sec,
+            "kernel_sec": k_sec,
+            "kernel_exact_sec": x_sec,
+            "kernel_bars_per_sec": _rate(n, k_sec),
+            "legacy_sec": legacy_sec,
+            "legacy_bars_per_sec": _rate(n, legacy_sec),
+            "speedup": legacy_sec / k_sec if legacy_sec == legacy_sec and k_sec > 0 else float("nan"),
+            "parity": parity,
+        })
+        print(f"{n:>11,} bars — kernel {k_sec:8.2f}s ({rows[-1]['kernel_bars_per_sec']:,.0f} bars/s), RMA {rma_sec:6.3f}s"
+              + (f" | legacy {legacy_sec:8.2f}s ({rows[-1]['legacy_bars_per_sec']:,.0f} bars/s) x{rows[-1]['speedup']:.1f}" if parity not in ("skipped",) and legacy_sec == legacy_sec else " | legacy skipped")
+              + f" | parity: {parity}")
+
+    print("\n" + pd.DataFrame(rows).to_string(index=False))
+
+    grid_ok = True
+    grid_lengths = [int(x) for x in args.grid_lengths.split(",") if x.strip()]
+    if grid_lengths:
+        grid_mults = [float(x) for x in args.grid_multipliers.split(",") if x.strip()]
+        grid_rows = []
+        for n in sizes:
+            df = synthetic_bars(n, seed=args.seed)
+            h = df["High"].to_numpy(dtype=float)
+            l = df["Low"].to_numpy(dtype=float)
+            c = df["Close"].to_numpy(dtype=float)
+            (configs, g_dir, g_st), g_sec = _time(supertrend_grid_arrays, h, l, c, grid_lengths, grid_mults)
+            t0 = time.perf_counter()
+            same = True
+            for j, (ln, m) in enumerate(configs):
+                s_dir, s_st = supertrend_arrays(h, l, c, ln, m)
+                same &= np.array_equal(s_dir, g_dir[:, j], equal_nan=True) and np.array_equal(s_st, g_st[:, j], equal_nan=True)
+            loop_sec = time.perf_counter() - t0
+            grid_ok &= same
+            grid_rows.append({
+                "bars": n,
+                "configs": len(configs),
+                "grid_sec": g_sec,
+                "per_config_loop_sec": loop_sec,
+                "speedup": loop_sec / g_sec if g_sec > 0 else float("nan"),
+                "parity": "exact" if same else "MISMATCH",
+            })
+        print("\nGrid (one TR pass, one ATR per length) vs one supertrend_arrays() call per config:")
+        print(pd.DataFrame(grid_rows).to_string(index=False))
+
+    stream_ok = True
+    if args.stream_bars > 0:
+        df = synthetic_bars(args.stream_bars, seed=args.seed)
+        h = df["High"].to_numpy(dtype=float)
+        l = df["Low"].to_numpy(dtype=float)
+        c = df["Close"].to_numpy(dtype=float)
+        x_dir, x_st = supertrend_arrays(h, l, c, args.st_length, args.st_multiplier, exact=True)
+        state = SuperTrendState(args.st_length, args.st_multiplier)
+        bars = df[["High", "Low", "Close"]].to_dict("records")
+        t0 = time.perf_counter()
+        out = np.array([state.update(bar) for bar in bars], dtype=float)
+        s_sec = time.perf_counter() - t0
+        stream_ok = np.array_equal(out[:, 0], x_dir, equal_nan=True) and np.array_equal(out[:, 1], x_st, equal_nan=True)
+        print(f"\nStreaming SuperTrendState: {args.stream_bars:,} bars, {s_sec / args.stream_bars * 1e6:.2f} µs/bar, "
+              f"parity vs batch: {'exact' if stream_ok else 'MISMATCH'}")
+
+    if not warmup_ok or not grid_ok or not stream_ok or any(r["parity"] == "MISMATCH" for r in rows):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
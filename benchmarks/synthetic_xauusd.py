@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+Seeded synthetic 1-minute XAUUSD bars with the gaps and regimes of the real feed.
+
+- Trading calendar: closed from Friday 21:00 to Sunday 22:00 UTC and for the daily 21:00-22:00
+  UTC break; a small share of minutes is missing at random, plus the odd multi-hour outage.
+- Prices: log random walk from 1200 USD, rounded to the 0.01 pip grid. Per-minute volatility
+  switches between calm / normal / volatile regimes lasting hours to days, is higher in the
+  13-16 UTC overlap, and the first bar after a gap opens away from the last close.
+
+The same (n, seed) always gives the same bars.
+
+Usage:
+    python benchmarks/synthetic_xauusd.py --bars 1000000 --out-csv data/synthetic_xauusd_1m.csv
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+NS_PER_MIN = 60 * 10**9
+REGIME_SIGMA = np.array([0.00008, 0.00016, 0.00040])  # per-minute log-return sd: calm, normal, volatile
+REGIME_MEAN_MINUTES = np.array([3000.0, 4000.0, 600.0])  # average regime duration
+HOUR_SCALE = np.where((np.arange(24) >= 13) & (np.arange(24) < 16), 1.8, 1.0)
+
+
+def trading_minutes(n: int, start: str, rng: np.random.Generator) -> np.ndarray:
+    """First n open-market minute timestamps (int64 epoch ns, UTC) from start."""
+    t0 = pd.Timestamp(start, tz="UTC").value // NS_PER_MIN
+    span = int(n / 0.6) + 10_000
+    while True:
+        minutes = t0 + np.arange(span, dtype=np.int64)
+        # 1970-01-01 was a Thursday: weekday 0 = Monday after the +3 shift
+        weekday = (minutes // 1440 + 3) % 7
+        hour = (minutes // 60) % 24
+        open_ = hour != 21
+        open_ &= ~((weekday == 4) & (hour >= 21))
+        open_ &= weekday != 5
+        open_ &= ~((weekday == 6) & (hour < 22))
+        open_ &= rng.random(span) >= 0.004
+        # Rare outages: a few hours without bars
+        for s in rng.choice(span, size=max(span // 400_000, 1), replace=False):
+            open_[s : s + int(rng.integers(60, 360))] = False
+        kept = minutes[open_]
+        if len(kept) >= n:
+            return kept[:n] * NS_PER_MIN
+        span *= 2
+
+
+def regime_path(n: int, rng: np.random.Generator) -> np.ndarray:
+    """Per-bar regime id (0 calm, 1 normal, 2 volatile), each run of geometric length."""
+    out = np.empty(n, dtype=np.int8)
+    i, regime = 0, 1
+    while i < n:
+        length = int(rng.geometric(1.0 / REGIME_MEAN_MINUTES[regime]))
+        out[i : i + length] = regime
+        i += length
+        regime = int(rng.choice([r for r in range(3) if r != regime]))
+    return out
+
+
+def synthetic_xauusd(n: int, seed: int = 42, start: str = "2010-01-04") -> pd.DataFrame:
+    """n synthetic 1-minute bars: timestamp (UTC), Open, High, Low, Close."""
+    rng = np.random.default_rng(seed)
+    ts_ns = trading_minutes(n, start, rng)
+    hour = (ts_ns // (60 * NS_PER_MIN)) % 24
+    sigma = REGIME_SIGMA[regime_path(n, rng)] * HOUR_SCALE[hour]
+
+    gap_min = np.diff(ts_ns, prepend=ts_ns[0] - NS_PER_MIN) // NS_PER_MIN
+    # Opening gap after missing minutes: diffusion over the gap, capped at a weekend's worth
+    gap_ret = np.where(gap_min > 1, rng.normal(0.0, 1.0, n) * sigma * np.sqrt(np.minimum(gap_min, 2880)), 0.0)
+    bar_ret = rng.normal(0.0, 1.0, n) * sigma
+    log_close = np.log(1200.0) + np.cumsum(gap_ret + bar_ret)
+    close = np.round(np.exp(log_close), 2)
+    open_ = np.round(np.exp(log_close - bar_ret), 2)
+    wick = np.exp(log_close) * sigma
+    high = np.round(np.maximum(open_, close) + np.abs(rng.normal(0.0, 0.6, n)) * wick, 2)
+    low = np.round(np.minimum(open_, close) - np.abs(rng.normal(0.0, 0.6, n)) * wick, 2)
+    ts = pd.DatetimeIndex(ts_ns.view("datetime64[ns]")).tz_localize("UTC")
+    return pd.DataFrame({"timestamp": ts, "Open": open_, "High": high, "Low": low, "Close": close})
+
+
+def write_csv(df: pd.DataFrame, path: str) -> None:
+    """Write in the layout of data/combined_xauusd_1min_full.csv (naive UTC timestamps)."""
+    out = df.copy()
+    naive = out["timestamp"].dt.tz_localize(None).to_numpy()
+    out["timestamp"] = np.char.replace(np.datetime_as_string(naive, unit="s"), "T", " ")  # ~10x faster than strftime
+    out.to_csv(path, index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write seeded synthetic 1-minute XAUUSD bars to CSV")
+    parser.add_argument("--bars", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--start", default="2010-01-04", help="First calendar day (UTC)")
+    parser.add_argument("--out-csv", required=True)
+    args = parser.parse_args(argv)
+
+    df = synthetic_xauusd(args.bars, args.seed, args.start)
+    write_csv(df, args.out_csv)
+    print(f"Wrote {len(df):,} bars ({df['timestamp'].iloc[0]} .. {df['timestamp'].iloc[-1]}) to {args.out_csv}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Differential check: the pandas loop, the numpy array engine and the compiled kernel (--engine jit)
+must produce identical trades.
+
+Runs every engine over a grid of sides / entry hours / SL caps on seeded synthetic bars and, when
+present, on the real XAUUSD CSV. Without numba the jit engine falls back to numpy, so the kernel's
+logic is additionally run as plain Python on the same inputs (slow, but exercises the exact code
+numba compiles). Exits non-zero on any mismatch.
+
+Usage:
+    python check_engine_parity.py
+    python check_engine_parity.py --input-csv data/combined_xauusd_1min_full.csv --max-rows 300000
+"""
+
+import argparse
+import itertools
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from backtest_engine import bar_arrays, engine_inputs, run_engine_span  # noqa: E402
+from base_strategy import StrategyConfig, backtest_supertrend, prepare_backtest  # noqa: E402
+from engine_jit import _span_kernel, jit_available, run_engine_span_jit  # noqa: E402
+
+SIDES = {"long": {"long"}, "short": {"short"}, "both": None}
+HOURS = {"13-16": (13, 16), "all": None}
+CAPS = (520.0, 150.0)
+
+
+def synthetic_bars(n: int, seed: int = 7) -> pd.DataFrame:
+    """Random-walk 1-minute OHLC around 2000 USD with a few NaN bars (same shape as the benchmark data)."""
+    rng = np.random.default_rng(seed)
+    close = np.round(2000.0 + np.cumsum(rng.normal(0.0, 0.35, n)), 2)
+    open_ = np.r_[close[0], close[:-1]]
+    high = np.maximum(open_, close) + np.round(np.abs(rng.normal(0.0, 0.2, n)), 2)
+    low = np.minimum(open_, close) - np.round(np.abs(rng.normal(0.0, 0.2, n)), 2)
+    gaps = rng.choice(n, size=max(n // 20_000, 1), replace=False)
+    close[gaps] = np.nan
+    ts = pd.date_range("2015-01-01", periods=n, freq="1min", tz="UTC")
+    return pd.DataFrame({"timestamp": ts, "Open": open_, "High": high, "Low": low, "Close": close})
+
+
+def _same_nan(a, b) -> bool:
+    """Element-wise equality of two flat sequences, NaN == NaN."""
+    return len(a) == len(b) and all(x == y or (x != x and y != y) for x, y in zip(a, b))
+
+
+def check_frame(label: str, df: pd.DataFrame, with_pandas: bool) -> int:
+    """Compare the engines over the policy grid on one bar frame; returns the number of mismatches."""
+    bad = 0
+    engines = (["pandas"] if with_pandas else []) + ["numpy", "jit"]
+    for (side, sides), (hours, entry_hours), cap in itertools.product(SIDES.items(), HOURS.items(), CAPS):
+        cfg = StrategyConfig(entry_hours=entry_hours, allowed_sides=sides, max_sl_distance_pips=cap)
+        runs = {e: backtest_supertrend(df, StrategyConfig(**{**cfg.__dict__, "engine": e})) for e in engines}
+        ref = runs["numpy"]
+        for e, res in runs.items():
+            if res.to_csv(index=False) != ref.to_csv(index=False):
+                bad += 1
+                print(f"  MISMATCH {label} sides={side} hours={hours} cap={cap}: {e} {len(res)} vs numpy {len(ref)} trades")
+
+        # The kernel itself, with an entry filter and rejected rows recorded
+        prepared = prepare_backtest(df, cfg)
+        if prepared is None:
+            continue
+        dfi, _, gates = prepared
+        bars = bar_arrays(dfi)
+        rng = np.random.default_rng(len(dfi))
+        entry_ok = (rng.random(len(dfi)) < 0.6, rng.random(len(dfi)) < 0.6)
+        inputs = engine_inputs(bars, gates.in_hours, gates.allowed_sides, entry_ok)
+        want = run_engine_span(inputs, cap, cfg.pip_size, record_rejected=True)
+        kernels = [("python-kernel", _span_kernel)] + ([("compiled", None)] if jit_available() else [])
+        for name, kernel in kernels:
+            got = run_engine_span_jit(inputs, cap, cfg.pip_size, record_rejected=True, kernel=kernel)
+            same = got.trades.frame(with_filter_flag=True).equals(want.trades.frame(with_filter_flag=True))
+            if not (same and _same_nan(got.state, want.state)):
+                bad += 1
+                print(f"  MISMATCH {label} sides={side} hours={hours} cap={cap}: {name} kernel trades/state")
+    return bad
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that all backtest engines produce identical trades.")
+    parser.add_argument("--synthetic-bars", type=int, default=30_000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--input-csv", default=os.path.join("data", "combined_xauusd_1min_full.csv"))
+    parser.add_argument("--max-rows", type=int, default=200_000, help="Rows of --input-csv to use (0 = all)")
+    parser.add_argument("--pandas-max-bars", type=int, default=30_000, help="Skip the slow pandas loop above this size")
+    args = parser.parse_args(argv)
+
+    print(f"numba available: {jit_available()}")
+    frames = [(f"synthetic[{args.synthetic_bars}]", synthetic_bars(args.synthetic_bars, args.seed))]
+    if os.path.exists(args.input_csv):
+        real = pd.read_csv(args.input_csv, nrows=args.max_rows or None)
+        frames.append((os.path.basename(args.input_csv), real))
+    else:
+        print(f"Real data not found at {args.input_csv}; synthetic only")
+
+    bad = 0
+    for label, df in frames:
+        print(f"Checking {label} ({len(df)} bars)")
+        bad += check_frame(label, df, with_pandas=len(df) <= args.pandas_max_bars)
+    print("OK: all engines agree" if bad == 0 else f"FAILED: {bad} mismatches")
+    return 0 if bad == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
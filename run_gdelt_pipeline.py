@@ -12,6 +12,7 @@ Usage:
     python run_gdelt_pipeline.py --all              # Run full pipeline
     python run_gdelt_pipeline.py --fetch-only       # Only fetch headlines
     python run_gdelt_pipeline.py --analyze-only     # Only analyze existing headlines
+    python run_gdelt_pipeline.py --all --profile    # Also time each step (profile_gdelt_pipeline.json)
 """
 
 import argparse
@@ -20,6 +21,9 @@ import sys
 from pathlib import Path
 import time
 
+sys.path.insert(0, str(Path(__file__).parent / "scripts"))
+from profiling import StageProfiler, stage  # noqa: E402
+
 
 def run_command(cmd: list, description: str) -> bool:
     """Run a command and report success/failure."""
@@ -71,9 +75,24 @@ def main():
                        help="Limit number of events to process (-1 for all)")
     parser.add_argument("--skip-dependency-check", action="store_true",
                        help="Skip dependency check")
+    parser.add_argument("--profile", action="store_true",
+                       help="Print per-step wall/CPU time and peak memory (steps run as child processes) "
+                            "and save data/features/profile_gdelt_pipeline.json")
     
     args = parser.parse_args()
-    
+
+    profiler = StageProfiler.start(trace_memory=False) if args.profile else None
+    try:
+        run_pipeline(args)
+    finally:
+        if profiler is not None:
+            profiler.report()
+            profiler.save(str(Path(__file__).parent / "data" / "features" / "profile_gdelt_pipeline.json"))
+            profiler.stop()
+
+
+def run_pipeline(args: argparse.Namespace) -> None:
+    """Run the selected pipeline steps; exits non-zero on failure."""
     # Default to --all if no flags specified
     if not any([args.all, args.fetch_only, args.analyze_only]):
         args.all = True
@@ -84,7 +103,9 @@ def main():
     
     # Check dependencies
     if not args.skip_dependency_check:
-        if not check_dependencies():
+        with stage("check_dependencies"):
+            deps_ok = check_dependencies()
+        if not deps_ok:
             sys.exit(1)
     
     # Define paths
@@ -113,7 +134,8 @@ def main():
             "--lang", "English"
         ]
         
-        success = run_command(fetch_cmd, "Step 1: Fetching GDELT headlines")
+        with stage("fetch_headlines"):
+            success = run_command(fetch_cmd, "Step 1: Fetching GDELT headlines")
         
         if not success:
             print("\n⚠️  Headline fetching failed. Check errors and retry.")
@@ -139,7 +161,8 @@ def main():
             "--device", "cpu"
         ]
         
-        success = run_command(analyze_cmd, "Step 2: Analyzing sentiment with FinBERT")
+        with stage("analyze_sentiment"):
+            success = run_command(analyze_cmd, "Step 2: Analyzing sentiment with FinBERT")
         
         if not success:
             print("\n⚠️  Sentiment analysis failed. Check errors and retry.")
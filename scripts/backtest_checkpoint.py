@@ -0,0 +1,385 @@
+"""
+Checkpoint / resume for backtest_supertrend when new bars are appended to the input CSV.
+
+A full run stops its bookkeeping at the last "settled" bar (backtest_engine.settled_until): the
+first bar whose flip is still waiting on its entry pattern. Everything before it is final no
+matter what gets appended. The checkpoint stores the state at that bar:
+
+- SuperTrend carry (close, ATR, direction, clamped bands) of the bar before it
+- engine state (open position, pending entry, carried ST) with global bar positions
+- the byte offset in the input CSV to re-read from, plus the line found there and the file size
+  (to detect a rewritten or truncated file; edits to rows before the offset are not detected)
+- how many trade rows (and bytes of the trades CSV) were final at that point
+- a fingerprint of the config, input file and trend days so a stale checkpoint is ignored
+
+A resume reads only the CSV tail from the stored offset, continues SuperTrend from the carry
+(bit-identical to a full re-run), runs the engine from the stored state, truncates the trades CSV
+to its final rows and appends the new ones. Only the default filters (trend days, entry hours,
+sides) are supported; entry filters such as --ml-scores-csv need a full run.
+"""
+
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import (
+    BarArrays,
+    EngineState,
+    bar_arrays,
+    engine_inputs,
+    index_ns,
+    run_engine_span,
+    settled_until,
+)
+from bar_set import BarSet
+from base_strategy import TRADE_COLUMNS, StrategyConfig, default_filters, prepare_backtest
+from calendar_index import NS_PER_DAY, CalendarIndex, date_ordinals, hour_mask
+from entry_filters import combined_bar_mask
+from indicators import SuperTrendCarry, carry_at, supertrend_carry, supertrend_continue
+from profiling import stage
+from trade_table import TradeTable
+
+CHECKPOINT_VERSION = 1
+_TAIL_BLOCK = 1 << 18  # bytes read per step when searching the CSV tail for the resume offset
+
+
+@dataclass
+class BacktestCheckpoint:
+    version: int
+    fingerprint: dict
+    bars_done: int  # global position of the first bar to re-process
+    resume_from_ns: int  # timestamp of that bar (rows before it are not re-read)
+    source_offset: int  # byte offset of a line at or before that bar in the input CSV
+    source_anchor: str  # the line at source_offset when the checkpoint was written
+    source_size: int  # input CSV size when the checkpoint was written
+    source_columns: List[str]
+    context: dict  # ts_ns / Open / High / Low / Close / direction / supertrend of bar bars_done - 1
+    st_carry: dict  # SuperTrendCarry of bar bars_done - 1
+    engine: dict  # EngineState before bar bars_done
+    pos_entry_ns: Optional[int]  # entry time of the open position, if any
+    trades_rows: int  # final rows in the trades CSV
+    trades_offset: int  # byte size of the trades CSV holding exactly those rows
+
+    def save(self, path: str) -> None:
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=1)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["BacktestCheckpoint"]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != CHECKPOINT_VERSION:
+                return None
+            return cls(**data)
+        except (OSError, ValueError, TypeError):
+            return None
+
+
+def checkpoint_path(trades_csv: str) -> str:
+    return f"{os.path.splitext(trades_csv)[0]}.checkpoint.json"
+
+
+def config_fingerprint(input_csv: str, cfg: StrategyConfig, date_start: Optional[str], date_end: Optional[str], float32: bool) -> dict:
+    """Run settings a checkpoint is only valid for (trend days are compared separately)."""
+    return {
+        "input_csv": os.path.abspath(input_csv),
+        "st_length": cfg.st_length,
+        "st_multiplier": cfg.st_multiplier,
+        "max_sl_distance_pips": cfg.max_sl_distance_pips,
+        "pip_size": cfg.pip_size,
+        "entry_hours": list(cfg.entry_hours) if cfg.entry_hours is not None else None,
+        "allowed_sides": sorted(cfg.allowed_sides) if cfg.allowed_sides is not None else None,
+        "date_start": date_start,
+        "date_end": date_end,
+        "ohlc_float32": float32,
+    }
+
+
+def days_digest(filter_days: Optional[set], through_day: int) -> Optional[str]:
+    """sha1 of the trend days up to and including day ordinal through_day (None = no day filter)."""
+    if filter_days is None:
+        return None
+    ords = np.sort(date_ordinals(filter_days))
+    return hashlib.sha1(ords[ords <= through_day].tobytes()).hexdigest()
+
+
+def _line_start_offset(csv_path: str, ts_col: int, from_ns: int) -> Tuple[int, str]:
+    """Offset of a line whose timestamp is before from_ns (rows assumed time-ordered), and that line.
+
+    Reads the file backwards in growing blocks, so only the tail is touched.
+    """
+    size = os.path.getsize(csv_path)
+    with open(csv_path, "rb") as f:
+        header_end = len(f.readline())
+        block = _TAIL_BLOCK
+        while True:
+            lo = max(header_end, size - block)
+            f.seek(lo)
+            data = f.read(size - lo)
+            # Skip the partial line the block starts in (unless it starts right after the header)
+            cut = 0 if lo == header_end else data.find(b"\n") + 1
+            first = data[cut:].split(b"\n", 1)[0]
+            if lo == header_end:
+                return lo, first.decode("utf-8", "replace")
+            if cut > 0 and first:
+                ts = pd.Timestamp(first.decode("utf-8").split(",")[ts_col].strip().strip('"'))
+                ts = ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+                if ts.value < from_ns:
+                    return lo + cut, first.decode("utf-8")
+            block *= 2
+
+
+def _read_line_at(csv_path: str, offset: int) -> Optional[str]:
+    try:
+        with open(csv_path, "rb") as f:
+            f.seek(offset)
+            return f.readline().rstrip(b"\n").decode("utf-8", "replace")
+    except OSError:
+        return None
+
+
+def write_trades(results: pd.DataFrame, path: str, final_rows: int) -> int:
+    """Write the trades CSV; returns its byte size after the first final_rows rows."""
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        results.iloc[:final_rows].to_csv(f, index=False)
+        offset = f.tell()
+        results.iloc[final_rows:].to_csv(f, index=False, header=False)
+    return offset
+
+
+def append_trades(results: pd.DataFrame, path: str, keep_bytes: int, final_rows: int) -> int:
+    """Truncate the trades CSV to its final bytes, append results; returns the new final size."""
+    with open(path, "r+", encoding="utf-8", newline="") as f:
+        f.truncate(keep_bytes)
+        f.seek(keep_bytes)
+        results.iloc[:final_rows].to_csv(f, index=False, header=False)
+        offset = f.tell()
+        results.iloc[final_rows:].to_csv(f, index=False, header=False)
+    return offset
+
+
+def _checkpoint_from_run(
+    bars: BarArrays,
+    carry: SuperTrendCarry,
+    cp: int,
+    state: EngineState,
+    global_offset: int,
+    pos_entry_ns: Optional[int],
+    trades_rows: int,
+    fingerprint: dict,
+    source: Tuple[str, str, List[str]],
+) -> BacktestCheckpoint:
+    """Assemble the checkpoint for local bar cp of a run whose local bar 0 is global bar global_offset."""
+    n = len(bars.ts_ns)
+    ctx = cp - 1
+    resume_from_ns = int(bars.ts_ns[cp]) if cp < n else int(bars.ts_ns[-1]) + 1
+    csv_path, ts_name, columns = source
+    offset, anchor = _line_start_offset(csv_path, columns.index(ts_name), resume_from_ns)
+    engine = state._replace(
+        pos_entry_pos=state.pos_entry_pos + global_offset if state.pos_side != 0 else -1,
+        pending_pos=state.pending_pos + global_offset if state.pending_pos >= 0 else -1,
+    )
+    return BacktestCheckpoint(
+        version=CHECKPOINT_VERSION,
+        fingerprint=fingerprint,
+        bars_done=cp + global_offset,
+        resume_from_ns=resume_from_ns,
+        source_offset=offset,
+        source_anchor=anchor,
+        source_size=os.path.getsize(csv_path),
+        source_columns=columns,
+        context={
+            "ts_ns": int(bars.ts_ns[ctx]),
+            "Open": float(bars.open[ctx]),
+            "High": float(bars.high[ctx]),
+            "Low": float(bars.low[ctx]),
+            "Close": float(bars.close[ctx]),
+            "direction": float(bars.direction[ctx]),
+            "supertrend": float(bars.supertrend[ctx]),
+        },
+        st_carry=carry._asdict(),
+        engine=engine._asdict(),
+        pos_entry_ns=pos_entry_ns,
+        trades_rows=trades_rows,
+        trades_offset=0,
+    )
+
+
+def run_full(
+    df: Union[BarSet, pd.DataFrame],
+    cfg: StrategyConfig,
+    fingerprint: dict,
+    source: Tuple[str, str, List[str]],
+) -> Tuple[pd.DataFrame, Optional[BacktestCheckpoint]]:
+    """backtest_supertrend(df, cfg) on the array engine, plus a checkpoint at the last settled bar.
+
+    source is (input_csv, timestamp column, CSV columns). The checkpoint is None when the run is
+    too short to get past the indicator warm-up. fingerprint gets the trend-day digest added.
+    """
+    prepared = prepare_backtest(df, cfg)
+    if prepared is None:
+        return pd.DataFrame(columns=TRADE_COLUMNS), None
+    dfi, cal, gates = prepared
+    bars = bar_arrays(dfi)
+    inputs = engine_inputs(bars, gates.in_hours, gates.allowed_sides)
+    with stage("bar_loop"):
+        cp = settled_until(bars.open, bars.close, bars.direction)
+        head = run_engine_span(inputs, cfg.max_sl_distance_pips, cfg.pip_size, 1, cp)
+        tail = run_engine_span(inputs, cfg.max_sl_distance_pips, cfg.pip_size, max(cp, 1), None, head.state)
+        results = TradeTable.concat([head.trades, tail.trades]).frame()
+    if cp - 1 < cfg.st_length:
+        return results, None
+
+    carry = supertrend_carry(bars.high, bars.low, bars.close, cfg.st_length, cfg.st_multiplier, bars.direction, bars.supertrend, cp - 1)
+    state = head.state
+    pos_entry_ns = int(bars.ts_ns[state.pos_entry_pos]) if state.pos_side != 0 else None
+    fingerprint = dict(fingerprint, trend_days=days_digest(cfg.filter_days, int(cal.day[cp - 1])))
+    ckpt = _checkpoint_from_run(bars, carry, cp, state, 0, pos_entry_ns, len(head.trades), fingerprint, source)
+    return results, ckpt
+
+
+def validate(ckpt: Optional[BacktestCheckpoint], fingerprint: dict, cfg: StrategyConfig, input_csv: str, trades_csv: str) -> Optional[str]:
+    """Why the checkpoint cannot be resumed from, or None when it can."""
+    if ckpt is None:
+        return "no usable checkpoint"
+    through_day = int(ckpt.context["ts_ns"] // NS_PER_DAY)
+    expected = dict(fingerprint, trend_days=days_digest(cfg.filter_days, through_day))
+    if ckpt.fingerprint != expected:
+        return "settings, input file or trend days changed since the checkpoint"
+    if os.path.getsize(input_csv) < ckpt.source_size or _read_line_at(input_csv, ckpt.source_offset) != ckpt.source_anchor:
+        return "input CSV was rewritten (not only appended to)"
+    if not os.path.exists(trades_csv) or os.path.getsize(trades_csv) < ckpt.trades_offset:
+        return f"trades file {trades_csv} is missing or shorter than the checkpoint expects"
+    return None
+
+
+def resume(
+    input_csv: str,
+    cfg: StrategyConfig,
+    ckpt: BacktestCheckpoint,
+    ts_name: str = "timestamp",
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+) -> Tuple[pd.DataFrame, BacktestCheckpoint, int]:
+    """Process the bars from the checkpoint onward.
+
+    Returns (trades emitted since the checkpoint's final rows, new checkpoint, count of those
+    trades that are final). The new checkpoint's trades_offset is left for the caller to set.
+    """
+    with open(input_csv, "rb") as f:
+        f.seek(ckpt.source_offset)
+        new = pd.read_csv(f, header=None, names=ckpt.source_columns)
+    new[ts_name] = pd.to_datetime(new[ts_name], utc=True)
+    new = new.set_index(ts_name).sort_index()
+    new = new[index_ns(new.index) >= ckpt.resume_from_ns]
+    if date_start:
+        new = new[new.index >= pd.Timestamp(date_start, tz="UTC")]
+    if date_end:
+        new = new[new.index < pd.Timestamp(date_end, tz="UTC") + pd.Timedelta(days=1)]
+    cal = CalendarIndex.from_ns(index_ns(new.index))
+    keep = combined_bar_mask(default_filters(cfg), cal)
+    if keep is not None:
+        new = new[keep]
+
+    # Window = context bar (bars_done - 1) followed by the new bars; local 0 is global bars_done - 1
+    ctx = ckpt.context
+    offset = ckpt.bars_done - 1
+    price_dtype = np.float32 if ckpt.fingerprint.get("ohlc_float32") else np.float64
+    high, low, close, open_ = (
+        new[c].to_numpy(dtype=price_dtype).astype(float) for c in ("High", "Low", "Close", "Open")
+    )
+    carry = SuperTrendCarry(**ckpt.st_carry)
+    direction, supertrend, atr = supertrend_continue(high, low, close, cfg.st_length, cfg.st_multiplier, carry)
+    cat = lambda key, values: np.concatenate(([ctx[key]], values))
+    ts_ns = np.concatenate(([ctx["ts_ns"]], index_ns(new.index))).astype(np.int64)
+    bars = BarArrays(
+        ts_ns, cat("Open", open_), cat("High", high), cat("Low", low), cat("Close", close),
+        cat("direction", direction), cat("supertrend", supertrend),
+    )
+    in_hours = hour_mask(CalendarIndex.from_ns(ts_ns), cfg.entry_hours)
+    inputs = engine_inputs(bars, in_hours, cfg.allowed_sides)
+
+    # A position opened before the context bar gets a negative local entry position
+    state = EngineState(**ckpt.engine)
+    state = state._replace(
+        pos_entry_pos=state.pos_entry_pos - offset if state.pos_side != 0 else -1,
+        pending_pos=state.pending_pos - offset if state.pending_pos >= 0 else -1,
+    )
+    cp = settled_until(bars.open, bars.close, bars.direction)
+    entry_ns = ckpt.pos_entry_ns if state.pos_side != 0 else None
+    head = run_engine_span(inputs, cfg.max_sl_distance_pips, cfg.pip_size, 1, cp, state, pos_entry_ns=entry_ns)
+    state = head.state
+    if state.pos_side == 0:
+        pos_entry_ns = None
+    elif state.pos_entry_pos < 0:
+        pos_entry_ns = ckpt.pos_entry_ns
+    else:
+        pos_entry_ns = int(ts_ns[state.pos_entry_pos])
+    tail = run_engine_span(inputs, cfg.max_sl_distance_pips, cfg.pip_size, max(cp, 1), None, state, pos_entry_ns=pos_entry_ns)
+    results = TradeTable.concat([head.trades, tail.trades]).frame()
+
+    if cp <= 1:
+        new_carry = carry
+    else:
+        new_carry = carry_at(high, low, close, atr[cp - 2], cfg.st_multiplier, direction, supertrend, cp - 2)
+    fingerprint = dict(ckpt.fingerprint, trend_days=days_digest(cfg.filter_days, int(ts_ns[cp - 1] // NS_PER_DAY)))
+    new_ckpt = _checkpoint_from_run(
+        bars, new_carry, cp, state, offset, pos_entry_ns,
+        ckpt.trades_rows + len(head.trades), fingerprint, (input_csv, ts_name, ckpt.source_columns),
+    )
+    return results, new_ckpt, len(head.trades)
+
+
+def run_with_checkpoint(
+    input_csv: str,
+    load_df: Callable[[], Union[BarSet, pd.DataFrame]],
+    cfg: StrategyConfig,
+    out_csv: str,
+    resume_requested: bool,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    float32: bool = False,
+) -> pd.DataFrame:
+    """Write the trades CSV and its checkpoint, resuming from the checkpoint when asked and valid.
+
+    load_df is only called for a full run. Returns the complete trades table.
+    """
+    ckpt_path = checkpoint_path(out_csv)
+    columns = list(pd.read_csv(input_csv, nrows=0).columns)
+    fingerprint = config_fingerprint(input_csv, cfg, date_start, date_end, float32)
+    if resume_requested:
+        ckpt = BacktestCheckpoint.load(ckpt_path)
+        reason = validate(ckpt, fingerprint, cfg, input_csv, out_csv)
+        if reason is None:
+            t0 = time.perf_counter()
+            with stage("resume"):
+                new_trades, new_ckpt, final_rows = resume(input_csv, cfg, ckpt, date_start=date_start, date_end=date_end)
+            with stage("write_trades"):
+                new_ckpt.trades_offset = append_trades(new_trades, out_csv, ckpt.trades_offset, final_rows)
+                new_ckpt.save(ckpt_path)
+            print(
+                f"Resumed after {pd.Timestamp(ckpt.context['ts_ns'], tz='UTC')} (bar {ckpt.bars_done}): "
+                f"{new_ckpt.bars_done - ckpt.bars_done} bars settled, {len(new_trades)} trades written "
+                f"in {time.perf_counter() - t0:.2f}s"
+            )
+            return pd.read_csv(out_csv, float_precision="round_trip")
+        print(f"⚠️ Cannot resume ({reason}); running the full backtest")
+
+    results, ckpt = run_full(load_df(), cfg, fingerprint, (input_csv, "timestamp", columns))
+    with stage("write_trades"):
+        offset = write_trades(results, out_csv, ckpt.trades_rows if ckpt is not None else len(results))
+        if ckpt is not None:
+            ckpt.trades_offset = offset
+            ckpt.save(ckpt_path)
+    if ckpt is not None:
+        print(f"Saved checkpoint (settled through bar {ckpt.bars_done}) to: {ckpt_path}")
+    return results
@@ -0,0 +1,383 @@
+"""
+Struct-of-arrays backtest engine for the SuperTrend strategy.
+
+Runs the same entry / trail / exit state machine as the pandas loop in base_strategy.py, but over
+contiguous NumPy columns (int64 timestamps, float64 OHLC / direction / supertrend) extracted once,
+instead of building a pandas Series for every df.iloc[i][col] lookup.
+"""
+
+import math
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from trade_table import NAT_NS, TradeTable
+
+LONG = 1
+SHORT = -1
+
+
+class BarArrays(NamedTuple):
+    """Contiguous per-bar columns the engine reads (all length n)."""
+
+    ts_ns: np.ndarray  # int64 epoch nanoseconds (UTC)
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    direction: np.ndarray  # +1 / -1 / NaN
+    supertrend: np.ndarray
+
+
+def index_ns(index: pd.DatetimeIndex) -> np.ndarray:
+    """int64 epoch nanoseconds for a tz-aware index, independent of the index's stored resolution."""
+    naive = index.tz_convert("UTC").tz_localize(None) if index.tz is not None else index
+    return np.asarray(naive, dtype="datetime64[ns]").view(np.int64)
+
+
+def bar_arrays(df: pd.DataFrame) -> BarArrays:
+    """Extract engine columns from a UTC DatetimeIndex frame carrying direction/supertrend."""
+    return BarArrays(
+        ts_ns=np.ascontiguousarray(index_ns(df.index)),
+        open=df["Open"].to_numpy(dtype=float),
+        high=df["High"].to_numpy(dtype=float),
+        low=df["Low"].to_numpy(dtype=float),
+        close=df["Close"].to_numpy(dtype=float),
+        direction=df["direction"].to_numpy(dtype=float),
+        supertrend=df["supertrend"].to_numpy(dtype=float),
+    )
+
+
+def next_candle_indices(open_: np.ndarray, close: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(next_red_idx, next_green_idx): position of the first red / green bar strictly after each bar.
+
+    Built once per dataset with a reverse running minimum; n marks "none left". Turns the
+    entry-pattern search after a flip into an O(1) lookup instead of a scan of the remaining bars.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    pos = np.arange(n, dtype=np.int64)
+
+    def _next_after(mask: np.ndarray) -> np.ndarray:
+        at_or_after = np.minimum.accumulate(np.where(mask, pos, n)[::-1])[::-1]
+        out = np.full(n, n, dtype=np.int64)
+        out[:-1] = at_or_after[1:]
+        return out
+
+    return _next_after(close < open_), _next_after(close > open_)
+
+
+def flip_masks(open_: np.ndarray, close: np.ndarray, direction: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(flip_bull, flip_bear): bars where direction flips with a candle of the new trend's colour."""
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    d = np.asarray(direction, dtype=float)
+    n = len(close)
+    flip_bull = np.zeros(n, dtype=bool)
+    flip_bear = np.zeros(n, dtype=bool)
+    flip_bull[1:] = (d[:-1] == -1) & (d[1:] == 1) & (close[1:] > open_[1:])
+    flip_bear[1:] = (d[:-1] == 1) & (d[1:] == -1) & (close[1:] < open_[1:])
+    return flip_bull, flip_bear
+
+
+def entry_candidates(
+    open_: np.ndarray,
+    close: np.ndarray,
+    direction: np.ndarray,
+    next_red: np.ndarray,
+    next_green: np.ndarray,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(long_positions, short_positions): every bar the entry pattern can schedule an entry on.
+
+    A superset of what the engine activates (hours, pending/position state and the SL cap are
+    applied later), so entry filters can be evaluated in bulk before the loop runs.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    flip_bull, flip_bear = flip_masks(open_, close, direction)
+
+    def _entries(flips: np.ndarray, next_opposite: np.ndarray, same_colour) -> np.ndarray:
+        pos = next_opposite[flips] + 1
+        pos = pos[pos < n]
+        return np.unique(pos[same_colour(close[pos], open_[pos])])
+
+    return _entries(flip_bull, next_red, np.greater), _entries(flip_bear, next_green, np.less)
+
+
+class EngineState(NamedTuple):
+    """Loop state carried between bars: open position, pending entry and the carried-forward ST.
+
+    Positions are global bar positions, so a state can seed a run over any later span of bars.
+    """
+
+    pos_side: int = 0  # 0 = flat
+    pos_entry_pos: int = -1
+    pos_entry: float = math.nan
+    pos_sl: float = math.nan
+    pending_pos: int = -1
+    pending_ts: int = 0  # timestamp the pending entry activates at
+    pending_side: int = 0
+    prev_st: float = math.nan  # carried-forward supertrend (None in the pandas loop == NaN here)
+
+    @property
+    def idle(self) -> bool:
+        return self.pos_side == 0 and self.pending_pos < 0
+
+
+class EngineInputs(NamedTuple):
+    """Per-bar arrays the loop reads, with the entry pattern already resolved into schedule targets."""
+
+    ts_ns: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    direction: np.ndarray
+    supertrend: np.ndarray
+    in_hours: np.ndarray  # bool
+    target_pos: np.ndarray  # int64: entry bar a flip here schedules, -1 = none
+    target_side: np.ndarray  # int8: LONG / SHORT for target_pos
+    ok_long: Optional[np.ndarray] = None  # entry-filter masks; None = no entry filters
+    ok_short: Optional[np.ndarray] = None
+
+
+class SpanResult(NamedTuple):
+    trades: TradeTable  # closed trades and (with record_rejected) rejected entries, in emission order
+    state: EngineState  # state after the last processed bar
+    stop: int  # first bar not processed (< the requested stop when stopped on sync_idle)
+
+
+def schedule_targets(
+    open_: np.ndarray, close: np.ndarray, direction: np.ndarray, allowed_sides: Optional[set]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(target_pos, target_side): the entry each bar's flip schedules, if its pattern completes.
+
+    Long: bull flip, next red candle, then a green candle enters; short is the mirror image.
+    Sides outside allowed_sides never schedule.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    next_red, next_green = next_candle_indices(open_, close)
+    flip_bull, flip_bear = flip_masks(open_, close, direction)
+    target_pos = np.full(n, -1, dtype=np.int64)
+    target_side = np.zeros(n, dtype=np.int8)
+    for side, label, flips, next_opposite, same_colour in (
+        (LONG, "long", flip_bull, next_red, np.greater),
+        (SHORT, "short", flip_bear, next_green, np.less),
+    ):
+        if allowed_sides is not None and label not in allowed_sides:
+            continue
+        f = np.flatnonzero(flips)
+        e = next_opposite[f] + 1
+        keep = e < n
+        f, e = f[keep], e[keep]
+        keep = same_colour(close[e], open_[e])
+        target_pos[f[keep]] = e[keep]
+        target_side[f[keep]] = side
+    return target_pos, target_side
+
+
+def engine_inputs(
+    bars: BarArrays,
+    in_hours: np.ndarray,
+    allowed_sides: Optional[set],
+    entry_ok: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+) -> EngineInputs:
+    target_pos, target_side = schedule_targets(bars.open, bars.close, bars.direction, allowed_sides)
+    ok_long = ok_short = None
+    if entry_ok is not None:
+        ok_long, ok_short = (np.asarray(m, dtype=bool) for m in entry_ok)
+    return EngineInputs(
+        bars.ts_ns, bars.high, bars.low, bars.close, bars.direction, bars.supertrend,
+        np.asarray(in_hours, dtype=bool), target_pos, target_side, ok_long, ok_short,
+    )
+
+
+def settled_until(open_: np.ndarray, close: np.ndarray, direction: np.ndarray) -> int:
+    """First bar whose flip still waits on its entry pattern (len when none does).
+
+    The engine's state before this bar, and every record emitted before it, are final: bars
+    appended later cannot change them. From this bar on a later run may schedule differently.
+    """
+    open_ = np.asarray(open_, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    next_red, next_green = next_candle_indices(open_, close)
+    flip_bull, flip_bear = flip_masks(open_, close, direction)
+    open_flips = (flip_bull & (next_red + 1 >= n)) | (flip_bear & (next_green + 1 >= n))
+    pending = np.flatnonzero(open_flips)
+    return int(pending[0]) if pending.size else n
+
+
+def carried_supertrend(supertrend: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """(stv, prior): the engine's carried-forward ST at each bar, and its value before the bar.
+
+    The loop starts at bar 1, so bar 0's ST never enters the carry.
+    """
+    s = np.array(supertrend, dtype=float)
+    n = len(s)
+    if n:
+        s[0] = np.nan
+    pos = np.where(np.isnan(s), 0, np.arange(n))
+    stv = s[np.maximum.accumulate(pos)] if n else s
+    prior = np.full(n, np.nan)
+    prior[1:] = stv[:-1]
+    return stv, prior
+
+
+def run_engine_span(
+    inputs: EngineInputs,
+    max_sl_distance_pips: float,
+    pip_size: float,
+    start: int = 1,
+    stop: Optional[int] = None,
+    state: Optional[EngineState] = None,
+    record_rejected: bool = False,
+    sync_idle: Optional[np.ndarray] = None,
+    busy_spans: Optional[list] = None,
+    pos_entry_ns: Optional[int] = None,
+) -> SpanResult:
+    """Run the entry/trail/exit state machine over bars [start, stop) from state.
+
+    Only that slice is converted to Python lists, so runs over short spans stay cheap. Trades
+    are appended straight into a TradeTable; pos_entry_ns is the entry time of a position open in
+    state (default ts_ns[state.pos_entry_pos]; needed when that position is not in ts_ns).
+    sync_idle (length stop - start + 1, entry k for the end of bar start - 1 + k) stops the
+    run at the first bar boundary where both this run and the run sync_idle describes are idle;
+    from there on the two runs are identical. busy_spans collects (first, end) bar ranges during
+    which this run is not idle, i.e. busy at the end of bars first .. end - 1.
+    """
+    n = len(inputs.ts_ns)
+    stop = n if stop is None else min(stop, n)
+    start = max(start, 1)
+    state = state or EngineState()
+    if start >= stop:
+        return SpanResult(TradeTable(), state, max(start, stop))
+    if pos_entry_ns is None:
+        pos_entry_ns = int(inputs.ts_ns[state.pos_entry_pos]) if state.pos_side != 0 else NAT_NS
+    span = slice(start, stop)
+    t = inputs.ts_ns[span].tolist()
+    h = inputs.high[span].tolist()
+    l = inputs.low[span].tolist()
+    c = inputs.close[span].tolist()
+    d = inputs.direction[span].tolist()
+    s = inputs.supertrend[span].tolist()
+    hrs = inputs.in_hours[span].tolist()
+    target_pos = inputs.target_pos[span].tolist()
+    target_side = inputs.target_side[span].tolist()
+    # Activation timestamps of the targets (targets may lie beyond the span)
+    target_ts = inputs.ts_ns[np.maximum(inputs.target_pos[span], 0)].tolist()
+    ok_long = ok_short = None
+    if inputs.ok_long is not None:
+        ok_long = inputs.ok_long[span].tolist()
+        ok_short = inputs.ok_short[span].tolist()
+    sync = None if sync_idle is None else np.asarray(sync_idle, dtype=bool).tolist()
+    track = busy_spans is not None
+    nan = math.nan
+
+    trades = TradeTable()
+    append = trades.append
+    pos_side, pos_entry_pos, pos_entry, pos_sl, pending_pos, pending_ts, pending_side, prev_st = state
+    busy_since = start - 1 if not state.idle else -1
+    end = stop
+
+    for i in range(stop - start):
+        if sync is not None and sync[i] and pos_side == 0 and pending_pos < 0:
+            end = start + i
+            break
+        cur_dir = d[i]
+        prior = prev_st
+        st_raw = s[i]
+        stv = st_raw if st_raw == st_raw else prior
+
+        # 1) Activate pending entry on its bar, honoring hours and cap
+        if pending_pos >= 0 and t[i] >= pending_ts:
+            if hrs[i] and pos_side == 0 and st_raw == st_raw:
+                entry_price = c[i]  # enter at close of entry bar
+                if abs(entry_price - st_raw) / pip_size <= max_sl_distance_pips:
+                    if ok_long is None or (ok_long[i] if pending_side == LONG else ok_short[i]):
+                        pos_side = pending_side
+                        pos_entry_pos = start + i
+                        pos_entry_ns = t[i]
+                        pos_entry = entry_price
+                        pos_sl = st_raw
+                    elif record_rejected:
+                        append(t[i], NAT_NS, pending_side, entry_price, nan, nan, nan, False)
+            pending_pos = -1
+            if track and pos_side == 0:
+                busy_spans.append((busy_since, start + i))
+
+        # 2) Manage open position: trail and check exit via H/L cross of stop
+        if pos_side != 0:
+            trail = stv if cur_dir == pos_side else prior
+            exit_hit = False
+            if trail == trail:
+                if pos_side == LONG:
+                    if trail > pos_sl:
+                        pos_sl = trail
+                    exit_hit = l[i] <= trail
+                else:
+                    if trail < pos_sl:
+                        pos_sl = trail
+                    exit_hit = h[i] >= trail
+            if exit_hit:
+                # Prefer previous candle's ST to avoid exits at post-flip jumps
+                if prior == prior:
+                    exit_price = prior
+                else:
+                    exit_price = l[i] if pos_side == LONG else h[i]
+                pnl_pips = (exit_price - pos_entry) / pip_size * (1 if pos_side == LONG else -1)
+                append(pos_entry_ns, t[i], pos_side, pos_entry, exit_price, pos_sl, pnl_pips, True)
+                pos_side = 0
+                if track and pending_pos < 0:
+                    busy_spans.append((busy_since, start + i))
+
+        # 3) Only schedule new entries during entry hours and if nothing is pending
+        prev_st = stv
+        if not hrs[i] or pending_pos >= 0:
+            continue
+        # Flip + alternating candle pattern, resolved per bar by schedule_targets
+        enter_pos = target_pos[i]
+        if enter_pos >= 0:
+            if track and pos_side == 0:
+                busy_since = start + i
+            pending_pos, pending_ts, pending_side = enter_pos, target_ts[i], target_side[i]
+
+    if track and not (pos_side == 0 and pending_pos < 0):
+        busy_spans.append((busy_since, end))
+    state = EngineState(pos_side, pos_entry_pos, pos_entry, pos_sl, pending_pos, pending_ts, pending_side, prev_st)
+    return SpanResult(trades, state, end)
+
+
+def run_supertrend_trades(
+    bars: BarArrays,
+    in_hours: np.ndarray,
+    allowed_sides: Optional[set],
+    max_sl_distance_pips: float,
+    pip_size: float,
+    entry_ok: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    record_rejected: bool = False,
+    engine: str = "numpy",
+) -> TradeTable:
+    """Run the entry/trail/exit state machine over the bar arrays; trades as a TradeTable.
+
+    Mirrors backtest_supertrend's pandas loop rule-for-rule (flip + alternating candle entry,
+    hours and SL-cap gating at activation, ST trailing and H/L-cross exits). entry_ok is a
+    precomputed (long, short) pair of per-bar masks from the entry filters, read for entries that
+    pass the cap; with record_rejected, entries it blocks are reported with passed=False.
+    Rows come in the order the pandas loop appends them. engine="jit" runs the loop on the
+    compiled kernel in engine_jit (this engine when numba is not installed).
+    """
+    inputs = engine_inputs(bars, in_hours, allowed_sides, entry_ok)
+    if engine == "jit":
+        from engine_jit import run_engine_span_jit
+
+        return run_engine_span_jit(inputs, max_sl_distance_pips, pip_size, record_rejected=record_rejected).trades
+    return run_engine_span(inputs, max_sl_distance_pips, pip_size, record_rejected=record_rejected).trades
+
+
+def side_label(side: int) -> str:
+    return "long" if side == LONG else "short"
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Year/month-partitioned 1-minute bar dataset, built incrementally from CSV pulls.
+
+Layout (one directory per calendar month, one .npy per column, like the OHLC cache):
+
+    data/bars/xauusd_1m/
+        manifest.json                      columns + per-partition rows / first / last timestamp
+        year=2024/month=01/timestamp.npy   int64 epoch ns UTC, sorted, unique
+        year=2024/month=01/Open.npy ...    float64
+
+ingest() merges CSV pulls into it: rows are deduplicated by timestamp (later pulls win), and
+only the months a pull touches are rewritten, so appending a new month leaves every older
+partition untouched. BarDataset.read(date_start, date_end) opens only the months overlapping the
+range (memory-mapped) and trims the edge months with a binary search.
+
+Usage:
+    python scripts/bar_dataset.py ingest --dataset data/bars/xauusd_1m data/twelvedata_xauusd_1min_full.csv data/pull_2025_11.csv
+    python scripts/bar_dataset.py info --dataset data/bars/xauusd_1m
+    python scripts/base_strategy.py --dataset data/bars/xauusd_1m --date-start 2025-01-01
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import index_ns
+from ohlc_cache import PRICE_COLUMNS, date_bounds_ns, utc_times
+
+DEFAULT_DATASET_DIR = os.path.join("data", "bars", "xauusd_1m")
+FORMAT_VERSION = 1
+COLUMNS = ("timestamp",) + PRICE_COLUMNS
+_TIMESTAMP_NAMES = ("timestamp", "datetime", "time", "date")
+
+
+def _partition_dir(root: str, key: str) -> str:
+    year, month = key.split("-")
+    return os.path.join(root, f"year={year}", f"month={month}")
+
+
+def _month_keys(ts_ns: np.ndarray) -> np.ndarray:
+    """YYYY-MM partition key per timestamp."""
+    return np.datetime_as_string(ts_ns.view("M8[ns]"), unit="M")
+
+
+def read_pull(csv_path: str) -> pd.DataFrame:
+    """One CSV pull as timestamp (int64 ns UTC) + OHLC float64 columns.
+
+    The timestamp column may be called timestamp / datetime / time / date (else the first column
+    is used); OHLC names are matched case-insensitively. Naive timestamps are taken as UTC.
+    """
+    raw = pd.read_csv(csv_path)
+    by_lower = {c.strip().lower(): c for c in raw.columns}
+    ts_col = next((by_lower[n] for n in _TIMESTAMP_NAMES if n in by_lower), raw.columns[0])
+    missing = [c for c in PRICE_COLUMNS if c.lower() not in by_lower]
+    if missing:
+        raise ValueError(f"{csv_path}: missing column(s) {', '.join(missing)}")
+    ts = pd.DatetimeIndex(pd.to_datetime(raw[ts_col], utc=True))
+    out = pd.DataFrame({"timestamp": index_ns(ts)})
+    for c in PRICE_COLUMNS:
+        out[c] = raw[by_lower[c.lower()]].to_numpy(dtype=np.float64)
+    return out
+
+
+def _dedup_sorted(frame: pd.DataFrame) -> pd.DataFrame:
+    """Sort by timestamp, keeping the last row per timestamp (rows later in frame win)."""
+    frame = frame.drop_duplicates("timestamp", keep="last")
+    return frame.sort_values("timestamp", kind="stable").reset_index(drop=True)
+
+
+class BarDataset:
+    """Reader / writer for one partitioned dataset directory."""
+
+    def __init__(self, root: str = DEFAULT_DATASET_DIR):
+        self.root = root
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> dict:
+        path = os.path.join(self.root, "manifest.json")
+        if not os.path.exists(path):
+            return {"format": FORMAT_VERSION, "columns": list(COLUMNS), "partitions": {}}
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("format") != FORMAT_VERSION:
+            raise ValueError(f"{path}: unsupported dataset format {manifest.get('format')}")
+        return manifest
+
+    def _save_manifest(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, "manifest.json")
+        tmp = f"{path}.tmp{os.getpid()}"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f, indent=1, sort_keys=True)
+        os.replace(tmp, path)
+
+    def __len__(self) -> int:
+        return sum(p["rows"] for p in self.manifest["partitions"].values())
+
+    @property
+    def partitions(self) -> List[str]:
+        """Partition keys (YYYY-MM) in time order."""
+        return sorted(self.manifest["partitions"])
+
+    def exists(self) -> bool:
+        return bool(self.manifest["partitions"])
+
+    def _read_partition(self, key: str, mmap: bool = True) -> Dict[str, np.ndarray]:
+        d = _partition_dir(self.root, key)
+        return {c: np.load(os.path.join(d, f"{c}.npy"), mmap_mode="r" if mmap else None) for c in self.manifest["columns"]}
+
+    def _write_partition(self, key: str, frame: pd.DataFrame) -> None:
+        d = _partition_dir(self.root, key)
+        tmp = f"{d}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for c in self.manifest["columns"]:
+            np.save(os.path.join(tmp, f"{c}.npy"), frame[c].to_numpy())
+        shutil.rmtree(d, ignore_errors=True)
+        os.replace(tmp, d)
+        ts = frame["timestamp"].to_numpy()
+        self.manifest["partitions"][key] = {"rows": len(frame), "first_ns": int(ts[0]), "last_ns": int(ts[-1])}
+
+    def ingest(self, pulls: Iterable[pd.DataFrame]) -> Dict[str, str]:
+        """Merge pulls (read_pull frames, oldest first) into the dataset.
+
+        Returns {partition key: "new" | "updated" | "unchanged"} for every month the pulls touch;
+        other partitions are neither read nor written.
+        """
+        incoming = _dedup_sorted(pd.concat(list(pulls), ignore_index=True))
+        status: Dict[str, str] = {}
+        if incoming.empty:
+            return status
+        keys = _month_keys(incoming["timestamp"].to_numpy())
+        bounds = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            key = str(keys[lo])
+            new = incoming.iloc[lo:hi]
+            if key in self.manifest["partitions"]:
+                old = pd.DataFrame(self._read_partition(key, mmap=False))
+                merged = _dedup_sorted(pd.concat([old, new], ignore_index=True))
+                if merged.equals(old):
+                    status[key] = "unchanged"
+                    continue
+                status[key] = "updated"
+            else:
+                merged = new.reset_index(drop=True)
+                status[key] = "new"
+            self._write_partition(key, merged)
+        self._save_manifest()
+        return status
+
+    def prune(self, date_start: Optional[str] = None, date_end: Optional[str] = None) -> Tuple[List[str], Optional[int], Optional[int]]:
+        """Partitions overlapping [date_start, date_end] (end inclusive) and the range in epoch ns."""
+        lo, hi = date_bounds_ns(date_start, date_end)
+        keep = []
+        for key in self.partitions:
+            p = self.manifest["partitions"][key]
+            if (lo is None or p["last_ns"] >= lo) and (hi is None or p["first_ns"] < hi):
+                keep.append(key)
+        return keep, lo, hi
+
+    def read(self, date_start: Optional[str] = None, date_end: Optional[str] = None) -> pd.DataFrame:
+        """Bars in [date_start, date_end] (UTC dates, end inclusive; None = open) as timestamp + OHLC.
+
+        Only overlapping month partitions are opened; a single-partition result is a view of the
+        memory-mapped files, otherwise the pieces are concatenated.
+        """
+        keys, lo, hi = self.prune(date_start, date_end)
+        pieces = []
+        for key in keys:
+            cols = self._read_partition(key)
+            ts = cols["timestamp"]
+            start = 0 if lo is None else int(np.searchsorted(ts, lo, "left"))
+            stop = len(ts) if hi is None else int(np.searchsorted(ts, hi, "left"))
+            if stop > start:
+                pieces.append({c: a[start:stop] for c, a in cols.items()})
+        if len(pieces) == 1:
+            cols = pieces[0]
+        elif pieces:
+            cols = {c: np.concatenate([p[c] for p in pieces]) for c in self.manifest["columns"]}
+        else:
+            cols = {c: np.zeros(0, dtype=np.int64 if c == "timestamp" else np.float64) for c in self.manifest["columns"]}
+        data = {c: (utc_times(a) if c == "timestamp" else a) for c, a in cols.items()}
+        return pd.DataFrame(data, copy=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Year/month-partitioned 1-minute bar dataset")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_ingest = sub.add_parser("ingest", help="Merge CSV pulls into the dataset (dedup by timestamp; later files win)")
+    p_ingest.add_argument("csv", nargs="+", help="CSV pulls, oldest first")
+    p_ingest.add_argument("--dataset", default=DEFAULT_DATASET_DIR, help=f"Dataset directory (default: {DEFAULT_DATASET_DIR})")
+    p_info = sub.add_parser("info", help="List partitions")
+    p_info.add_argument("--dataset", default=DEFAULT_DATASET_DIR, help=f"Dataset directory (default: {DEFAULT_DATASET_DIR})")
+    args = parser.parse_args(argv)
+
+    ds = BarDataset(args.dataset)
+    if args.command == "ingest":
+        pulls = []
+        for path in args.csv:
+            pull = read_pull(path)
+            print(f"Read {len(pull)} rows from {path}")
+            pulls.append(pull)
+        status = ds.ingest(pulls)
+        for state in ("new", "updated", "unchanged"):
+            months = [k for k, v in status.items() if v == state]
+            if months:
+                print(f"{state.capitalize()} partitions ({len(months)}): {', '.join(months)}")
+        print(f"✅ Dataset {args.dataset}: {len(ds.partitions)} partitions, {len(ds)} bars")
+    else:
+        for key in ds.partitions:
+            p = ds.manifest["partitions"][key]
+            print(f"{key}  {p['rows']:>7} bars  {pd.Timestamp(p['first_ns'], tz='UTC')} .. {pd.Timestamp(p['last_ns'], tz='UTC')}")
+        print(f"{len(ds.partitions)} partitions, {len(ds)} bars")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,86 @@
+"""
+Bars parsed once per run and shared by the backtest, the plot and the reports.
+
+A BarSet holds the OHLC frame indexed by a sorted UTC DatetimeIndex, its int64 epoch-ns
+timestamps and the CalendarIndex over them. base_strategy.main builds one from the loaded input
+(after the date filter and --max-rows) and passes it to backtest_supertrend and plot_supertrend,
+so the timestamp column is parsed and sorted once and the plot shows exactly the backtested bars
+instead of re-reading the whole CSV. load_bars is the same load for the research scripts (sweep,
+walk_forward, case_matrix, candidate_trades), so every entry point reads a date range the same way.
+"""
+
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import index_ns
+from calendar_index import CalendarIndex
+from csv_stream import read_ohlc_csv
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR, load_ohlc_range
+
+
+class BarSet:
+    """UTC-indexed, time-sorted bars plus their epoch-ns timestamps and calendar index."""
+
+    def __init__(self, frame: pd.DataFrame, cal: Optional[CalendarIndex] = None):
+        self.frame = frame
+        self.ts_ns = index_ns(frame.index)
+        self.cal = cal if cal is not None else CalendarIndex.from_ns(self.ts_ns)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, timestamp_col: str = "timestamp") -> "BarSet":
+        """Index df by its timestamp column (parsed as UTC unless already tz-aware) and sort if needed."""
+        ts = df[timestamp_col]
+        if not isinstance(ts.dtype, pd.DatetimeTZDtype):
+            df = df.assign(**{timestamp_col: pd.to_datetime(ts, utc=True)})
+        elif str(ts.dt.tz) != "UTC":
+            df = df.assign(**{timestamp_col: ts.dt.tz_convert("UTC")})
+        frame = df.set_index(timestamp_col)
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index()
+        return cls(frame)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.frame) == 0
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        return self.frame.index
+
+    def select(self, mask: np.ndarray) -> "BarSet":
+        """Bars kept by a boolean mask, with the calendar index sliced rather than rebuilt."""
+        return BarSet(self.frame[mask], self.cal.select(mask))
+
+    def assign(self, **columns) -> "BarSet":
+        """Same bars with extra / replaced columns (the original frame is not modified)."""
+        return BarSet(self.frame.assign(**columns), self.cal)
+
+
+def as_bar_set(data: Union[BarSet, pd.DataFrame]) -> BarSet:
+    """data itself if it is a BarSet, else BarSet.from_frame(data)."""
+    return data if isinstance(data, BarSet) else BarSet.from_frame(data)
+
+
+def load_bars(
+    csv_path: str,
+    cache_dir: Optional[str] = DEFAULT_OHLC_CACHE_DIR,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    float32: bool = False,
+    timestamp_col: str = "timestamp",
+) -> BarSet:
+    """Bars of an OHLC CSV with date_start <= date <= date_end (UTC dates, end inclusive; None = open).
+
+    With cache_dir the range is a view of the memory-mapped OHLC cache (load_ohlc_range); without
+    it the CSV is read in chunks that start near date_start and stop past date_end (read_ohlc_csv).
+    """
+    if cache_dir:
+        df = load_ohlc_range(csv_path, cache_dir, date_start, date_end, float32=float32, timestamp_col=timestamp_col)
+    else:
+        df = read_ohlc_csv(csv_path, date_start, date_end, timestamp_col=timestamp_col)
+    return BarSet.from_frame(df, timestamp_col)
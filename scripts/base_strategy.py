@@ -5,11 +5,33 @@ Clean reimplementation of the Twelve Data base strategy with plotting and README
 import os
 import sys
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 import pandas as pd
 # Plotly is optional; only required when --plot is used. Imported lazily in plot_supertrend.
+
+from backtest_engine import bar_arrays, next_candle_indices, run_supertrend_trades
+from bar_dataset import BarDataset
+from bar_set import BarSet, as_bar_set
+from calendar_index import CalendarIndex, hour_mask
+from csv_stream import read_ohlc_csv
+from engine_jit import jit_available
+from entry_filters import (
+    EntryFilter,
+    EntryGates,
+    EntryHoursFilter,
+    MLScoreFilter,
+    SideFilter,
+    TrendDayFilter,
+    build_gates,
+    combined_bar_mask,
+)
+from indicator_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB, IndicatorCache
+from indicators import rma_values, supertrend_arrays, supertrend_grid_arrays
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR, PRICE_COLUMNS, load_ohlc, load_ohlc_range
+from parallel_backtest import run_supertrend_parallel
+from profiling import StageProfiler, stage
  
 
 
@@ -22,79 +44,56 @@ class StrategyConfig:
     entry_hours: Optional[Tuple[int, int]] = (13, 16)  # inclusive start, exclusive end (UTC)
     filter_days: Optional[set] = None  # set of allowed dates (datetime.date)
     allowed_sides: Optional[set] = None  # {"long","short"} or None for both
+    indicator_cache_dir: Optional[str] = None  # on-disk SuperTrend cache directory; None disables caching
+    indicator_cache_max_mb: float = DEFAULT_MAX_MB  # LRU eviction budget for the cache
+    engine: str = "numpy"  # "numpy" (struct-of-arrays engine), "jit" (compiled kernel, needs numba) or "pandas" (reference per-bar loop)
+    workers: int = 1  # >1 runs the numpy engine over day-aligned chunks in a process pool
 
 # Default output directory for results and plots (store run outputs under results/trends by default)
 DEFAULT_OUT_DIR = os.path.join("results", "trends")
 
 def rma(series: pd.Series, length: int) -> pd.Series:
-    """Pine RMA: EMA with alpha = 1/length, seeded by SMA."""
-    alpha = 1.0 / length
-    sma = series.rolling(length, min_periods=length).mean()
-    r = pd.Series(index=series.index, dtype=float)
-    if len(series) >= length:
-        r.iloc[length - 1] = sma.iloc[length - 1]
-    for i in range(length, len(series)):
-        prev = r.iloc[i - 1]
-        r.iloc[i] = alpha * series.iloc[i] + (1 - alpha) * prev
-    return r
-
-
-def compute_supertrend(df: pd.DataFrame, length: int, multiplier: float) -> Tuple[pd.Series, pd.Series]:
+    """Pine RMA: EMA with alpha = 1/length, seeded by SMA (vectorised, see indicators.rma_values)."""
+    return pd.Series(rma_values(series.to_numpy(dtype=float), length), index=series.index)
+
+
+def compute_supertrend(
+    df: pd.DataFrame, length: int, multiplier: float, cache: Optional[IndicatorCache] = None
+) -> Tuple[pd.Series, pd.Series]:
     """Compute SuperTrend direction (+1/-1) and line using an ATR based on RMA.
 
+    Delegates to the array kernel in indicators.py; with a cache, repeat runs on the same bars
+    and parameters load the arrays from disk instead.
     Returns (direction, supertrend).
     """
-    high = df["High"].astype(float)
-    low = df["Low"].astype(float)
-    close = df["Close"].astype(float)
-
-    hl2 = (high + low) / 2.0
-    # True Range without NaN propagation from shift
-    tr = pd.concat([
-        (high - low),
-        (high - close.shift()).abs(),
-        (low - close.shift()).abs(),
-    ], axis=1).max(axis=1, skipna=True)
-    atr = rma(tr, length)
-
-    upperband = hl2 + multiplier * atr
-    lowerband = hl2 - multiplier * atr
-
-    direction = pd.Series(index=df.index, dtype=float)
-    supertrend = pd.Series(index=df.index, dtype=float)
-
-    for i in range(len(df)):
-        if i == 0 or np.isnan(atr.iloc[i]):
-            direction.iloc[i] = np.nan
-            supertrend.iloc[i] = np.nan
-            continue
+    high = df["High"].to_numpy(dtype=float)
+    low = df["Low"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+    if cache is not None:
+        index_ns = df.index.asi8 if isinstance(df.index, pd.DatetimeIndex) else None
+        direction, supertrend, _ = cache.supertrend(high, low, close, length, multiplier, index_ns=index_ns)
+    else:
+        direction, supertrend = supertrend_arrays(high, low, close, length, multiplier)
+    return pd.Series(direction, index=df.index, copy=False), pd.Series(supertrend, index=df.index, copy=False)
 
-        if direction.iloc[i - 1] == 1:
-            lowerband.iloc[i] = max(lowerband.iloc[i], lowerband.iloc[i - 1])
-            if close.iloc[i] < lowerband.iloc[i]:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
-            else:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-        elif direction.iloc[i - 1] == -1:
-            upperband.iloc[i] = min(upperband.iloc[i], upperband.iloc[i - 1])
-            if close.iloc[i] > upperband.iloc[i]:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-            else:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
-        else:
-            # Seed direction based on where close sits relative to hl2
-            if close.iloc[i] >= hl2.iloc[i]:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-            else:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
 
-    return direction, supertrend
+def compute_supertrend_grid(
+    df: pd.DataFrame, lengths: Sequence[int], multipliers: Sequence[float]
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """SuperTrend for every (length, multiplier) pair, sharing TR and one ATR per length.
+
+    Returns (direction, supertrend) DataFrames indexed like df, with (st_length, st_multiplier)
+    MultiIndex columns; each column equals compute_supertrend() for that pair.
+    """
+    configs, direction, supertrend = supertrend_grid_arrays(
+        df["High"].to_numpy(dtype=float),
+        df["Low"].to_numpy(dtype=float),
+        df["Close"].to_numpy(dtype=float),
+        lengths,
+        multipliers,
+    )
+    cols = pd.MultiIndex.from_tuples(configs, names=["st_length", "st_multiplier"])
+    return pd.DataFrame(direction, index=df.index, columns=cols), pd.DataFrame(supertrend, index=df.index, columns=cols)
 
 
 def within_entry_hours(ts: pd.Timestamp, entry_hours: Optional[Tuple[int, int]]) -> bool:
@@ -104,31 +103,129 @@ def within_entry_hours(ts: pd.Timestamp, entry_hours: Optional[Tuple[int, int]])
     return start_h <= ts.hour < end_h
 
 
-def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
+TRADE_COLUMNS = ["entry_time", "exit_time", "side", "entry", "exit", "final_stop", "pips"]
+
+
+def simple_trades(results: pd.DataFrame) -> pd.DataFrame:
+    """Compact trades table (entry_time as 'YYYY-MM-DD HH:MM', pips, final_stop, side)."""
+    cols = ["entry_time", "pips", "final_stop"]
+    if "side" in results.columns:
+        cols.append("side")
+    available_cols = [c for c in cols if c in results.columns]
+    simplified_df = results[available_cols].copy()
+    # Format entry_time for compact CSV
+    if 'entry_time' in simplified_df.columns:
+        simplified_df['entry_time'] = pd.to_datetime(simplified_df['entry_time'], utc=True).dt.strftime("%Y-%m-%d %H:%M")
+    return simplified_df
+
+
+def default_filters(cfg: StrategyConfig) -> List[EntryFilter]:
+    """Entry filters implied by the config: trend days, entry hours and allowed sides."""
+    filters: List[EntryFilter] = []
+    if cfg.filter_days:
+        filters.append(TrendDayFilter(cfg.filter_days))
+    filters.append(EntryHoursFilter(cfg.entry_hours))
+    filters.append(SideFilter(cfg.allowed_sides))
+    return filters
+
+
+def prepare_backtest(
+    bars: Union[BarSet, pd.DataFrame],
+    cfg: StrategyConfig,
+    filters: Optional[Sequence[EntryFilter]] = None,
+) -> Optional[Tuple[pd.DataFrame, CalendarIndex, EntryGates]]:
+    """Drop filtered days, add direction/supertrend and build the gates.
+
+    bars is a BarSet or a frame with a timestamp column (indexed by UTC timestamp here); it is not
+    modified. Returns None when no bars remain.
+    """
+    if len(bars) == 0:
+        return None
+    if not isinstance(bars, BarSet):
+        with stage("index_bars"):
+            bars = BarSet.from_frame(bars)
+
+    filters = default_filters(cfg) + list(filters or [])
+    with stage("filter_days"):
+        keep = combined_bar_mask(filters, bars.cal)
+        if keep is not None:
+            bars = bars.select(keep)
+    if bars.empty:
+        return None
+    df, cal = bars.frame.copy(deep=False), bars.cal
+
+    with stage("supertrend"):
+        cache = IndicatorCache(cfg.indicator_cache_dir, cfg.indicator_cache_max_mb) if cfg.indicator_cache_dir else None
+        direction, st = compute_supertrend(df, cfg.st_length, cfg.st_multiplier, cache=cache)
+        df["direction"] = direction
+        df["supertrend"] = st
+    with stage("entry_gates"):
+        gates = build_gates(filters, cal, df)
+    return df, cal, gates
+
+
+def backtest_supertrend(
+    df: Union[BarSet, pd.DataFrame],
+    cfg: StrategyConfig,
+    filters: Optional[Sequence[EntryFilter]] = None,
+    record_rejected: bool = False,
+) -> pd.DataFrame:
     """Backtest implementing README rules:
     - Valid trade days filter (optional)
     - Entry pattern: flip, then alternating candle, then enter on following candle (if still within hours)
     - Enforce entry hours and max SL distance cap at activation
     - Exit when Low<=ST (long) or High>=ST (short); trail SL to current ST each bar
-    """
-    if df.empty:
-        return pd.DataFrame(columns=["entry_time", "exit_time", "side", "entry", "exit", "final_stop", "pips"])
-
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-    df.set_index("timestamp", inplace=True)
-    df = df.sort_index()
 
-    if cfg.filter_days:
-        mask = pd.Series([ts.date() in cfg.filter_days for ts in df.index], index=df.index)
-        df = df[mask]
-        if df.empty:
-            return pd.DataFrame(columns=["entry_time", "exit_time", "side", "entry", "exit", "final_stop", "pips"]) 
+    Entry gating comes from default_filters(cfg) plus any extra filters (news sentiment, ML score),
+    all evaluated in bulk before the loop. With record_rejected, entries an extra filter blocks are
+    kept as rows with passed_news_filter=False. df may be a BarSet or a frame with a timestamp column.
+    """
+    columns = TRADE_COLUMNS + (["passed_news_filter"] if record_rejected else [])
+    prepared = prepare_backtest(df, cfg, filters)
+    if prepared is None:
+        return pd.DataFrame(columns=columns)
+    df, cal, gates = prepared
+
+    if cfg.engine not in ("numpy", "jit", "pandas"):
+        raise ValueError(f"Unknown engine: {cfg.engine}")
+    with stage("bar_loop"):
+        return _run_bar_loop(df, cfg, gates, record_rejected)
+
+
+def _run_bar_loop(df: pd.DataFrame, cfg: StrategyConfig, gates: EntryGates, record_rejected: bool) -> pd.DataFrame:
+    """Dispatch the prepared bars to the configured engine."""
+    if cfg.engine == "pandas":
+        return _backtest_loop_pandas(df, cfg, gates, record_rejected)
+    bars = bar_arrays(df)
+    if cfg.workers > 1 and cfg.engine == "numpy":
+        trades = run_supertrend_parallel(
+            bars,
+            gates.in_hours,
+            gates.allowed_sides,
+            cfg.max_sl_distance_pips,
+            cfg.pip_size,
+            entry_ok=gates.entry_ok,
+            record_rejected=record_rejected,
+            workers=cfg.workers,
+        )
+    else:
+        trades = run_supertrend_trades(
+            bars,
+            gates.in_hours,
+            gates.allowed_sides,
+            cfg.max_sl_distance_pips,
+            cfg.pip_size,
+            entry_ok=gates.entry_ok,
+            record_rejected=record_rejected,
+            engine=cfg.engine,
+        )
+    return trades.frame(with_filter_flag=record_rejected)
 
-    direction, st = compute_supertrend(df, cfg.st_length, cfg.st_multiplier)
-    df["direction"] = direction
-    df["supertrend"] = st
 
+def _backtest_loop_pandas(df: pd.DataFrame, cfg: StrategyConfig, gates: EntryGates, record_rejected: bool = False) -> pd.DataFrame:
+    """Reference per-bar loop over the indexed frame (engine="pandas"); the array engine must match it."""
+    in_hours = gates.in_hours
+    allowed_sides = gates.allowed_sides
     trades = []
     position: Optional[Tuple[str, pd.Timestamp, float, float]] = None  # (side, entry_time, entry_price, stop_price)
     pending_entry: Optional[dict] = None  # {"entry_idx": Timestamp, "side": "long"|"short"}
@@ -140,6 +237,7 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
 
     idx = list(df.index)
     n = len(idx)
+    next_red_idx, next_green_idx = next_candle_indices(df["Open"].to_numpy(), df["Close"].to_numpy())
     for i in range(1, n):
         ts = idx[i]
         # derive current direction and supertrend with carry-forward of prior ST
@@ -150,12 +248,26 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
 
         # 1) Activate pending entry on its bar, honoring hours and cap
         if pending_entry is not None and ts >= pending_entry["entry_idx"]:
-            if within_entry_hours(ts, cfg.entry_hours) and position is None:
+            if in_hours[i] and position is None:
                 st_now = df.loc[ts, "supertrend"]
                 if not np.isnan(st_now):
                     entry_price = float(df.loc[ts, "Close"])  # enter at close of entry bar
                     if pips_between(entry_price, st_now) <= cfg.max_sl_distance_pips:
-                        position = (pending_entry["side"], ts, entry_price, float(st_now))
+                        # Entry filters (news, ML) were evaluated up front; read their mask
+                        passed = gates.entry_ok is None or gates.entry_ok[0 if pending_entry["side"] == "long" else 1][i]
+                        if passed:
+                            position = (pending_entry["side"], ts, entry_price, float(st_now))
+                        elif record_rejected:
+                            trades.append({
+                                "entry_time": ts,
+                                "exit_time": None,
+                                "side": pending_entry["side"],
+                                "entry": entry_price,
+                                "exit": None,
+                                "final_stop": None,
+                                "pips": None,
+                                "passed_news_filter": False,
+                            })
             pending_entry = None
 
         # 2) Manage open position: trail and check exit via H/L cross of stop
@@ -191,13 +303,14 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
                     "exit": exit_price,
                     "final_stop": sl_price,
                     "pips": pnl_pips,
+                    **({"passed_news_filter": True} if record_rejected else {}),
                 })
                 position = None
             else:
                 position = (side, ent_time, ent_price, sl_price)
 
         # 3) Only schedule new entries during entry hours and if nothing is pending
-        if not within_entry_hours(ts, cfg.entry_hours) or pending_entry is not None:
+        if not in_hours[i] or pending_entry is not None:
             # carry forward state even if we skip scheduling new entries
             direction_prev = current_direction
             prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
@@ -226,20 +339,17 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
                 direction_prev = current_direction
                 prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
                 continue
-            future = df.iloc[i + 1 :]
-            next_red = future[future["Close"] < future["Open"]].head(1)
-            if next_red.empty:
+            red_pos = int(next_red_idx[i])
+            if red_pos >= n:
                 direction_prev = current_direction
                 prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
                 continue
-            red_ts = next_red.index[0]
-            red_pos = df.index.get_loc(red_ts)
             enter_pos = red_pos + 1
             if enter_pos < n:
                 enter_row = df.iloc[enter_pos]
                 if float(enter_row["Close"]) > float(enter_row["Open"]):
                     # Respect allowed sides
-                    if cfg.allowed_sides is None or "long" in cfg.allowed_sides:
+                    if allowed_sides is None or "long" in allowed_sides:
                         pending_entry = {"entry_idx": df.index[enter_pos], "side": "long"}
 
         elif flip_bear and C0_red:
@@ -248,31 +358,28 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
                 direction_prev = current_direction
                 prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
                 continue
-            future = df.iloc[i + 1 :]
-            next_green = future[future["Close"] > future["Open"]].head(1)
-            if next_green.empty:
+            green_pos = int(next_green_idx[i])
+            if green_pos >= n:
                 direction_prev = current_direction
                 prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
                 continue
-            green_ts = next_green.index[0]
-            green_pos = df.index.get_loc(green_ts)
             enter_pos = green_pos + 1
             if enter_pos < n:
                 enter_row = df.iloc[enter_pos]
                 if float(enter_row["Close"]) < float(enter_row["Open"]):
                     # Respect allowed sides
-                    if cfg.allowed_sides is None or "short" in cfg.allowed_sides:
+                    if allowed_sides is None or "short" in allowed_sides:
                         pending_entry = {"entry_idx": df.index[enter_pos], "side": "short"}
 
         # carry forward state for next iteration
         direction_prev = current_direction
         prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
 
-    return pd.DataFrame(trades)
+    return pd.DataFrame(trades, columns=TRADE_COLUMNS + (["passed_news_filter"] if record_rejected else []))
 
 
 def plot_supertrend(
-    df: pd.DataFrame,
+    df: Union[BarSet, pd.DataFrame],
     results: pd.DataFrame,
     out_html: str,
     title: Optional[str] = None,
@@ -287,10 +394,8 @@ def plot_supertrend(
         from plotly.subplots import make_subplots  # type: ignore
     except ImportError:
         raise SystemExit("Plotly is required for --plot; install with 'pip install plotly'.")
-    dfi = df.copy()
-    dfi["timestamp"] = pd.to_datetime(dfi["timestamp"], utc=True)
-    dfi.set_index("timestamp", inplace=True)
-    dfi = dfi.sort_index()
+    bars = as_bar_set(df)
+    dfi = bars.frame.copy(deep=False)
 
     PIP_FACTOR = 1.0 / pip_size
     if not lite:
@@ -308,11 +413,7 @@ def plot_supertrend(
     else:
         flips = pd.Series(False, index=dfi.index)
 
-    if entry_hours is None:
-        in_window = pd.Series(True, index=dfi.index)
-    else:
-        h0, h1 = entry_hours
-        in_window = pd.Series([(h0 <= t.hour < h1) for t in dfi.index], index=dfi.index)
+    in_window = hour_mask(bars.cal, entry_hours)
 
     if lite:
         fig = make_subplots(rows=1, cols=1, shared_xaxes=True)
@@ -436,6 +537,7 @@ def main(argv=None):
         default=default_input_csv,
         help=f"Path to CSV under data/ (default: {default_input_csv})",
     )
+    parser.add_argument("--dataset", default=None, help="Read bars from a year/month-partitioned dataset (scripts/bar_dataset.py) instead of --input-csv; --date-start/--date-end open only the overlapping months")
     parser.add_argument("--st-length", type=int, default=10)
     parser.add_argument("--st-multiplier", type=float, default=3.6)
     parser.add_argument("--max-sl-distance-pips", type=float, default=520.0)
@@ -471,8 +573,29 @@ def main(argv=None):
     parser.add_argument("--run-tag", default="", help="Optional tag appended to output filenames (e.g., 'up_buy_only')")
     parser.add_argument("--date-start", default=None, help="Optional start date (UTC, YYYY-MM-DD) to filter input rows")
     parser.add_argument("--date-end", default=None, help="Optional end date (UTC, YYYY-MM-DD, inclusive) to filter input rows")
+    parser.add_argument("--indicator-cache-dir", default=DEFAULT_CACHE_DIR, help=f"On-disk SuperTrend cache (default: {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--indicator-cache-max-mb", type=float, default=DEFAULT_MAX_MB, help="Evict least-recently-used cache entries past this size")
+    parser.add_argument("--no-indicator-cache", action="store_true", help="Always recompute SuperTrend instead of using the on-disk cache")
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR, help=f"Columnar cache of the input CSV, rebuilt when the CSV changes (default: {DEFAULT_OHLC_CACHE_DIR})")
+    parser.add_argument("--no-ohlc-cache", action="store_true", help="Always parse the input CSV instead of using the columnar cache")
+    parser.add_argument("--ohlc-float32", action="store_true", help="Store/load OHLC as float32 in the columnar cache (half the size, not bit-identical)")
+    parser.add_argument(
+        "--engine",
+        choices=["numpy", "jit", "pandas"],
+        default="numpy",
+        help="Backtest loop: array engine (default), compiled kernel (needs numba; falls back to numpy) or the reference pandas loop",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="Run the numpy engine over day-aligned chunks in this many processes (default: 1, serial)")
+    parser.add_argument("--checkpoint", action="store_true", help="Also save <trades>.checkpoint.json so a later --resume only processes appended bars")
+    parser.add_argument("--resume", action="store_true", help="Continue from the checkpoint over bars appended to --input-csv (full run + checkpoint if it is missing or stale)")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage wall/CPU time and peak memory and save profile.json next to the trades CSV (tracemalloc slows the run)")
+    parser.add_argument("--ml-scores-csv", default=None, help="Optional CSV of model scores (entry_time or timestamp column + score column); gates entries")
+    parser.add_argument("--ml-score-col", default="score", help="Score column in --ml-scores-csv (default: score)")
+    parser.add_argument("--ml-min-score", type=float, default=0.5, help="Only take entries whose score is >= this (default: 0.5)")
     
     args = parser.parse_args(argv)
+    profiler = StageProfiler.start() if args.profile else None
+    ohlc_cache_dir = None if args.no_ohlc_cache else args.ohlc_cache_dir
 
     if args.entry_hours.lower() == "all":
         entry_hours = None
@@ -483,144 +606,125 @@ def main(argv=None):
         except Exception:
             raise SystemExit("Invalid --entry-hours. Use 'all' or 'HH-HH' like 13-16.")
 
-    if not os.path.exists(args.input_csv):
-        raise SystemExit(f"Input CSV not found: {args.input_csv}. Provide --input-csv or ensure the default exists.")
-    print(f"Using input CSV: {args.input_csv}")
-    df = pd.read_csv(args.input_csv)
-    # Date range filtering (applied before any other filtering)
-    if args.date_start or args.date_end:
-        try:
-            ts = pd.to_datetime(df["timestamp"], utc=True, errors="coerce")
-            mask = pd.Series(True, index=df.index)
-            if args.date_start:
-                start_ts = pd.to_datetime(args.date_start).tz_localize("UTC") if pd.to_datetime(args.date_start).tzinfo is None else pd.to_datetime(args.date_start).tz_convert("UTC")
-                mask &= ts >= start_ts
-            if args.date_end:
-                # inclusive end: add 1 day and use <
-                end_ts = pd.to_datetime(args.date_end)
-                if end_ts.tzinfo is None:
-                    end_ts = end_ts.tz_localize("UTC")
-                else:
-                    end_ts = end_ts.tz_convert("UTC")
-                end_excl = end_ts + pd.Timedelta(days=1)
-                mask &= ts < end_excl
-            before = len(df)
-            df = df.loc[mask].copy()
-            print(f"Date filter applied: {args.date_start or '-'} to {args.date_end or '-'} — {before} -> {len(df)} rows")
-        except Exception as e:
-            print(f"⚠️ Failed to apply date filter: {e}")
-    if args.max_rows is not None and args.max_rows > 0:
-        df = df.head(args.max_rows)
-        print(f"Limiting to first {len(df)} rows for quick test (--max-rows)")
-
+    dataset = None
+    if args.dataset:
+        dataset = BarDataset(args.dataset)
+        if not dataset.exists():
+            raise SystemExit(f"Dataset not found or empty: {args.dataset}. Build it with scripts/bar_dataset.py ingest.")
+        print(f"Using dataset: {args.dataset} ({len(dataset.partitions)} monthly partitions)")
+    else:
+        if not os.path.exists(args.input_csv):
+            raise SystemExit(f"Input CSV not found: {args.input_csv}. Provide --input-csv or ensure the default exists.")
+        print(f"Using input CSV: {args.input_csv}")
     # optional filter days
-    filter_days = None
-    if args.filter_csv:
-        try:
-            fdf = pd.read_csv(args.filter_csv)
-            # Support two kinds of filter CSVs:
-            # 1) a list of timestamps (column 'timestamp') -> use those dates
-            # 2) an ema/day trend file with columns ['date','trend'] -> allow only dates where trend == 'Up'
-            if "trend" in fdf.columns and ("date" in fdf.columns or "Date" in fdf.columns):
-                date_col = "date" if "date" in fdf.columns else "Date"
-                # parse dates (assume ISO-like YYYY-MM-DD or similar)
-                ts = pd.to_datetime(fdf[date_col], utc=True, errors="coerce").dt.date
-                ups = fdf["trend"].astype(str).str.strip().str.lower() == "up"
-                filter_days = set(ts[ups].dropna().unique().tolist())
-                print(f"Loaded trend filter from {args.filter_csv}: {len(filter_days)} Up days")
-            elif "timestamp" in fdf.columns:
-                ts = pd.to_datetime(fdf["timestamp"], utc=True, errors="coerce")
-                filter_days = set(ts.dt.date.dropna().unique().tolist())
-                print(f"Loaded date filter from {args.filter_csv}: {len(filter_days)} unique dates")
-            else:
-                # Try to detect a date-like column (e.g., 'date')
-                candidates = [c for c in fdf.columns if c.lower() == "date"]
-                if candidates:
-                    ts = pd.to_datetime(fdf[candidates[0]], utc=True, errors="coerce")
+    with stage("trend_days"):
+        filter_days = None
+        if args.filter_csv:
+            try:
+                fdf = pd.read_csv(args.filter_csv)
+                # Support two kinds of filter CSVs:
+                # 1) a list of timestamps (column 'timestamp') -> use those dates
+                # 2) an ema/day trend file with columns ['date','trend'] -> allow only dates where trend == 'Up'
+                if "trend" in fdf.columns and ("date" in fdf.columns or "Date" in fdf.columns):
+                    date_col = "date" if "date" in fdf.columns else "Date"
+                    # parse dates (assume ISO-like YYYY-MM-DD or similar)
+                    ts = pd.to_datetime(fdf[date_col], utc=True, errors="coerce").dt.date
+                    ups = fdf["trend"].astype(str).str.strip().str.lower() == "up"
+                    filter_days = set(ts[ups].dropna().unique().tolist())
+                    print(f"Loaded trend filter from {args.filter_csv}: {len(filter_days)} Up days")
+                elif "timestamp" in fdf.columns:
+                    ts = pd.to_datetime(fdf["timestamp"], utc=True, errors="coerce")
                     filter_days = set(ts.dt.date.dropna().unique().tolist())
-                    print(f"Loaded date filter from {args.filter_csv}: {len(filter_days)} unique dates (from column {candidates[0]})")
+                    print(f"Loaded date filter from {args.filter_csv}: {len(filter_days)} unique dates")
                 else:
-                    print(f"⚠️ Filter CSV {args.filter_csv} did not contain 'trend' or 'timestamp'/'date' columns; ignoring filter.")
-        except Exception as e:
-            print(f"⚠️ Failed to load filter CSV {args.filter_csv}: {e}")
-
-    # Build filter_days from trend files if not explicitly provided
-    if filter_days is None and not args.no_trend_filter and not args.ignore_ema_filter:
-        def load_days_from_tf(tf_label: str) -> Optional[set]:
-            tf_label = tf_label.strip().lower()
-            tf_file = os.path.join("data", "trend", f"ema200_trend_by_date_{tf_label}.csv")
-            if not os.path.exists(tf_file):
-                print(f"⚠️ Trend file not found for timeframe '{tf_label}': {tf_file}")
-                return None
-            try:
-                fdf = pd.read_csv(tf_file)
-                date_col = "date" if "date" in fdf.columns else ("Date" if "Date" in fdf.columns else None)
-                if not date_col or "trend" not in fdf.columns:
-                    print(f"⚠️ Trend file missing columns (date/trend): {tf_file}")
+                    # Try to detect a date-like column (e.g., 'date')
+                    candidates = [c for c in fdf.columns if c.lower() == "date"]
+                    if candidates:
+                        ts = pd.to_datetime(fdf[candidates[0]], utc=True, errors="coerce")
+                        filter_days = set(ts.dt.date.dropna().unique().tolist())
+                        print(f"Loaded date filter from {args.filter_csv}: {len(filter_days)} unique dates (from column {candidates[0]})")
+                    else:
+                        print(f"⚠️ Filter CSV {args.filter_csv} did not contain 'trend' or 'timestamp'/'date' columns; ignoring filter.")
+            except Exception as e:
+                print(f"⚠️ Failed to load filter CSV {args.filter_csv}: {e}")
+
+        # Build filter_days from trend files if not explicitly provided
+        if filter_days is None and not args.no_trend_filter and not args.ignore_ema_filter:
+            def load_days_from_tf(tf_label: str) -> Optional[set]:
+                tf_label = tf_label.strip().lower()
+                tf_file = os.path.join("data", "trend", f"ema200_trend_by_date_{tf_label}.csv")
+                if not os.path.exists(tf_file):
+                    print(f"⚠️ Trend file not found for timeframe '{tf_label}': {tf_file}")
                     return None
-                ts = pd.to_datetime(fdf[date_col], utc=True, errors="coerce").dt.date
-                tvals = fdf["trend"].astype(str).str.strip().str.lower()
-                if args.trend == "up":
-                    sel = tvals == "up"
-                elif args.trend == "down":
-                    sel = tvals == "down"
+                try:
+                    fdf = pd.read_csv(tf_file)
+                    date_col = "date" if "date" in fdf.columns else ("Date" if "Date" in fdf.columns else None)
+                    if not date_col or "trend" not in fdf.columns:
+                        print(f"⚠️ Trend file missing columns (date/trend): {tf_file}")
+                        return None
+                    ts = pd.to_datetime(fdf[date_col], utc=True, errors="coerce").dt.date
+                    tvals = fdf["trend"].astype(str).str.strip().str.lower()
+                    if args.trend == "up":
+                        sel = tvals == "up"
+                    elif args.trend == "down":
+                        sel = tvals == "down"
+                    else:
+                        sel = pd.Series(True, index=tvals.index)
+                    return set(ts[sel].dropna().unique().tolist())
+                except Exception as e:
+                    print(f"⚠️ Failed loading trend file {tf_file}: {e}")
+                    return None
+
+            if args.trend_tfs:
+                tf_list = [s for s in args.trend_tfs.split(',') if s.strip()]
+                sets = []
+                for tf_label in tf_list:
+                    s = load_days_from_tf(tf_label)
+                    if s is None:
+                        print(f"⚠️ Skipping timeframe '{tf_label}' due to missing/invalid file.")
+                        continue
+                    print(f"Loaded trend days ({args.trend}) from {tf_label}: {len(s)} days")
+                    sets.append(s)
+                if sets:
+                    # If --trend-min-k provided, use K-of-N (at least K TFs agree). Otherwise, require ALL (intersection).
+                    if args.trend_min_k is not None:
+                        K = int(args.trend_min_k)
+                        N = len(sets)
+                        if K < 1:
+                            print(f"⚠️ --trend-min-k {K} < 1; clamping to 1")
+                            K = 1
+                        if K > N:
+                            print(f"⚠️ --trend-min-k {K} > number of valid TF files {N}; clamping to {N}")
+                            K = N
+
+                        # Build day -> count across TF sets
+                        from collections import Counter
+                        cnt = Counter()
+                        for s in sets:
+                            for d in s:
+                                cnt[d] += 1
+                        koN_days = {d for d, c in cnt.items() if c >= K}
+                        filter_days = koN_days
+                        print(f"Combined trend filter (K-of-N: at least {K} of {','.join(tf_list)}) => {len(filter_days)} days")
+                    else:
+                        inter = sets[0].copy()
+                        for s in sets[1:]:
+                            inter &= s
+                        filter_days = inter
+                        print(f"Combined trend filter (ALL of {','.join(tf_list)}) => {len(filter_days)} days")
                 else:
-                    sel = pd.Series(True, index=tvals.index)
-                return set(ts[sel].dropna().unique().tolist())
-            except Exception as e:
-                print(f"⚠️ Failed loading trend file {tf_file}: {e}")
-                return None
-
-        if args.trend_tfs:
-            tf_list = [s for s in args.trend_tfs.split(',') if s.strip()]
-            sets = []
-            for tf_label in tf_list:
-                s = load_days_from_tf(tf_label)
+                    print("No valid trend files loaded for --trend-tfs; no default date filter applied")
+            else:
+                # Single timeframe behavior (backward compatible): use --timeframe, fallback to 1m
+                tf = (args.timeframe or "1m").strip().lower()
+                s = load_days_from_tf(tf)
                 if s is None:
-                    print(f"⚠️ Skipping timeframe '{tf_label}' due to missing/invalid file.")
-                    continue
-                print(f"Loaded trend days ({args.trend}) from {tf_label}: {len(s)} days")
-                sets.append(s)
-            if sets:
-                # If --trend-min-k provided, use K-of-N (at least K TFs agree). Otherwise, require ALL (intersection).
-                if args.trend_min_k is not None:
-                    K = int(args.trend_min_k)
-                    N = len(sets)
-                    if K < 1:
-                        print(f"⚠️ --trend-min-k {K} < 1; clamping to 1")
-                        K = 1
-                    if K > N:
-                        print(f"⚠️ --trend-min-k {K} > number of valid TF files {N}; clamping to {N}")
-                        K = N
-
-                    # Build day -> count across TF sets
-                    from collections import Counter
-                    cnt = Counter()
-                    for s in sets:
-                        for d in s:
-                            cnt[d] += 1
-                    koN_days = {d for d, c in cnt.items() if c >= K}
-                    filter_days = koN_days
-                    print(f"Combined trend filter (K-of-N: at least {K} of {','.join(tf_list)}) => {len(filter_days)} days")
+                    s = load_days_from_tf("1m")
+                if s is not None:
+                    filter_days = s
+                    print(f"Default trend filter loaded for {tf}: {len(filter_days)} {args.trend} days")
                 else:
-                    inter = sets[0].copy()
-                    for s in sets[1:]:
-                        inter &= s
-                    filter_days = inter
-                    print(f"Combined trend filter (ALL of {','.join(tf_list)}) => {len(filter_days)} days")
-            else:
-                print("No valid trend files loaded for --trend-tfs; no default date filter applied")
-        else:
-            # Single timeframe behavior (backward compatible): use --timeframe, fallback to 1m
-            tf = (args.timeframe or "1m").strip().lower()
-            s = load_days_from_tf(tf)
-            if s is None:
-                s = load_days_from_tf("1m")
-            if s is not None:
-                filter_days = s
-                print(f"Default trend filter loaded for {tf}: {len(filter_days)} {args.trend} days")
-            else:
-                print("No default trend file found; no default date filter applied")
+                    print("No default trend file found; no default date filter applied")
 
     # Sides filtering
     if args.long_only and args.short_only:
@@ -637,6 +741,9 @@ def main(argv=None):
         # Default to long-only (preserves backward compatibility)
         allowed_sides = {"long"}
 
+    if args.engine == "jit" and not jit_available():
+        print("⚠️ numba is not installed; --engine jit falls back to the numpy engine ('pip install numba' to compile)")
+
     cfg = StrategyConfig(
         st_length=args.st_length,
         st_multiplier=args.st_multiplier,
@@ -644,9 +751,72 @@ def main(argv=None):
         entry_hours=entry_hours,
         filter_days=filter_days,
         allowed_sides=allowed_sides,
+        indicator_cache_dir=None if args.no_indicator_cache else args.indicator_cache_dir,
+        indicator_cache_max_mb=args.indicator_cache_max_mb,
+        engine=args.engine,
+        workers=args.workers,
     )
 
-    results = backtest_supertrend(df, cfg)
+    extra_filters: List[EntryFilter] = []
+    if args.ml_scores_csv:
+        sdf = pd.read_csv(args.ml_scores_csv)
+        time_col = "entry_time" if "entry_time" in sdf.columns else "timestamp"
+        if time_col not in sdf.columns or args.ml_score_col not in sdf.columns:
+            raise SystemExit(f"--ml-scores-csv needs an entry_time/timestamp column and '{args.ml_score_col}'")
+        scores = pd.Series(sdf[args.ml_score_col].to_numpy(dtype=float), index=pd.to_datetime(sdf[time_col], utc=True))
+        extra_filters.append(MLScoreFilter(scores, args.ml_min_score))
+        print(f"Loaded {len(scores)} ML scores from {args.ml_scores_csv} (min score {args.ml_min_score})")
+
+    def load_input() -> pd.DataFrame:
+        df = None
+        max_rows = args.max_rows if args.max_rows is not None and args.max_rows > 0 else None
+        if dataset is not None:
+            with stage("load_csv"):
+                df = dataset.read(args.date_start, args.date_end)
+            if args.date_start or args.date_end:
+                print(f"Date filter applied: {args.date_start or '-'} to {args.date_end or '-'} — {len(df)} rows")
+        elif max_rows or (ohlc_cache_dir is None and (args.date_start or args.date_end)):
+            # Chunked read that stops at --max-rows / past --date-end and starts near --date-start
+            # (via the CSV's .offsets.json sidecar), instead of parsing the whole file
+            try:
+                with stage("load_csv"):
+                    df = read_ohlc_csv(args.input_csv, args.date_start, args.date_end, max_rows=max_rows)
+                    if args.ohlc_float32 and ohlc_cache_dir is not None:
+                        # Same prices the float32 cache would return for a full run
+                        df = df.astype({c: np.float32 for c in PRICE_COLUMNS if c in df.columns})
+                if args.date_start or args.date_end:
+                    print(f"Date filter applied: {args.date_start or '-'} to {args.date_end or '-'} — {len(df)} rows")
+            except ValueError as e:
+                if args.date_start or args.date_end:
+                    print(f"⚠️ Failed to apply date filter: {e}")
+                else:
+                    print(f"⚠️ Chunked read failed ({e}); loading the full file")
+        elif args.date_start or args.date_end:
+            # Date range filtering (applied before any other filtering): a view of the memory-mapped
+            # OHLC cache covering only the range, or a full parse + mask without the cache
+            try:
+                with stage("load_csv"):
+                    df = load_ohlc_range(args.input_csv, ohlc_cache_dir, args.date_start, args.date_end, float32=args.ohlc_float32)
+                print(f"Date filter applied: {args.date_start or '-'} to {args.date_end or '-'} — {len(df)} rows")
+            except ValueError as e:
+                print(f"⚠️ Failed to apply date filter: {e}")
+        if df is None:
+            with stage("load_csv"):
+                df = load_ohlc(args.input_csv, ohlc_cache_dir, float32=args.ohlc_float32)
+        if max_rows:
+            df = df.head(max_rows)
+            print(f"Limiting to first {len(df)} rows for quick test (--max-rows)")
+        return df
+
+    # The run's bars are parsed and indexed once, then shared by the backtest and the plot
+    loaded: List[BarSet] = []
+
+    def load_bars() -> BarSet:
+        if not loaded:
+            df = load_input()
+            with stage("index_bars"):
+                loaded.append(BarSet.from_frame(df))
+        return loaded[0]
 
     # Derive final output directory: append timeframe subfolder if user kept the default base out-dir or if they requested it explicitly.
     final_out_dir = args.out_dir
@@ -666,7 +836,7 @@ def main(argv=None):
             final_out_dir = os.path.join(final_out_dir, tf)
     os.makedirs(final_out_dir, exist_ok=True)
 
-    base = os.path.splitext(os.path.basename(args.input_csv))[0]
+    base = os.path.basename(os.path.normpath(args.dataset)) if dataset is not None else os.path.splitext(os.path.basename(args.input_csv))[0]
     # If user did not provide a run tag and defaults imply Up + Long-only, set a helpful default tag
     implied_up = (args.trend == "up")
     implied_long_only = (allowed_sides == {"long"})
@@ -675,132 +845,147 @@ def main(argv=None):
     # New naming convention inside timeframe folder: trades(.csv), trades_simple(.csv), plot.html
     trades_filename = f"trades{tag}.csv" if tag else "trades.csv"
     out_csv = os.path.join(final_out_dir, trades_filename)
-    results.to_csv(out_csv, index=False)
+    if args.checkpoint or args.resume:
+        if extra_filters or args.max_rows or dataset is not None:
+            raise SystemExit("--checkpoint/--resume do not support --ml-scores-csv, --max-rows or --dataset")
+        from backtest_checkpoint import run_with_checkpoint
+
+        results = run_with_checkpoint(
+            args.input_csv,
+            load_bars,
+            cfg,
+            out_csv,
+            resume_requested=args.resume,
+            date_start=args.date_start,
+            date_end=args.date_end,
+            float32=args.ohlc_float32 and ohlc_cache_dir is not None,
+        )
+    else:
+        results = backtest_supertrend(load_bars(), cfg, filters=extra_filters)
+        with stage("write_trades"):
+            results.to_csv(out_csv, index=False)
 
     # Enhanced post-backtest summary (prints detailed performance and saves a compact CSV)
     print(f"✅ Backtest complete — {len(results)} trades executed.")
-    if not results.empty:
-        try:
-            # Show a quick sample and total pips
-            print(results.head())
-            print(f"Total Pips: {results['pips'].sum():.1f}")
-
-            # Performance summary
-            total_trades = len(results)
-            wins = (results['pips'] > 0).sum()
-            losses = (results['pips'] < 0).sum()
-            win_rate = wins / total_trades if total_trades else 0.0
-            avg_trade = results['pips'].mean()
-            avg_win = results.loc[results['pips'] > 0, 'pips'].mean()
-            avg_loss = results.loc[results['pips'] < 0, 'pips'].mean()
-            best_trade = results['pips'].max()
-            worst_trade = results['pips'].min()
-            gross_gain = results.loc[results['pips'] > 0, 'pips'].sum()
-            gross_loss = results.loc[results['pips'] < 0, 'pips'].sum()
-            profit_factor = gross_gain / abs(gross_loss) if gross_loss != 0 else float('inf')
-
-            results['equity'] = results['pips'].cumsum()
-            running_max = results['equity'].cummax()
-            drawdowns = results['equity'] - running_max
-            max_drawdown = drawdowns.min()
-
-            print("\nPerformance Summary:")
-            print(f"- Total trades: {total_trades}")
-            print(f"- Win rate: {win_rate:.2%}")
-            print(f"- Average trade: {avg_trade:.1f} pips")
-            print(f"- Average win: {avg_win:.1f} pips")
-            print(f"- Average loss: {avg_loss:.1f} pips")
-            print(f"- Best trade: {best_trade:.1f} pips")
-            print(f"- Worst trade: {worst_trade:.1f} pips")
-            print(f"- Profit factor: {profit_factor:.2f}")
-            print(f"- Max drawdown: {max_drawdown:.1f} pips")
-
-            # Sharpe ratio (per-trade) and an approximate annualized Sharpe
+    with stage("summary"):
+        if not results.empty:
             try:
-                std_trade = results['pips'].std(ddof=1)
-                if std_trade and std_trade > 0:
-                    sharpe_per_trade = avg_trade / std_trade
-                    # Approx annualized: scale by sqrt(trades per year)
-                    first_t = pd.to_datetime(results['entry_time'].iloc[0], utc=True)
-                    last_t = pd.to_datetime(results['entry_time'].iloc[-1], utc=True)
-                    years = max((last_t - first_t).days / 365.25, 1e-9)
-                    trades_per_year = total_trades / years if years > 0 else float('nan')
-                    sharpe_annual = sharpe_per_trade * np.sqrt(trades_per_year) if trades_per_year and trades_per_year > 0 else float('nan')
-                    print(f"- Sharpe (per-trade): {sharpe_per_trade:.2f}")
-                    if np.isfinite(sharpe_annual):
-                        print(f"- Sharpe (annualized ~): {sharpe_annual:.2f}  # approx via sqrt(trades/year)")
-                else:
-                    print("- Sharpe: n/a (zero variance)")
-            except Exception as _:
-                print("- Sharpe: n/a (calc error)")
+                # Show a quick sample and total pips
+                print(results.head())
+                print(f"Total Pips: {results['pips'].sum():.1f}")
+
+                # Performance summary
+                total_trades = len(results)
+                wins = (results['pips'] > 0).sum()
+                losses = (results['pips'] < 0).sum()
+                win_rate = wins / total_trades if total_trades else 0.0
+                avg_trade = results['pips'].mean()
+                avg_win = results.loc[results['pips'] > 0, 'pips'].mean()
+                avg_loss = results.loc[results['pips'] < 0, 'pips'].mean()
+                best_trade = results['pips'].max()
+                worst_trade = results['pips'].min()
+                gross_gain = results.loc[results['pips'] > 0, 'pips'].sum()
+                gross_loss = results.loc[results['pips'] < 0, 'pips'].sum()
+                profit_factor = gross_gain / abs(gross_loss) if gross_loss != 0 else float('inf')
+
+                results['equity'] = results['pips'].cumsum()
+                running_max = results['equity'].cummax()
+                drawdowns = results['equity'] - running_max
+                max_drawdown = drawdowns.min()
+
+                print("\nPerformance Summary:")
+                print(f"- Total trades: {total_trades}")
+                print(f"- Win rate: {win_rate:.2%}")
+                print(f"- Average trade: {avg_trade:.1f} pips")
+                print(f"- Average win: {avg_win:.1f} pips")
+                print(f"- Average loss: {avg_loss:.1f} pips")
+                print(f"- Best trade: {best_trade:.1f} pips")
+                print(f"- Worst trade: {worst_trade:.1f} pips")
+                print(f"- Profit factor: {profit_factor:.2f}")
+                print(f"- Max drawdown: {max_drawdown:.1f} pips")
+
+                # Sharpe ratio (per-trade) and an approximate annualized Sharpe
+                try:
+                    std_trade = results['pips'].std(ddof=1)
+                    if std_trade and std_trade > 0:
+                        sharpe_per_trade = avg_trade / std_trade
+                        # Approx annualized: scale by sqrt(trades per year)
+                        first_t = pd.to_datetime(results['entry_time'].iloc[0], utc=True)
+                        last_t = pd.to_datetime(results['entry_time'].iloc[-1], utc=True)
+                        years = max((last_t - first_t).days / 365.25, 1e-9)
+                        trades_per_year = total_trades / years if years > 0 else float('nan')
+                        sharpe_annual = sharpe_per_trade * np.sqrt(trades_per_year) if trades_per_year and trades_per_year > 0 else float('nan')
+                        print(f"- Sharpe (per-trade): {sharpe_per_trade:.2f}")
+                        if np.isfinite(sharpe_annual):
+                            print(f"- Sharpe (annualized ~): {sharpe_annual:.2f}  # approx via sqrt(trades/year)")
+                    else:
+                        print("- Sharpe: n/a (zero variance)")
+                except Exception as _:
+                    print("- Sharpe: n/a (calc error)")
 
-        except Exception as e:
-            print(f"⚠️ Failed to compute performance summary: {e}")
-
-        # Simplified results CSV (timestamp, pips, final_stop, optional side)
-        try:
-            cols = ["entry_time", "pips", "final_stop"]
-            if "side" in results.columns:
-                cols.append("side")
-            available_cols = [c for c in cols if c in results.columns]
-            simplified_df = results[available_cols].copy()
-            # Format entry_time for compact CSV
-            if 'entry_time' in simplified_df.columns:
-                simplified_df['entry_time'] = pd.to_datetime(simplified_df['entry_time'], utc=True).dt.strftime("%Y-%m-%d %H:%M")
-            simple_name = f"trades_simple{tag}.csv" if tag else "trades_simple.csv"
-            simple_path = os.path.join(final_out_dir, simple_name)
-            simplified_df.to_csv(simple_path, index=False)
-            print(f"Saved simple results to: {simple_path}")
-        except Exception as e:
-            print(f"⚠️ Failed to write simple results: {e}")
-
-    else:
-        print("No trades were executed.")
+            except Exception as e:
+                print(f"⚠️ Failed to compute performance summary: {e}")
 
-    if args.plot:
-        df_plot = pd.read_csv(args.input_csv)
-        df_idx = df_plot.copy()
-        df_idx["timestamp"] = pd.to_datetime(df_idx["timestamp"], utc=True)
-        df_idx = df_idx.set_index("timestamp")
-        dir_plot, st_plot = compute_supertrend(df_idx, cfg.st_length, cfg.st_multiplier)
-        df_plot["supertrend"] = st_plot.values
-        df_plot["direction"] = dir_plot.values
-        if args.plot_latest_only:
-            latest_path = os.path.join(final_out_dir, "latest.html")
-            plot_supertrend(
-                df_plot,
-                results,
-                latest_path,
-                title=f"{base} — ST {cfg.st_length} x {cfg.st_multiplier}{(' — ' + args.run_tag) if args.run_tag else ''}",
-                cap_pips=None if args.plot_lite else cfg.max_sl_distance_pips,
-                entry_hours=entry_hours,
-                pip_size=cfg.pip_size,
-                lite=args.plot_lite,
-            )
-            print(f"Saved latest (only) plot to: {latest_path}")
-        else:
-            plot_name = f"plot{tag}.html" if tag else "plot.html"
-            out_html = args.plot_html or os.path.join(final_out_dir, plot_name)
-            plot_supertrend(
-                df_plot,
-                results,
-                out_html,
-                title=f"{base} — ST {cfg.st_length} x {cfg.st_multiplier}{(' — ' + args.run_tag) if args.run_tag else ''}",
-                cap_pips=None if args.plot_lite else cfg.max_sl_distance_pips,
-                entry_hours=entry_hours,
-                pip_size=cfg.pip_size,
-                lite=args.plot_lite,
-            )
-            print(f"Saved plot to: {out_html}")
-            latest_path = os.path.join(final_out_dir, "latest.html")
+            # Simplified results CSV (timestamp, pips, final_stop, optional side)
             try:
-                with open(out_html, "r", encoding="utf-8") as src, open(latest_path, "w", encoding="utf-8") as dst:
-                    dst.write(src.read())
-                print(f"Saved latest plot to: {latest_path}")
+                simplified_df = simple_trades(results)
+                simple_name = f"trades_simple{tag}.csv" if tag else "trades_simple.csv"
+                simple_path = os.path.join(final_out_dir, simple_name)
+                simplified_df.to_csv(simple_path, index=False)
+                print(f"Saved simple results to: {simple_path}")
             except Exception as e:
-                print(f"⚠️ Failed to write latest.html: {e}")
+                print(f"⚠️ Failed to write simple results: {e}")
 
-    
+        else:
+            print("No trades were executed.")
+
+    if args.plot:
+        with stage("plot"):
+            # Same bars as the backtest (date filter and --max-rows included); after a resume
+            # they are loaded here for the first time
+            bars = load_bars()
+            plot_cache = IndicatorCache(cfg.indicator_cache_dir, cfg.indicator_cache_max_mb) if cfg.indicator_cache_dir else None
+            dir_plot, st_plot = compute_supertrend(bars.frame, cfg.st_length, cfg.st_multiplier, cache=plot_cache)
+            df_plot = bars.assign(supertrend=st_plot, direction=dir_plot)
+            if args.plot_latest_only:
+                latest_path = os.path.join(final_out_dir, "latest.html")
+                plot_supertrend(
+                    df_plot,
+                    results,
+                    latest_path,
+                    title=f"{base} — ST {cfg.st_length} x {cfg.st_multiplier}{(' — ' + args.run_tag) if args.run_tag else ''}",
+                    cap_pips=None if args.plot_lite else cfg.max_sl_distance_pips,
+                    entry_hours=entry_hours,
+                    pip_size=cfg.pip_size,
+                    lite=args.plot_lite,
+                )
+                print(f"Saved latest (only) plot to: {latest_path}")
+            else:
+                plot_name = f"plot{tag}.html" if tag else "plot.html"
+                out_html = args.plot_html or os.path.join(final_out_dir, plot_name)
+                plot_supertrend(
+                    df_plot,
+                    results,
+                    out_html,
+                    title=f"{base} — ST {cfg.st_length} x {cfg.st_multiplier}{(' — ' + args.run_tag) if args.run_tag else ''}",
+                    cap_pips=None if args.plot_lite else cfg.max_sl_distance_pips,
+                    entry_hours=entry_hours,
+                    pip_size=cfg.pip_size,
+                    lite=args.plot_lite,
+                )
+                print(f"Saved plot to: {out_html}")
+                latest_path = os.path.join(final_out_dir, "latest.html")
+                try:
+                    with open(out_html, "r", encoding="utf-8") as src, open(latest_path, "w", encoding="utf-8") as dst:
+                        dst.write(src.read())
+                    print(f"Saved latest plot to: {latest_path}")
+                except Exception as e:
+                    print(f"⚠️ Failed to write latest.html: {e}")
+
+    if profiler is not None:
+        profiler.report()
+        profiler.save(os.path.join(final_out_dir, f"profile{tag}.json" if tag else "profile.json"))
+        profiler.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""
+Calendar index over a bar timestamp array, computed once per dataset.
+
+Holds an int32 UTC day ordinal (days since 1970-01-01) and an int8 UTC hour per row, plus a
+day -> row-range table. Day filters (trend files, --filter-csv, date ranges) and entry-hour
+windows then become NumPy isin / bitmask operations instead of per-row ts.date() / ts.hour calls.
+"""
+
+import datetime as dt
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+NS_PER_HOUR = 3_600_000_000_000
+NS_PER_DAY = 24 * NS_PER_HOUR
+_EPOCH_ORDINAL = dt.date(1970, 1, 1).toordinal()
+
+
+class CalendarIndex:
+    """Per-row day ordinal / hour arrays and, for time-sorted rows, a day -> [start, stop) table."""
+
+    def __init__(self, day: np.ndarray, hour: np.ndarray):
+        self.day = np.asarray(day, dtype=np.int32)
+        self.hour = np.asarray(hour, dtype=np.int8)
+        n = len(self.day)
+        if n:
+            starts = np.concatenate(([0], np.flatnonzero(self.day[1:] != self.day[:-1]) + 1))
+        else:
+            starts = np.zeros(0, dtype=np.int64)
+        # Only a true lookup table when rows are time-sorted (each day one contiguous run)
+        self.days = self.day[starts]
+        self.day_start = starts.astype(np.int64)
+        self.day_stop = np.append(starts[1:], n).astype(np.int64)
+
+    def __len__(self) -> int:
+        return len(self.day)
+
+    @classmethod
+    def from_ns(cls, ts_ns: np.ndarray) -> "CalendarIndex":
+        """Build from int64 epoch nanoseconds (UTC)."""
+        ts_ns = np.asarray(ts_ns, dtype=np.int64)
+        return cls(ts_ns // NS_PER_DAY, (ts_ns // NS_PER_HOUR) % 24)
+
+    def select(self, mask: np.ndarray) -> "CalendarIndex":
+        """Calendar index of the rows kept by a boolean mask (or integer positions)."""
+        return CalendarIndex(self.day[mask], self.hour[mask])
+
+    def day_rows(self, day: dt.date) -> slice:
+        """Row slice covering one calendar day (empty slice if absent); rows must be time-sorted."""
+        k = np.searchsorted(self.days, date_ordinal(day))
+        if k < len(self.days) and self.days[k] == date_ordinal(day):
+            return slice(int(self.day_start[k]), int(self.day_stop[k]))
+        return slice(0, 0)
+
+
+def date_ordinal(day: dt.date) -> int:
+    """Days since 1970-01-01 for a date (or Timestamp / datetime, by its calendar date)."""
+    if isinstance(day, dt.datetime):
+        day = day.date()
+    return day.toordinal() - _EPOCH_ORDINAL
+
+
+def date_ordinals(days: Iterable[dt.date]) -> np.ndarray:
+    return np.fromiter((date_ordinal(d) for d in days), dtype=np.int32)
+
+
+def day_mask(cal: CalendarIndex, days: Iterable[dt.date]) -> np.ndarray:
+    """Rows whose UTC calendar date is in days."""
+    return np.isin(cal.day, date_ordinals(days))
+
+
+def date_range_mask(cal: CalendarIndex, start: Optional[dt.date] = None, end: Optional[dt.date] = None) -> np.ndarray:
+    """Rows with start <= date <= end (both inclusive; None leaves that side open)."""
+    mask = np.ones(len(cal), dtype=bool)
+    if start is not None:
+        mask &= cal.day >= date_ordinal(start)
+    if end is not None:
+        mask &= cal.day <= date_ordinal(end)
+    return mask
+
+
+def hour_bits(entry_hours: Optional[Tuple[int, int]]) -> int:
+    """24-bit mask of allowed UTC hours for an entry window [start, end)."""
+    if entry_hours is None:
+        return (1 << 24) - 1
+    start_h, end_h = entry_hours
+    bits = 0
+    for h in range(max(start_h, 0), min(end_h, 24)):
+        bits |= 1 << h
+    return bits
+
+
+def hour_mask(cal: CalendarIndex, entry_hours: Optional[Tuple[int, int]]) -> np.ndarray:
+    """Rows whose UTC hour lies in [start, end); all True when entry_hours is None."""
+    if entry_hours is None:
+        return np.ones(len(cal), dtype=bool)
+    return ((hour_bits(entry_hours) >> cal.hour.astype(np.int32)) & 1).astype(bool)
@@ -0,0 +1,355 @@
+"""
+Candidate-trade table and fast policy replay for filter / threshold research.
+
+A trade's exit in the SuperTrend strategy depends only on its entry bar, side, price and
+SuperTrend: the trailing stop and the H/L-cross exit never look at filters or other trades. So
+every pattern-valid entry (flip + alternating candle) can be resolved once into a candidate row
+with its would-be exit, pips and SL distance. Entry hours, sides, the SL cap and entry filters
+(news sentiment, ML score) then only decide which candidates are taken, and replay() resolves
+that over the table in one pass over the candidates, following the engine's rules:
+
+- a flip schedules its entry only inside entry hours, for an allowed side, and when no other
+  entry is pending (a pending entry blocks later flips until its entry bar)
+- the pending entry activates on its bar if inside entry hours, flat, ST is defined and the SL
+  distance is within the cap; the entry filters are checked last
+- one position at a time: an entry on or before the open trade's exit bar is dropped
+
+replay_trades() returns the same TradeTable run_supertrend_trades would for that policy, so a
+grid of thousands of news thresholds costs a few array ops per config instead of a bar loop each.
+Trend-day filtering drops bars before SuperTrend is computed, so it changes the candidates
+themselves; build the table on the trend-filtered bars instead (--trend-csv).
+
+Example (news-threshold grid on the 13-16 UTC long book):
+    python scripts/candidate_trades.py --sentiment-file data/news/trades_sentiment.parquet \
+        --min-headlines 0,3,5,10 --filter-types bearish,bullish,combined \
+        --bearish-thresholds -0.3,-0.2,-0.1,0 --bullish-thresholds 0.1,0.2,0.3,0.5
+"""
+
+import itertools
+import os
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import LONG, SHORT, BarArrays, carried_supertrend, flip_masks, next_candle_indices
+from bar_set import load_bars
+from calendar_index import day_mask, hour_mask
+from entry_filters import EntryFilter
+from metrics import trade_metrics
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR
+from sweep import PIP_SIZE, SIDES, load_trend_days, parse_entry_hours, parse_list
+from trade_table import NAT_NS, TradeTable
+
+DEFAULT_OUT_DIR = os.path.join("results", "candidates")
+
+# replay() status per candidate
+SKIPPED = 0  # not scheduled, blocked by a pending entry / open position, or failed hours / cap
+TAKEN = 1  # traded and closed
+REJECTED = 2  # reached activation but an entry filter blocked it
+OPEN = 3  # traded but still open at the last bar (the engine reports nothing for it)
+
+CANDIDATE_COLUMNS = [
+    "flip_pos", "entry_pos", "exit_pos", "side", "entry", "exit", "final_stop", "pips", "sl_distance_pips",
+]
+
+
+def _first_at_or_after(mask: np.ndarray) -> np.ndarray:
+    n = len(mask)
+    return np.minimum.accumulate(np.where(mask, np.arange(n), n)[::-1])[::-1]
+
+
+def build_candidates(bars: BarArrays, pip_size: float = PIP_SIZE) -> pd.DataFrame:
+    """One row per flip whose entry pattern completes, ordered by flip bar (CANDIDATE_COLUMNS).
+
+    exit_pos is n (and exit / pips NaN) when the trade would still be open at the last bar;
+    sl_distance_pips is NaN when ST is undefined on the entry bar (never activatable).
+    """
+    o = np.asarray(bars.open, dtype=float)
+    h = np.asarray(bars.high, dtype=float)
+    l = np.asarray(bars.low, dtype=float)
+    c = np.asarray(bars.close, dtype=float)
+    d = np.asarray(bars.direction, dtype=float)
+    s = np.asarray(bars.supertrend, dtype=float)
+    n = len(c)
+    next_red, next_green = next_candle_indices(o, c)
+    flip_bull, flip_bear = flip_masks(o, c, d)
+
+    flips, entries, sides = [], [], []
+    for flip_mask, next_opposite, side in ((flip_bull, next_red, LONG), (flip_bear, next_green, SHORT)):
+        f = np.flatnonzero(flip_mask)
+        e = next_opposite[f] + 1
+        keep = e < n
+        f, e = f[keep], e[keep]
+        keep = c[e] > o[e] if side == LONG else c[e] < o[e]
+        flips.append(f[keep])
+        entries.append(e[keep])
+        sides.append(np.full(int(keep.sum()), side, dtype=np.int8))
+    flip_pos = np.concatenate(flips)
+    order = np.argsort(flip_pos, kind="stable")
+    flip_pos = flip_pos[order]
+    entry_pos = np.concatenate(entries)[order]
+    side = np.concatenate(sides)[order]
+    is_long = side == LONG
+
+    # Trail = current ST while the trend agrees with the side, else the previous bar's ST; the
+    # exit is the first bar whose low / high crosses it, so it can be found for all entries at once.
+    stv, prior = carried_supertrend(s)
+    trail_long = np.where(d == LONG, stv, prior)
+    trail_short = np.where(d == SHORT, stv, prior)
+    with np.errstate(invalid="ignore"):
+        next_exit_long = _first_at_or_after(l <= trail_long)
+        next_exit_short = _first_at_or_after(h >= trail_short)
+    exit_pos = np.where(is_long, next_exit_long[entry_pos], next_exit_short[entry_pos])
+
+    entry = c[entry_pos]
+    st_entry = s[entry_pos]
+    closed = exit_pos < n
+    x = np.minimum(exit_pos, n - 1)
+    exit_price = np.where(np.isnan(prior[x]), np.where(is_long, l[x], h[x]), prior[x])
+    exit_price = np.where(closed, exit_price, np.nan)
+    pips = (exit_price - entry) / pip_size * np.where(is_long, 1, -1)
+
+    # Final stop: the tightest trail seen from entry to exit (NaN trails never move the stop)
+    final_stop = np.full(len(entry_pos), np.nan)
+    if closed.any():
+        bounds = np.column_stack([entry_pos[closed], exit_pos[closed] + 1]).ravel()
+        tight_long = np.fmax.reduceat(np.append(trail_long, np.nan), bounds)[::2]
+        tight_short = np.fmin.reduceat(np.append(trail_short, np.nan), bounds)[::2]
+        final_stop[closed] = np.where(
+            is_long[closed], np.fmax(st_entry[closed], tight_long), np.fmin(st_entry[closed], tight_short)
+        )
+
+    return pd.DataFrame(
+        {
+            "flip_pos": flip_pos,
+            "entry_pos": entry_pos,
+            "exit_pos": exit_pos,
+            "side": side,
+            "entry": entry,
+            "exit": exit_price,
+            "final_stop": final_stop,
+            "pips": pips,
+            "sl_distance_pips": np.abs(entry - st_entry) / pip_size,
+        },
+        columns=CANDIDATE_COLUMNS,
+    )
+
+
+def policy_masks(
+    cands: pd.DataFrame,
+    in_hours: np.ndarray,
+    allowed_sides: Optional[set],
+    max_sl_distance_pips: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(schedule_ok, activate_ok) per candidate for an hours window, side set and SL cap."""
+    in_hours = np.asarray(in_hours, dtype=bool)
+    side = cands["side"].to_numpy()
+    schedule_ok = in_hours[cands["flip_pos"].to_numpy()]
+    if allowed_sides is not None:
+        schedule_ok &= np.where(side == LONG, "long" in allowed_sides, "short" in allowed_sides)
+    # NaN distances (ST undefined on the entry bar) compare False, like the engine's NaN check
+    activate_ok = in_hours[cands["entry_pos"].to_numpy()] & (cands["sl_distance_pips"].to_numpy() <= max_sl_distance_pips)
+    return schedule_ok, activate_ok
+
+
+def candidate_entry_ok(cands: pd.DataFrame, index: pd.DatetimeIndex, filters: Sequence[EntryFilter]) -> Optional[np.ndarray]:
+    """Combined entry_mask of the entry filters for each candidate (None when none gate entries)."""
+    entry_filters = [f for f in filters if f.gates_entries]
+    if not entry_filters:
+        return None
+    ok = np.ones(len(cands), dtype=bool)
+    side = cands["side"].to_numpy()
+    entry_pos = cands["entry_pos"].to_numpy()
+    for s in (LONG, SHORT):
+        rows = np.flatnonzero(side == s)
+        for f in entry_filters:
+            m = f.entry_mask(index, entry_pos[rows], s)
+            if m is not None:
+                ok[rows] &= np.asarray(m, dtype=bool)
+    return ok
+
+
+def replay(
+    cands: pd.DataFrame,
+    schedule_ok: np.ndarray,
+    activate_ok: np.ndarray,
+    entry_ok: Optional[np.ndarray] = None,
+) -> np.ndarray:
+    """Resolve pending / position overlap for one policy; returns a status per candidate.
+
+    Only candidates that pass schedule_ok are visited, in flip order.
+    """
+    flip = cands["flip_pos"].to_numpy().tolist()
+    entry = cands["entry_pos"].to_numpy().tolist()
+    exit_ = cands["exit_pos"].to_numpy().tolist()
+    still_open = cands["exit"].isna().to_numpy().tolist()
+    act = np.asarray(activate_ok, dtype=bool).tolist()
+    ok = None if entry_ok is None else np.asarray(entry_ok, dtype=bool).tolist()
+    status = np.zeros(len(flip), dtype=np.int8)
+
+    pending_until = -1  # flips before the pending entry's bar cannot schedule
+    position_until = -1  # exit bar of the open trade; entries on or before it are dropped
+    for k in np.flatnonzero(schedule_ok).tolist():
+        if flip[k] < pending_until:
+            continue
+        pending_until = entry[k]
+        if not act[k] or entry[k] <= position_until:
+            continue
+        if ok is not None and not ok[k]:
+            status[k] = REJECTED
+            continue
+        position_until = exit_[k]
+        status[k] = OPEN if still_open[k] else TAKEN
+    return status
+
+
+def replay_trades(cands: pd.DataFrame, status: np.ndarray, ts_ns: np.ndarray, record_rejected: bool = False) -> TradeTable:
+    """TradeTable for a replay status, in the order run_supertrend_trades reports the trades.
+
+    ts_ns are the bars the candidates were built on (their positions index it).
+    """
+    taken = status == TAKEN
+    keep = taken | (status == REJECTED) if record_rejected else taken
+    rows = cands[keep]
+    passed = taken[keep]
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    exit_pos = rows["exit_pos"].to_numpy()
+    table = TradeTable(len(rows))
+    table.extend(
+        entry_ns=ts_ns[rows["entry_pos"].to_numpy()],
+        exit_ns=np.where(passed, ts_ns[np.where(passed, exit_pos, 0)], NAT_NS),
+        side=rows["side"].to_numpy(),
+        entry=rows["entry"].to_numpy(),
+        **{c: np.where(passed, rows[c].to_numpy(dtype=float), np.nan) for c in ("exit", "final_stop", "pips")},
+        passed=passed,
+    )
+    return table
+
+
+def candidate_frame(cands: pd.DataFrame, index: pd.DatetimeIndex) -> pd.DataFrame:
+    """Candidate table with times, side labels and hours attached, for CSV output and research."""
+    n = len(index)
+    out = cands.copy()
+    out.insert(0, "flip_time", index[cands["flip_pos"].to_numpy()])
+    out.insert(1, "entry_time", index[cands["entry_pos"].to_numpy()])
+    exit_pos = cands["exit_pos"].to_numpy()
+    out.insert(2, "exit_time", pd.Series(index[np.minimum(exit_pos, n - 1)]).where(exit_pos < n).to_numpy())
+    out["side"] = np.where(cands["side"].to_numpy() == LONG, "long", "short")
+    out["flip_hour"] = out["flip_time"].dt.hour
+    out["entry_hour"] = out["entry_time"].dt.hour
+    out["bars_held"] = np.where(exit_pos < n, exit_pos - cands["entry_pos"].to_numpy(), -1)
+    return out
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    from indicators import supertrend_arrays
+
+    parser = argparse.ArgumentParser(description="Build the candidate-trade table once and replay filter policies over it.")
+    parser.add_argument("--input-csv", default=os.path.join("data", "combined_xauusd_1min_full.csv"))
+    parser.add_argument("--st-length", type=int, default=10)
+    parser.add_argument("--st-multiplier", type=float, default=3.6)
+    parser.add_argument("--max-sl-pips", default="520", help="Comma-separated max_sl_distance_pips values")
+    parser.add_argument("--entry-hours", default="13-16", help="Comma-separated windows, each 'HH-HH' or 'all'")
+    parser.add_argument("--sides", default="long", help="Comma-separated from long,short,both")
+    parser.add_argument("--trend-csv", default=None, help="Optional date,trend file; candidates are built on matching days only")
+    parser.add_argument("--trend", choices=["up", "down", "both"], default="up")
+    parser.add_argument("--date-start", default=None, help="Optional start date (UTC, YYYY-MM-DD)")
+    parser.add_argument("--date-end", default=None, help="Optional end date (UTC, YYYY-MM-DD, inclusive)")
+    parser.add_argument("--sentiment-file", default=None, help="Per-trade GDELT sentiment (parquet or csv with entry_time, headline_count, net_sentiment)")
+    parser.add_argument("--min-headlines", default="5", help="Comma-separated min_headline_count values")
+    parser.add_argument("--filter-types", default="bearish", help="Comma-separated from bearish,bullish,combined")
+    parser.add_argument("--bearish-thresholds", default="-0.1", help="Comma-separated bearish net_sentiment thresholds")
+    parser.add_argument("--bullish-thresholds", default="0.3", help="Comma-separated bullish net_sentiment thresholds")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR, help="Writes candidates.csv and policy_results.csv here")
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR)
+    parser.add_argument("--no-ohlc-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    for s in parse_list(args.sides, str):
+        if s not in SIDES:
+            raise SystemExit(f"Invalid --sides value: {s}. Use long, short or both.")
+    try:
+        hours = parse_list(args.entry_hours, str)
+        for h in hours:
+            parse_entry_hours(h)
+    except ValueError:
+        raise SystemExit("Invalid --entry-hours. Use 'all' or 'HH-HH' like 13-16 (comma-separated).")
+
+    if not os.path.exists(args.input_csv):
+        raise SystemExit(f"Input CSV not found: {args.input_csv}")
+    loaded = load_bars(args.input_csv, None if args.no_ohlc_cache else args.ohlc_cache_dir, args.date_start, args.date_end)
+    if args.trend_csv:
+        loaded = loaded.select(day_mask(loaded.cal, load_trend_days(args.trend_csv, args.trend)))
+        print(f"Trend filter ({args.trend}) from {args.trend_csv}: {len(loaded)} bars kept")
+    df = loaded.frame
+
+    t0 = time.perf_counter()
+    ts_ns = loaded.ts_ns
+    high, low, close = (df[col].to_numpy(dtype=float) for col in ("High", "Low", "Close"))
+    direction, supertrend = supertrend_arrays(high, low, close, args.st_length, args.st_multiplier)
+    bars = BarArrays(ts_ns, df["Open"].to_numpy(dtype=float), high, low, close, direction, supertrend)
+    cands = build_candidates(bars)
+    print(f"{len(cands)} candidate trades from {len(df)} bars in {time.perf_counter() - t0:.2f}s")
+
+    news_grid: List[Optional[tuple]] = [None]
+    if args.sentiment_file:
+        from entry_filters import NewsSentimentFilter
+
+        if args.sentiment_file.endswith(".csv"):
+            sentiment_df = pd.read_csv(args.sentiment_file)
+            sentiment_df["entry_time"] = pd.to_datetime(sentiment_df["entry_time"], utc=True)
+        else:
+            from strategy_with_news_filter import load_news_sentiment
+
+            sentiment_df = load_news_sentiment(args.sentiment_file)
+        news_filter = NewsSentimentFilter(sentiment_df)
+        # Sentiment features are looked up once per candidate; each config only re-applies thresholds
+        news_features = news_filter.lookup(df.index[cands["entry_pos"].to_numpy()])
+        news_grid = list(itertools.product(
+            parse_list(args.min_headlines, int),
+            parse_list(args.filter_types, str),
+            parse_list(args.bearish_thresholds, float),
+            parse_list(args.bullish_thresholds, float),
+        ))
+
+    cal = loaded.cal
+    entry_ns = ts_ns[cands["entry_pos"].to_numpy()]
+    pips = cands["pips"].to_numpy()
+    rows = []
+    t0 = time.perf_counter()
+    for window, sides, max_sl in itertools.product(hours, parse_list(args.sides, str), parse_list(args.max_sl_pips, float)):
+        schedule_ok, activate_ok = policy_masks(cands, hour_mask(cal, parse_entry_hours(window)), SIDES[sides], max_sl)
+        for news in news_grid:
+            entry_ok = None
+            config = {"entry_hours": window, "sides": sides, "max_sl_distance_pips": max_sl}
+            if news is not None:
+                min_headlines, filter_type, bearish, bullish = news
+                try:
+                    entry_ok = news_filter.with_thresholds(min_headlines, filter_type, bearish, bullish).passes(*news_features)
+                except ValueError as e:
+                    raise SystemExit(str(e))
+                config.update(min_headline_count=min_headlines, filter_type=filter_type,
+                              bearish_threshold=bearish, bullish_threshold=bullish)
+            taken = replay(cands, schedule_ok, activate_ok, entry_ok) == TAKEN
+            rows.append({**config, **trade_metrics(pips[taken], entry_ns[taken])})
+    results = pd.DataFrame(rows)
+    print(f"Replayed {len(results)} policies in {time.perf_counter() - t0:.2f}s")
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    cand_csv = os.path.join(args.out_dir, "candidates.csv")
+    candidate_frame(cands, df.index).to_csv(cand_csv, index=False)
+    res_csv = os.path.join(args.out_dir, "policy_results.csv")
+    results.to_csv(res_csv, index=False)
+    print(f"Saved candidate table to: {cand_csv}")
+    print(f"Saved policy results to: {res_csv}")
+    if not results.empty:
+        print(results.sort_values("profit_factor", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
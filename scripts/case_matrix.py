@@ -0,0 +1,164 @@
+"""
+Trend x side case matrix (results/combined/) in one run.
+
+The combined results compare the strategy on EMA200 up days and down days, each as buy-only,
+sell-only and buy+sell, and on both kinds of day as buy+sell. Instead of one full backtest per case, the bars are loaded once
+and each trend-day set gets one SuperTrend pass and one candidate-trade table
+(candidate_trades.build_candidates). Every side policy on that set is then an independent
+position book replayed over the shared table with the engine's pending / one-position rules, so
+the trades match backtest_supertrend for each case exactly.
+
+Writes <out-dir>/<case>/trades.csv and trades_simple.csv per case plus <out-dir>/compare.csv.
+By default those are the cases results/combined/ already has directories for: up_* and down_* for
+all three side policies, plus both_dirs_buy_sell. both_dirs_buy_only and both_dirs_sell_only
+complete the grid and run only when named in --cases.
+
+Example:
+    python scripts/case_matrix.py --trend-csv data/trend/ema200_trend_by_date_1m.csv
+"""
+
+import os
+import sys
+import time
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BarArrays, index_ns
+from bar_set import load_bars
+from base_strategy import simple_trades
+from calendar_index import CalendarIndex, day_mask, hour_mask
+from candidate_trades import build_candidates, policy_masks, replay, replay_trades
+from indicators import supertrend_arrays
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR
+from sweep import PIP_SIZE, load_trend_days, parse_entry_hours, parse_list
+
+DEFAULT_OUT_DIR = os.path.join("results", "combined")
+DEFAULT_TREND_CSV = os.path.join("data", "trend", "ema200_trend_by_date_1m.csv")
+
+TREND_SETS = {"up": "up", "down": "down", "both_dirs": "both"}  # case prefix -> load_trend_days trend
+SIDE_POLICIES = {"buy_only": {"long"}, "sell_only": {"short"}, "buy_sell": None}
+COMPARE_COLUMNS = ["case", "total_trades", "evaluated_trades", "win_rate_pct", "net_pips", "profit_factor", "max_drawdown_pips"]
+
+
+class Case(NamedTuple):
+    name: str  # e.g. "up_buy_only"
+    trend: str  # key of TREND_SETS
+    allowed_sides: Optional[set]
+
+
+ALL_CASES = [
+    Case(f"{trend}_{policy}", trend, sides) for trend in TREND_SETS for policy, sides in SIDE_POLICIES.items()
+]
+# Cases with a results/combined/ directory; both_dirs_buy_only / both_dirs_sell_only run only when named
+DEFAULT_CASES = [c.name for c in ALL_CASES if c.trend != "both_dirs" or c.allowed_sides is None]
+
+
+def run_cases(
+    df: pd.DataFrame,
+    cases: Sequence[Case],
+    trend_days: Dict[str, set],
+    st_length: int = 10,
+    st_multiplier: float = 3.6,
+    max_sl_distance_pips: float = 520.0,
+    entry_hours=(13, 16),
+    pip_size: float = PIP_SIZE,
+) -> Dict[str, pd.DataFrame]:
+    """Trades per case for a UTC-indexed OHLC frame; one SuperTrend + candidate table per trend set."""
+    ts_ns = index_ns(df.index)
+    cal = CalendarIndex.from_ns(ts_ns)
+    prices = {col: df[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close")}
+    out: Dict[str, pd.DataFrame] = {}
+    for trend in dict.fromkeys(c.trend for c in cases):
+        keep = day_mask(cal, trend_days[trend])
+        ts = ts_ns[keep]
+        o, h, l, c = (prices[col][keep] for col in ("Open", "High", "Low", "Close"))
+        direction, supertrend = supertrend_arrays(h, l, c, st_length, st_multiplier)
+        cands = build_candidates(BarArrays(ts, o, h, l, c, direction, supertrend), pip_size)
+        in_hours = hour_mask(cal.select(keep), entry_hours)
+        for case in (c for c in cases if c.trend == trend):
+            status = replay(cands, *policy_masks(cands, in_hours, case.allowed_sides, max_sl_distance_pips))
+            out[case.name] = replay_trades(cands, status, ts).frame()
+    return out
+
+
+def compare_row(name: str, trades: pd.DataFrame) -> dict:
+    """One compare.csv row: counts, win rate, net pips, PF and max drawdown (from the trade equity)."""
+    pips = trades["pips"].to_numpy(dtype=float)
+    pips = pips[~np.isnan(pips)]
+    gains = pips[pips > 0].sum()
+    losses = -pips[pips < 0].sum()
+    equity = np.cumsum(pips)
+    return {
+        "case": name,
+        "total_trades": len(trades),
+        "evaluated_trades": len(pips),
+        "win_rate_pct": round(float((pips > 0).mean() * 100), 2) if len(pips) else 0.0,
+        "net_pips": int(round(float(pips.sum()))),
+        "profit_factor": gains / losses if losses > 0 else float("inf"),
+        "max_drawdown_pips": int(round(float((equity - np.maximum.accumulate(equity)).min()))) if len(pips) else 0,
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the trend x side case matrix in one pass over the data.")
+    parser.add_argument("--input-csv", default=os.path.join("data", "combined_xauusd_1min_full.csv"))
+    parser.add_argument("--trend-csv", default=DEFAULT_TREND_CSV, help=f"date,trend file (default: {DEFAULT_TREND_CSV})")
+    parser.add_argument(
+        "--cases",
+        default=",".join(DEFAULT_CASES),
+        help=f"Comma-separated cases (default: the {len(DEFAULT_CASES)} in results/combined/; also {', '.join(sorted({c.name for c in ALL_CASES} - set(DEFAULT_CASES)))})",
+    )
+    parser.add_argument("--st-length", type=int, default=10)
+    parser.add_argument("--st-multiplier", type=float, default=3.6)
+    parser.add_argument("--max-sl-distance-pips", type=float, default=520.0)
+    parser.add_argument("--entry-hours", default="13-16", help="UTC hour window, e.g., 13-16; or 'all'")
+    parser.add_argument("--date-start", default=None, help="Optional start date (UTC, YYYY-MM-DD)")
+    parser.add_argument("--date-end", default=None, help="Optional end date (UTC, YYYY-MM-DD, inclusive)")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR)
+    parser.add_argument("--no-ohlc-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    by_name = {c.name: c for c in ALL_CASES}
+    names = parse_list(args.cases, str)
+    unknown = [n for n in names if n not in by_name]
+    if unknown:
+        raise SystemExit(f"Unknown case(s): {', '.join(unknown)}. Choose from {', '.join(by_name)}.")
+    cases: List[Case] = [by_name[n] for n in names]
+    try:
+        entry_hours = parse_entry_hours(args.entry_hours)
+    except ValueError:
+        raise SystemExit("Invalid --entry-hours. Use 'all' or 'HH-HH' like 13-16.")
+    for path in (args.input_csv, args.trend_csv):
+        if not os.path.exists(path):
+            raise SystemExit(f"File not found: {path}")
+
+    t0 = time.perf_counter()
+    df = load_bars(args.input_csv, None if args.no_ohlc_cache else args.ohlc_cache_dir, args.date_start, args.date_end).frame
+    trend_days = {t: load_trend_days(args.trend_csv, TREND_SETS[t]) for t in dict.fromkeys(c.trend for c in cases)}
+
+    results = run_cases(
+        df, cases, trend_days, args.st_length, args.st_multiplier, args.max_sl_distance_pips, entry_hours
+    )
+    rows = []
+    for case in cases:
+        trades = results[case.name]
+        case_dir = os.path.join(args.out_dir, case.name)
+        os.makedirs(case_dir, exist_ok=True)
+        trades.to_csv(os.path.join(case_dir, "trades.csv"), index=False)
+        simple_trades(trades).to_csv(os.path.join(case_dir, "trades_simple.csv"), index=False)
+        rows.append(compare_row(case.name, trades))
+    compare = pd.DataFrame(rows, columns=COMPARE_COLUMNS)
+    compare_csv = os.path.join(args.out_dir, "compare.csv")
+    compare.to_csv(compare_csv, index=False)
+    print(f"{len(cases)} cases over {len(df)} bars in {time.perf_counter() - t0:.2f}s")
+    print(compare.to_string(index=False))
+    print(f"Saved case outputs and {compare_csv}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+"""
+Chunked reader for 1-minute OHLC CSVs that reads only as much of the file as a run needs.
+
+read_ohlc_csv(path, date_start, date_end, max_rows) parses the file in chunks of CHUNK_ROWS rows
+and stops as soon as max_rows rows in range have been collected or a chunk passes date_end, so
+--max-rows smoke tests and early date ranges never touch the rest of a multi-year file.
+
+To skip the part before date_start, a coarse byte-offset index is kept next to the CSV in
+<csv>.offsets.json: the offset and timestamp of the first line of every BLOCK_BYTES block. It is
+built on first use by seeking to each block boundary and reading one line (no full scan), and
+rebuilt when the CSV's size or mtime changes. Reading then starts at the last indexed line before
+date_start.
+
+Skipping and stopping at date_end assume time-ordered rows. Files whose indexed timestamps go
+backwards, or whose rows turn out to be out of order while reading, are read from the top and
+masked instead (max_rows still stops the read early).
+"""
+
+import json
+import os
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import index_ns
+from ohlc_cache import PRICE_COLUMNS, date_bounds_ns
+
+CHUNK_ROWS = 200_000
+BLOCK_BYTES = 4 * 1024 * 1024
+FORMAT_VERSION = 1
+
+
+class _OutOfOrder(Exception):
+    """Rows are not time-ordered, so offset skipping / early stop on date_end are not safe."""
+
+
+def offsets_path(csv_path: str) -> str:
+    return f"{csv_path}.offsets.json"
+
+
+def _line_ns(line: bytes, ts_col: int) -> int:
+    ts = pd.Timestamp(line.decode("utf-8").split(",")[ts_col].strip().strip('"'))
+    return (ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")).value
+
+
+def build_offsets(csv_path: str, timestamp_col: str = "timestamp") -> dict:
+    """Offset + timestamp of the first full line in every BLOCK_BYTES block of the file."""
+    st = os.stat(csv_path)
+    offsets: List[int] = []
+    first_ns: List[int] = []
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+        columns = [c.strip().strip('"') for c in header.decode("utf-8").rstrip("\r\n").split(",")]
+        ts_col = columns.index(timestamp_col)
+        pos = len(header)
+        while pos < st.st_size:
+            f.seek(pos)
+            if pos > len(header):
+                f.readline()  # finish the line the block boundary falls in
+            offset = f.tell()
+            line = f.readline()
+            if not line.strip():
+                break
+            offsets.append(offset)
+            first_ns.append(_line_ns(line, ts_col))
+            pos = offset + BLOCK_BYTES
+    return {
+        "format": FORMAT_VERSION,
+        "source_size": st.st_size,
+        "source_mtime_ns": st.st_mtime_ns,
+        "timestamp_col": timestamp_col,
+        "header_bytes": len(header),
+        "block_bytes": BLOCK_BYTES,
+        "offsets": offsets,
+        "first_ns": first_ns,
+        "sorted": bool(np.all(np.diff(first_ns) >= 0)) if first_ns else True,
+    }
+
+
+def _save_offsets(csv_path: str, index: dict) -> None:
+    path = offsets_path(csv_path)
+    tmp = f"{path}.tmp{os.getpid()}"
+    try:
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # read-only data dir: the index is rebuilt (cheaply) next time
+
+
+def load_offsets(csv_path: str, timestamp_col: str = "timestamp") -> dict:
+    """The CSV's offset index from its sidecar, (re)built and saved if missing or stale."""
+    st = os.stat(csv_path)
+    try:
+        with open(offsets_path(csv_path), "r", encoding="utf-8") as f:
+            index = json.load(f)
+        if (
+            index.get("format") == FORMAT_VERSION
+            and index.get("source_size") == st.st_size
+            and index.get("source_mtime_ns") == st.st_mtime_ns
+            and index.get("timestamp_col") == timestamp_col
+        ):
+            return index
+    except (OSError, ValueError):
+        pass
+    index = build_offsets(csv_path, timestamp_col)
+    _save_offsets(csv_path, index)
+    return index
+
+
+def _read(
+    csv_path: str,
+    columns: List[str],
+    start: int,
+    lo: Optional[int],
+    hi: Optional[int],
+    max_rows: Optional[int],
+    ordered: bool,
+    timestamp_col: str,
+) -> pd.DataFrame:
+    chunk_rows = min(CHUNK_ROWS, max_rows) if max_rows else CHUNK_ROWS
+    dtype = {c: np.float64 for c in columns if c in PRICE_COLUMNS}
+    pieces, kept, last_ns = [], 0, None
+    with open(csv_path, "rb") as f:
+        f.seek(start)
+        for chunk in pd.read_csv(f, header=None, names=columns, dtype=dtype, chunksize=chunk_rows):
+            ts = pd.to_datetime(chunk[timestamp_col], utc=True)
+            ns = index_ns(pd.DatetimeIndex(ts))
+            if ordered and len(ns) and ((last_ns is not None and ns[0] < last_ns) or np.any(ns[1:] < ns[:-1])):
+                raise _OutOfOrder()
+            mask = np.ones(len(ns), dtype=bool)
+            if lo is not None:
+                mask &= ns >= lo
+            if hi is not None:
+                mask &= ns < hi
+            chunk[timestamp_col] = ts
+            if mask.any():
+                piece = chunk[mask] if not mask.all() else chunk
+                if max_rows:
+                    piece = piece.head(max_rows - kept)
+                pieces.append(piece)
+                kept += len(piece)
+            if max_rows and kept >= max_rows:
+                break
+            if len(ns):
+                last_ns = int(ns[-1])
+                if ordered and hi is not None and last_ns >= hi:
+                    break
+    if not pieces:
+        return pd.DataFrame({c: pd.Series(dtype="datetime64[ns, UTC]" if c == timestamp_col else np.float64) for c in columns})
+    return pd.concat(pieces, ignore_index=True)
+
+
+def read_ohlc_csv(
+    csv_path: str,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    max_rows: Optional[int] = None,
+    timestamp_col: str = "timestamp",
+    use_offsets: bool = True,
+) -> pd.DataFrame:
+    """Rows with date_start <= date <= date_end (UTC dates, end inclusive), at most max_rows of them.
+
+    Same rows as pd.read_csv + date mask + head(max_rows), with the timestamp column parsed to UTC
+    datetimes and OHLC as float64; only the chunks needed are read (see the module docstring).
+    """
+    lo, hi = date_bounds_ns(date_start, date_end)
+    with open(csv_path, "rb") as f:
+        header = f.readline()
+    columns = [c.strip().strip('"') for c in header.decode("utf-8").rstrip("\r\n").split(",")]
+    if timestamp_col not in columns:
+        raise ValueError(f"{csv_path}: no '{timestamp_col}' column")
+
+    start, ordered = len(header), False
+    if use_offsets and (lo is not None or hi is not None):
+        index = load_offsets(csv_path, timestamp_col)
+        ordered = index["sorted"]
+        if ordered and lo is not None and index["offsets"]:
+            # Last indexed line strictly before lo: rows at lo may continue from the block before
+            k = int(np.searchsorted(index["first_ns"], lo, "left")) - 1
+            if k >= 0:
+                start = index["offsets"][k]
+    try:
+        return _read(csv_path, columns, start, lo, hi, max_rows, ordered, timestamp_col)
+    except _OutOfOrder:
+        if use_offsets and (lo is not None or hi is not None):
+            index = dict(load_offsets(csv_path, timestamp_col), sorted=False)
+            _save_offsets(csv_path, index)
+        return _read(csv_path, columns, len(header), lo, hi, max_rows, False, timestamp_col)
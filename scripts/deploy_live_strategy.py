@@ -16,6 +16,8 @@ from pathlib import Path
 import pandas as pd
 import sys
 
+from indicators import SuperTrendState
+
 # Setup logging
 log_dir = Path("logs/deployment")
 log_dir.mkdir(parents=True, exist_ok=True)
@@ -180,6 +182,21 @@ class PerformanceMonitor:
         return metrics
 
 
+def warm_up_supertrend(history_csv: str, max_bars: int = 10000) -> SuperTrendState:
+    """Seed a streaming SuperTrend from the tail of a 1-minute OHLC CSV.
+
+    After warm-up, call state.update(bar) once per closed bar; each call is O(1).
+    """
+    state = SuperTrendState(DeploymentConfig.SUPERTREND_PERIOD, DeploymentConfig.SUPERTREND_MULTIPLIER)
+    history = pd.read_csv(history_csv, usecols=["timestamp", "High", "Low", "Close"]).tail(max_bars)
+    for bar in history[["High", "Low", "Close"]].to_dict("records"):
+        state.update(bar)
+    last_ts = history["timestamp"].iloc[-1] if len(history) else "n/a"
+    logger.info(f"SuperTrend warmed on {state.bars_seen} bars (last: {last_ts}) — "
+                f"direction: {state.direction:+.0f}, line: {state.supertrend:.2f}")
+    return state
+
+
 def deploy_strategy(mode: str):
     """
     Deploy the combined filter strategy
@@ -225,7 +242,7 @@ def deploy_strategy(mode: str):
     logger.info("\nNext Steps:")
     logger.info("1. Connect to your broker's API")
     logger.info("2. Subscribe to XAUUSD 1-minute data feed")
-    logger.info("3. Monitor for SuperTrend signals during 13-16 UTC")
+    logger.info("3. Feed each closed bar to SuperTrendState.update() and watch for flips during 13-16 UTC")
     logger.info("4. Check news sentiment before each trade")
     logger.info("5. Log all trades using monitor.log_trade()")
     logger.info("6. Review performance daily with monitor.print_summary()")
@@ -261,6 +278,11 @@ def run_backtest_on_recent_data():
     
     logger.info(f"\nCommand: {cmd}")
     logger.info("\n💡 Run this command to validate on recent 90 days before deployment")
+    logger.info(
+        "   For rolling re-validation (3-month in-sample, monthly out-of-sample): "
+        f"python scripts/walk_forward.py --entry-hours {DeploymentConfig.ENTRY_HOUR_START}-{DeploymentConfig.ENTRY_HOUR_END} "
+        "--sides both --is-months 3 --oos-months 1"
+    )
     
     return cmd
 
@@ -281,6 +303,11 @@ def main():
         action='store_true',
         help='Run validation backtest on recent data first'
     )
+    parser.add_argument(
+        '--history-csv',
+        default=None,
+        help='Optional 1-minute OHLC CSV used to warm up the streaming SuperTrend state'
+    )
     
     args = parser.parse_args()
     
@@ -304,6 +331,9 @@ def main():
     
     # Deploy strategy
     monitor = deploy_strategy(args.mode)
+
+    if args.history_csv:
+        warm_up_supertrend(args.history_csv)
     
     # Example: Log a test trade (remove in production)
     if args.mode == 'paper':
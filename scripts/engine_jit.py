@@ -0,0 +1,232 @@
+"""
+Optional compiled backend for the backtest state machine (--engine jit).
+
+_span_kernel is the loop of backtest_engine.run_engine_span written against plain arrays and
+scalars only, so numba can compile it in nopython mode. Records go into preallocated arrays (a
+span emits at most one record per bar) and the loop state comes in and goes out through two small
+arrays; run_engine_span_jit moves them into a TradeTable in one vectorised step. When numba is not
+installed it falls back to the pure-Python array engine, which produces the same trades.
+
+Install the compiler with 'pip install numba'. The first call compiles the kernel; numba caches the
+machine code under __pycache__ for later runs.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from backtest_engine import LONG, EngineInputs, EngineState, SpanResult, run_engine_span
+from trade_table import NAT_NS, TradeTable
+
+_KERNEL = None  # compiled kernel, resolved on first use
+_UNAVAILABLE = False
+
+
+def _span_kernel(
+    ts_ns, high, low, close, direction, supertrend, in_hours, target_pos, target_side,
+    ok_long, ok_short, has_ok, max_sl_distance_pips, pip_size, record_rejected,
+    start, stop, state_i, state_f, out_i, out_f,
+):
+    """run_engine_span's loop over bars [start, stop).
+
+    state_i = (pos_side, pos_entry_pos, pending_pos, pending_ts, pending_side) and
+    state_f = (pos_entry, pos_sl, prev_st) are read on entry and written back on return.
+    Records are written to out_i rows (entry_pos, exit_pos, side, passed) and out_f rows
+    (entry, exit, final_stop, pips); returns the record count.
+    """
+    pos_side = state_i[0]
+    pos_entry_pos = state_i[1]
+    pending_pos = state_i[2]
+    pending_ts = state_i[3]
+    pending_side = state_i[4]
+    pos_entry = state_f[0]
+    pos_sl = state_f[1]
+    prev_st = state_f[2]
+    nan = math.nan
+    k = 0
+
+    for i in range(start, stop):
+        cur_dir = direction[i]
+        prior = prev_st
+        st_raw = supertrend[i]
+        stv = st_raw if st_raw == st_raw else prior
+
+        # 1) Activate pending entry on its bar, honoring hours and cap
+        if pending_pos >= 0 and ts_ns[i] >= pending_ts:
+            if in_hours[i] and pos_side == 0 and st_raw == st_raw:
+                entry_price = close[i]
+                if abs(entry_price - st_raw) / pip_size <= max_sl_distance_pips:
+                    ok = True
+                    if has_ok:
+                        ok = ok_long[i] if pending_side == LONG else ok_short[i]
+                    if ok:
+                        pos_side = pending_side
+                        pos_entry_pos = i
+                        pos_entry = entry_price
+                        pos_sl = st_raw
+                    elif record_rejected:
+                        out_i[k, 0] = i
+                        out_i[k, 1] = -1
+                        out_i[k, 2] = pending_side
+                        out_i[k, 3] = 0
+                        out_f[k, 0] = entry_price
+                        out_f[k, 1] = nan
+                        out_f[k, 2] = nan
+                        out_f[k, 3] = nan
+                        k += 1
+            pending_pos = -1
+
+        # 2) Manage open position: trail and check exit via H/L cross of stop
+        if pos_side != 0:
+            trail = stv if cur_dir == pos_side else prior
+            exit_hit = False
+            if trail == trail:
+                if pos_side == LONG:
+                    if trail > pos_sl:
+                        pos_sl = trail
+                    exit_hit = low[i] <= trail
+                else:
+                    if trail < pos_sl:
+                        pos_sl = trail
+                    exit_hit = high[i] >= trail
+            if exit_hit:
+                if prior == prior:
+                    exit_price = prior
+                else:
+                    exit_price = low[i] if pos_side == LONG else high[i]
+                sign = 1.0 if pos_side == LONG else -1.0
+                out_i[k, 0] = pos_entry_pos
+                out_i[k, 1] = i
+                out_i[k, 2] = pos_side
+                out_i[k, 3] = 1
+                out_f[k, 0] = pos_entry
+                out_f[k, 1] = exit_price
+                out_f[k, 2] = pos_sl
+                out_f[k, 3] = (exit_price - pos_entry) / pip_size * sign
+                k += 1
+                pos_side = 0
+
+        # 3) Only schedule new entries during entry hours and if nothing is pending
+        prev_st = stv
+        if not in_hours[i] or pending_pos >= 0:
+            continue
+        enter_pos = target_pos[i]
+        if enter_pos >= 0:
+            pending_pos = enter_pos
+            pending_ts = ts_ns[enter_pos]
+            pending_side = target_side[i]
+
+    state_i[0] = pos_side
+    state_i[1] = pos_entry_pos
+    state_i[2] = pending_pos
+    state_i[3] = pending_ts
+    state_i[4] = pending_side
+    state_f[0] = pos_entry
+    state_f[1] = pos_sl
+    state_f[2] = prev_st
+    return k
+
+
+def compiled_kernel():
+    """The numba-compiled _span_kernel, or None when numba is not installed."""
+    global _KERNEL, _UNAVAILABLE
+    if _KERNEL is None and not _UNAVAILABLE:
+        try:
+            import numba  # type: ignore
+        except ImportError:
+            _UNAVAILABLE = True
+            return None
+        _KERNEL = numba.njit(cache=True, nogil=True)(_span_kernel)
+    return _KERNEL
+
+
+def jit_available() -> bool:
+    return compiled_kernel() is not None
+
+
+def _run_kernel(inputs: EngineInputs, max_sl_distance_pips, pip_size, start, stop, state, record_rejected, kernel):
+    """Call the kernel over [start, stop); returns (out_i, out_f) trimmed to the records, and the state."""
+    has_ok = inputs.ok_long is not None
+    ok_long = np.asarray(inputs.ok_long, dtype=np.bool_) if has_ok else np.zeros(0, dtype=np.bool_)
+    ok_short = np.asarray(inputs.ok_short, dtype=np.bool_) if has_ok else np.zeros(0, dtype=np.bool_)
+    state_i = np.array(
+        [state.pos_side, state.pos_entry_pos, state.pending_pos, state.pending_ts, state.pending_side], dtype=np.int64
+    )
+    state_f = np.array([state.pos_entry, state.pos_sl, state.prev_st], dtype=np.float64)
+    out_i = np.empty((stop - start, 4), dtype=np.int64)
+    out_f = np.empty((stop - start, 4), dtype=np.float64)
+    count = kernel(
+        np.asarray(inputs.ts_ns, dtype=np.int64),
+        np.asarray(inputs.high, dtype=np.float64),
+        np.asarray(inputs.low, dtype=np.float64),
+        np.asarray(inputs.close, dtype=np.float64),
+        np.asarray(inputs.direction, dtype=np.float64),
+        np.asarray(inputs.supertrend, dtype=np.float64),
+        np.asarray(inputs.in_hours, dtype=np.bool_),
+        np.asarray(inputs.target_pos, dtype=np.int64),
+        np.asarray(inputs.target_side, dtype=np.int64),
+        ok_long,
+        ok_short,
+        has_ok,
+        float(max_sl_distance_pips),
+        float(pip_size),
+        bool(record_rejected),
+        start,
+        stop,
+        state_i,
+        state_f,
+        out_i,
+        out_f,
+    )
+    si, sf = state_i.tolist(), state_f.tolist()
+    state = EngineState(si[0], si[1], sf[0], sf[1], si[2], si[3], si[4], sf[2])
+    return out_i[:count], out_f[:count], state
+
+
+def run_engine_span_jit(
+    inputs: EngineInputs,
+    max_sl_distance_pips: float,
+    pip_size: float,
+    start: int = 1,
+    stop: Optional[int] = None,
+    state: Optional[EngineState] = None,
+    record_rejected: bool = False,
+    kernel=None,
+    pos_entry_ns: Optional[int] = None,
+) -> SpanResult:
+    """run_engine_span on the compiled kernel (same trades and state).
+
+    Falls back to run_engine_span when numba is missing. kernel overrides the compiled kernel
+    (e.g. the plain-Python _span_kernel, to check the kernel logic without numba).
+    """
+    kernel = kernel or compiled_kernel()
+    if kernel is None:
+        return run_engine_span(
+            inputs, max_sl_distance_pips, pip_size, start, stop, state, record_rejected, pos_entry_ns=pos_entry_ns
+        )
+    n = len(inputs.ts_ns)
+    stop = n if stop is None else min(stop, n)
+    start = max(start, 1)
+    state = state or EngineState()
+    if start >= stop:
+        return SpanResult(TradeTable(), state, max(start, stop))
+    out_i, out_f, state = _run_kernel(inputs, max_sl_distance_pips, pip_size, start, stop, state, record_rejected, kernel)
+    ts_ns = np.asarray(inputs.ts_ns, dtype=np.int64)
+    entry_pos, exit_pos = out_i[:, 0], out_i[:, 1]
+    entry_ns = ts_ns[np.maximum(entry_pos, 0)]
+    if pos_entry_ns is not None:
+        # A position carried in from before ts_ns[0] (see backtest_checkpoint.resume)
+        entry_ns[entry_pos < 0] = pos_entry_ns
+    table = TradeTable(len(out_i))
+    table.extend(
+        entry_ns=entry_ns,
+        exit_ns=np.where(exit_pos >= 0, ts_ns[np.maximum(exit_pos, 0)], NAT_NS),
+        side=out_i[:, 2],
+        entry=out_f[:, 0],
+        exit=out_f[:, 1],
+        final_stop=out_f[:, 2],
+        pips=out_f[:, 3],
+        passed=out_i[:, 3].astype(bool),
+    )
+    return SpanResult(table, state, stop)
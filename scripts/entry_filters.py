@@ -0,0 +1,207 @@
+"""
+Pluggable entry filters for backtest_supertrend.
+
+Every filter is evaluated in bulk before the bar loop runs and contributes boolean arrays to one
+of the engine's gates (each hook returns None when the filter does not constrain that stage):
+
+- bar_mask(cal): rows kept before indicators are computed (trend days)
+- hour_mask(cal): bars on which entries may be scheduled and activated (entry hours)
+- sides(): sides whose flips may schedule an entry (long / short)
+- entry_mask(index, positions, side): for candidate entry bars, whether the entry may be taken
+  (news sentiment, ML score); checked after the hours and SL-cap rules at activation
+
+The loop then only reads the combined masks instead of calling a Python predicate per candidate.
+"""
+
+import copy
+import datetime as dt
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import LONG, SHORT, entry_candidates, next_candle_indices
+from calendar_index import CalendarIndex, day_mask, hour_mask
+
+
+class EntryFilter:
+    """Base class; subclasses override the hooks they gate."""
+
+    name = "filter"
+    gates_entries = False  # True when entry_mask is implemented
+
+    def bar_mask(self, cal: CalendarIndex) -> Optional[np.ndarray]:
+        return None
+
+    def hour_mask(self, cal: CalendarIndex) -> Optional[np.ndarray]:
+        return None
+
+    def sides(self) -> Optional[set]:
+        return None
+
+    def entry_mask(self, index: pd.DatetimeIndex, positions: np.ndarray, side: int) -> Optional[np.ndarray]:
+        return None
+
+
+class TrendDayFilter(EntryFilter):
+    """Trade only on the given UTC dates (e.g. EMA200 trend days); other days' bars are dropped."""
+
+    name = "trend_days"
+
+    def __init__(self, days: Iterable[dt.date]):
+        self.days = set(days)
+
+    def bar_mask(self, cal: CalendarIndex) -> np.ndarray:
+        return day_mask(cal, self.days)
+
+
+class EntryHoursFilter(EntryFilter):
+    """Schedule and activate entries only within [start, end) UTC hours."""
+
+    name = "entry_hours"
+
+    def __init__(self, entry_hours: Optional[Tuple[int, int]]):
+        self.entry_hours = entry_hours
+
+    def hour_mask(self, cal: CalendarIndex) -> Optional[np.ndarray]:
+        return None if self.entry_hours is None else hour_mask(cal, self.entry_hours)
+
+
+class SideFilter(EntryFilter):
+    """Only schedule entries for the given sides ({"long"}, {"short"}; None = both)."""
+
+    name = "sides"
+
+    def __init__(self, allowed_sides: Optional[set]):
+        self.allowed_sides = allowed_sides
+
+    def sides(self) -> Optional[set]:
+        return self.allowed_sides
+
+
+class NewsSentimentFilter(EntryFilter):
+    """GDELT news gate: enough headlines and bearish / bullish / either net sentiment at the entry time.
+
+    sentiment_df has one row per trade entry_time with headline_count and net_sentiment; entries
+    without a matching row are rejected.
+    """
+
+    name = "news_sentiment"
+    gates_entries = True
+
+    def __init__(
+        self,
+        sentiment_df: pd.DataFrame,
+        min_headline_count: int = 5,
+        filter_type: str = "bearish",
+        bearish_threshold: float = -0.1,
+        bullish_threshold: float = 0.3,
+    ):
+        if filter_type not in ("bearish", "bullish", "combined"):
+            raise ValueError(f"Unknown filter_type: {filter_type}")
+        self.sentiment_df = sentiment_df
+        # First row per entry_time, as the per-trade lookup matched
+        self._by_time = sentiment_df.drop_duplicates("entry_time", keep="first").set_index("entry_time")
+        self.min_headline_count = min_headline_count
+        self.filter_type = filter_type
+        self.bearish_threshold = bearish_threshold
+        self.bullish_threshold = bullish_threshold
+
+    def lookup(self, times: pd.DatetimeIndex) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """(found, headline_count, net_sentiment) per entry time; missing columns count as 0."""
+        rows = self._by_time.reindex(times)
+        found = np.asarray(times.isin(self._by_time.index))
+        zeros = np.zeros(len(times))
+        headlines = rows["headline_count"].to_numpy(dtype=float) if "headline_count" in rows.columns else zeros
+        net = rows["net_sentiment"].to_numpy(dtype=float) if "net_sentiment" in rows.columns else zeros
+        return found, headlines, net
+
+    def passes(self, found: np.ndarray, headlines: np.ndarray, net: np.ndarray) -> np.ndarray:
+        """Apply the thresholds to looked-up features (cheap to re-run for other thresholds)."""
+        enough = ~(headlines < self.min_headline_count)
+        bearish = net < self.bearish_threshold
+        bullish = net > self.bullish_threshold
+        if self.filter_type == "bearish":
+            sentiment_ok = bearish
+        elif self.filter_type == "bullish":
+            sentiment_ok = bullish
+        else:
+            sentiment_ok = bearish | bullish
+        return found & enough & sentiment_ok
+
+    def with_thresholds(self, min_headline_count: int, filter_type: str, bearish_threshold: float, bullish_threshold: float) -> "NewsSentimentFilter":
+        """Same sentiment table, other thresholds (skips re-indexing the table)."""
+        if filter_type not in ("bearish", "bullish", "combined"):
+            raise ValueError(f"Unknown filter_type: {filter_type}")
+        other = copy.copy(self)
+        other.min_headline_count = min_headline_count
+        other.filter_type = filter_type
+        other.bearish_threshold = bearish_threshold
+        other.bullish_threshold = bullish_threshold
+        return other
+
+    def entry_mask(self, index: pd.DatetimeIndex, positions: np.ndarray, side: int) -> np.ndarray:
+        return self.passes(*self.lookup(index[positions]))
+
+
+class MLScoreFilter(EntryFilter):
+    """Take an entry only if a model score at its timestamp is >= min_score (missing scores reject)."""
+
+    name = "ml_score"
+    gates_entries = True
+
+    def __init__(self, scores: pd.Series, min_score: float = 0.5, sides: Optional[set] = None):
+        self.scores = scores[~scores.index.duplicated(keep="first")]
+        self.min_score = min_score
+        self.only_sides = sides
+
+    def entry_mask(self, index: pd.DatetimeIndex, positions: np.ndarray, side: int) -> Optional[np.ndarray]:
+        if self.only_sides is not None and ("long" if side == LONG else "short") not in self.only_sides:
+            return None
+        values = self.scores.reindex(index[positions]).to_numpy(dtype=float)
+        return values >= self.min_score
+
+
+class EntryGates(NamedTuple):
+    in_hours: np.ndarray
+    allowed_sides: Optional[set]
+    entry_ok: Optional[Tuple[np.ndarray, np.ndarray]]  # per-bar (long, short); None = no entry filters
+
+
+def combined_bar_mask(filters: Sequence[EntryFilter], cal: CalendarIndex) -> Optional[np.ndarray]:
+    masks = [m for m in (f.bar_mask(cal) for f in filters) if m is not None]
+    return np.logical_and.reduce(masks) if masks else None
+
+
+def build_gates(filters: Sequence[EntryFilter], cal: CalendarIndex, df: pd.DataFrame) -> EntryGates:
+    """Evaluate the hour, side and entry hooks over df (indexed, with direction) in bulk."""
+    n = len(df)
+    in_hours = np.ones(n, dtype=bool)
+    for f in filters:
+        m = f.hour_mask(cal)
+        if m is not None:
+            in_hours &= m
+
+    allowed_sides: Optional[set] = None
+    for f in filters:
+        s = f.sides()
+        if s is not None:
+            allowed_sides = set(s) if allowed_sides is None else allowed_sides & set(s)
+
+    entry_filters: List[EntryFilter] = [f for f in filters if f.gates_entries]
+    if not entry_filters:
+        return EntryGates(in_hours, allowed_sides, None)
+
+    open_ = df["Open"].to_numpy(dtype=float)
+    close = df["Close"].to_numpy(dtype=float)
+    next_red, next_green = next_candle_indices(open_, close)
+    long_pos, short_pos = entry_candidates(open_, close, df["direction"].to_numpy(dtype=float), next_red, next_green)
+    ok = []
+    for side, positions in ((LONG, long_pos), (SHORT, short_pos)):
+        side_ok = np.ones(n, dtype=bool)
+        for f in entry_filters:
+            m = f.entry_mask(df.index, positions, side)
+            if m is not None:
+                side_ok[positions] &= np.asarray(m, dtype=bool)
+        ok.append(side_ok)
+    return EntryGates(in_hours, allowed_sides, (ok[0], ok[1]))
@@ -20,9 +20,12 @@ import argparse
 from typing import List, Tuple
 import pandas as pd
 
+from bar_dataset import BarDataset
+from profiling import StageProfiler, stage
+
 
 def _read_csv_auto(path: Path) -> pd.DataFrame:
-    df = pd.read_csv(path, parse_dates=[0], infer_datetime_format=True)
+    df = pd.read_csv(path, parse_dates=[0])
     # Ensure timestamp is first column; normalize to UTC
     df.columns = [c if i != 0 else "timestamp" for i, c in enumerate(df.columns)]
     df = df.rename(columns={c: c.strip() for c in df.columns})
@@ -70,6 +73,31 @@ def _sample_at_or_before(df_resampled: pd.DataFrame, time_str: str) -> pd.DataFr
     return s
 
 
+def _add_minutes(time_str: str, minutes: int) -> str:
+    hh, mm = map(int, time_str.split(':'))
+    base = pd.Timestamp(f"2000-01-01 {hh:02d}:{mm:02d}:00", tz='UTC')
+    shifted = base + pd.Timedelta(minutes=minutes)
+    return shifted.strftime('%H:%M')
+
+
+def trend_by_date(close: pd.Series, pandas_freq: str, cutoff: str, shift_hours: int = 1) -> pd.DataFrame:
+    """Per-day Up/Down: resampled close vs its EMA200 at the last bar at or before cutoff (UTC HH:MM).
+
+    close is indexed by tz-aware UTC timestamps. Returns columns date, trend (empty if no bar qualifies).
+    """
+    # Use Close price; pick last bar at or before the cutoff
+    rs = close.to_frame("close").resample(pandas_freq).last()
+    rs["ema_200"] = rs["close"].ewm(span=200, adjust=False).mean()
+    shifted = rs.copy()
+    shifted.index = shifted.index + pd.Timedelta(hours=shift_hours)
+    sampled = _sample_at_or_before(shifted, _add_minutes(cutoff, shift_hours * 60))
+    out_df = pd.DataFrame({
+        "date": sampled.index.tz_convert("UTC").date,
+        "trend": (sampled["close"] > sampled["ema_200"]).map({True: "Up", False: "Down"}),
+    })
+    return out_df.drop_duplicates(subset=["date"]).sort_values("date")
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate EMA200 trend per-day (Up/Down)")
     parser.add_argument(
@@ -77,6 +105,9 @@ def main():
         default="data/combined_xauusd_1min_full.csv",
         help="Combined 1-minute CSV input (default: data/combined_xauusd_1min_full.csv)",
     )
+    parser.add_argument("--dataset", default=None, help="Read bars from a year/month-partitioned dataset (scripts/bar_dataset.py) instead of --input-csv")
+    parser.add_argument("--date-start", default=None, help="With --dataset: first UTC date (YYYY-MM-DD) to read; earlier months are not opened")
+    parser.add_argument("--date-end", default=None, help="With --dataset: last UTC date (YYYY-MM-DD, inclusive) to read")
     parser.add_argument(
         "--out-csv",
         default="results/trends/ema200_trend_by_date_1m.csv",
@@ -95,14 +126,33 @@ def main():
         default="1m=11:59,5m=11:55,15m=11:45,30m=11:30,1h=12:00,4h=12:00",
         help="Per-timeframe UTC cutoff times applied BEFORE overlap (format: tf=HH:MM,...). Close of last bar at or before each time is used.",
     )
+    parser.add_argument("--profile", action="store_true", help="Print per-stage wall/CPU time and peak memory and save profile_ema200_trend.json next to --out-csv")
     args = parser.parse_args()
 
+    profiler = StageProfiler.start() if args.profile else None
+    try:
+        _generate(args)
+    finally:
+        if profiler is not None:
+            profiler.report()
+            profiler.save(str(Path(args.out_csv).parent / "profile_ema200_trend.json"))
+            profiler.stop()
+
+
+def _generate(args: argparse.Namespace) -> None:
     inp = Path(args.input_csv)
     out = Path(args.out_csv)
-    if not inp.exists():
-        raise SystemExit(f"Input file not found: {inp}")
-
-    df = _read_csv_auto(inp)
+    if args.dataset:
+        dataset = BarDataset(args.dataset)
+        if not dataset.exists():
+            raise SystemExit(f"Dataset not found or empty: {args.dataset}")
+        with stage("read_csv"):
+            df = dataset.read(args.date_start, args.date_end).set_index("timestamp")
+    else:
+        if not inp.exists():
+            raise SystemExit(f"Input file not found: {inp}")
+        with stage("read_csv"):
+            df = _read_csv_auto(inp)
 
     # normalize column names to lowercase for robustness
     df.columns = [c.lower() for c in df.columns]
@@ -131,42 +181,26 @@ def main():
 
     time_map = _parse_time_map(args.sample_times)
 
-    def _add_minutes(time_str: str, minutes: int) -> str:
-        hh, mm = map(int, time_str.split(':'))
-        base = pd.Timestamp(f"2000-01-01 {hh:02d}:{mm:02d}:00", tz='UTC')
-        shifted = base + pd.Timedelta(minutes=minutes)
-        return shifted.strftime('%H:%M')
-
     if multi_list:
         saved_any = False
         alias_1m_path = None
         fifteen_path = None
         for f in multi_list:
             pandas_freq, label = _normalize_freq_label(f)
-            # Use Close price; pick last bar at or before timeframe-specific cutoff
-            m = df["close"].to_frame()
-            rs = m.resample(pandas_freq).last()
-            rs["ema_200"] = rs["close"].ewm(span=200, adjust=False).mean()
-            shifted = rs.copy()
-            shifted.index = shifted.index + pd.Timedelta(hours=args.shift_hours)
-            cutoff = time_map.get(label, args.time)
-            effective_cutoff = _add_minutes(cutoff, args.shift_hours * 60)
-            sampled = _sample_at_or_before(shifted, effective_cutoff)
-            if sampled.empty:
-                print(f"⚠️ No rows found for {label} at/before {cutoff}; skipping.")
-                continue
-            out_df = pd.DataFrame({
-                "date": sampled.index.tz_convert("UTC").date,
-                "trend": (sampled["close"] > sampled["ema_200"]).map({True: "Up", False: "Down"}),
-            })
-            out_df = out_df.drop_duplicates(subset=["date"]).sort_values("date")
-            # Build output path with suffix in the same folder as --out-csv
-            out_base = Path(args.out_csv)
-            # Keep timeframe files together in same folder as out-csv
-            out_tf = out_base.parent / f"ema200_trend_by_date_{label}.csv"
-            out_tf.parent.mkdir(parents=True, exist_ok=True)
-            out_df.to_csv(out_tf, index=False)
-            print(f"✅ Saved trend file to: {out_tf} (rows: {len(out_df)})")
+            with stage(f"trend_{label}"):
+                # Timeframe-specific cutoff
+                cutoff = time_map.get(label, args.time)
+                out_df = trend_by_date(df["close"], pandas_freq, cutoff, args.shift_hours)
+                if out_df.empty:
+                    print(f"⚠️ No rows found for {label} at/before {cutoff}; skipping.")
+                    continue
+                # Build output path with suffix in the same folder as --out-csv
+                out_base = Path(args.out_csv)
+                # Keep timeframe files together in same folder as out-csv
+                out_tf = out_base.parent / f"ema200_trend_by_date_{label}.csv"
+                out_tf.parent.mkdir(parents=True, exist_ok=True)
+                out_df.to_csv(out_tf, index=False)
+                print(f"✅ Saved trend file to: {out_tf} (rows: {len(out_df)})")
             saved_any = True
             if label == "1m":
                 alias_1m_path = out_tf
@@ -186,23 +220,12 @@ def main():
         return
 
     # Single-output mode (use fallback time)
-    m = df["close"].to_frame()
-    rs = m.resample(args.resample).last()
-    rs["ema_200"] = rs["close"].ewm(span=200, adjust=False).mean()
-    shifted = rs.copy()
-    shifted.index = shifted.index + pd.Timedelta(hours=args.shift_hours)
-    cutoff = args.time
-    effective_cutoff = _add_minutes(cutoff, args.shift_hours * 60)
-    sampled = _sample_at_or_before(shifted, effective_cutoff)
-    if sampled.empty:
-        raise SystemExit("No rows found at/before sample cutoff — check the input CSV and --time/--shift-hours args.")
-    out_df = pd.DataFrame({
-        "date": sampled.index.tz_convert("UTC").date,
-        "trend": (sampled["close"] > sampled["ema_200"]).map({True: "Up", False: "Down"}),
-    })
-    out_df = out_df.drop_duplicates(subset=["date"]).sort_values("date")
-    out.parent.mkdir(parents=True, exist_ok=True)
-    out_df.to_csv(out, index=False)
+    with stage(f"trend_{args.resample}"):
+        out_df = trend_by_date(df["close"], args.resample, args.time, args.shift_hours)
+        if out_df.empty:
+            raise SystemExit("No rows found at/before sample cutoff — check the input CSV and --time/--shift-hours args.")
+        out.parent.mkdir(parents=True, exist_ok=True)
+        out_df.to_csv(out, index=False)
     print(f"✅ Saved trend file to: {out} (rows: {len(out_df)})")
 
 
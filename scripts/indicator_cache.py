@@ -0,0 +1,154 @@
+"""
+Persistent on-disk cache for SuperTrend indicator arrays.
+
+Entries are stored as .npy files under one directory per key and loaded memory-mapped on a hit.
+Keys combine a fingerprint of the exact bars fed to the indicator (timestamps + High/Low/Close,
+so date ranges, --max-rows and day filters are all covered) with st_length and st_multiplier.
+ATR is cached per length, so a new multiplier on known data only reruns the band recursion.
+Least-recently-used entries are evicted once the cache grows past its size budget.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from indicators import rma_values, supertrend_from_atr, true_range
+
+DEFAULT_CACHE_DIR = os.path.join("data", "cache", "indicators")
+DEFAULT_MAX_MB = 2048.0
+
+
+def data_fingerprint(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    index_ns: Optional[np.ndarray] = None,
+) -> str:
+    """Content hash of the bars an indicator is computed on (blake2b over the raw float64 bytes)."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(str(len(close)).encode())
+    for arr in (index_ns, high, low, close):
+        if arr is None:
+            h.update(b"-")
+            continue
+        h.update(np.ascontiguousarray(arr).view(np.uint8))
+    return h.hexdigest()
+
+
+class IndicatorCache:
+    """Directory-backed LRU cache of indicator arrays."""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_mb: float = DEFAULT_MAX_MB):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key)
+
+    @staticmethod
+    def make_key(kind: str, fingerprint: str, **params) -> str:
+        payload = json.dumps({"kind": kind, "data": fingerprint, **params}, sort_keys=True)
+        return f"{kind}_{hashlib.sha1(payload.encode()).hexdigest()[:24]}"
+
+    def get(self, key: str) -> Optional[Dict[str, np.ndarray]]:
+        """Return the entry's arrays memory-mapped read-only, or None on a miss."""
+        entry = self._entry_dir(key)
+        meta_path = os.path.join(entry, "meta.json")
+        if not os.path.exists(meta_path):
+            self.misses += 1
+            return None
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                meta = json.load(f)
+            arrays = {name: np.load(os.path.join(entry, f"{name}.npy"), mmap_mode="r") for name in meta["arrays"]}
+        except (OSError, ValueError, KeyError):
+            # Partially written or corrupted entry: drop it and recompute
+            shutil.rmtree(entry, ignore_errors=True)
+            self.misses += 1
+            return None
+        os.utime(meta_path)  # LRU clock
+        self.hits += 1
+        return arrays
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], **meta) -> None:
+        """Write an entry atomically (temp dir + rename), then enforce the size budget."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        final = self._entry_dir(key)
+        tmp = f"{final}.tmp{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, arr in arrays.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(arr))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"arrays": list(arrays), "created": time.time(), **meta}, f)
+        try:
+            os.replace(tmp, final)
+        except OSError:
+            # Another process won the race; keep its entry
+            shutil.rmtree(tmp, ignore_errors=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Delete least-recently-used entries until the cache fits in max_bytes."""
+        if not os.path.isdir(self.cache_dir):
+            return
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            entry = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry, "meta.json")
+            if not os.path.isfile(meta_path):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+            entries.append((os.path.getmtime(meta_path), size, entry))
+            total += size
+        for _, size, entry in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
+
+    def atr(self, fingerprint: str, high: np.ndarray, low: np.ndarray, close: np.ndarray, length: int) -> np.ndarray:
+        key = self.make_key("atr", fingerprint, st_length=int(length))
+        hit = self.get(key)
+        if hit is not None:
+            return hit["atr"]
+        atr = rma_values(true_range(high, low, close), length)
+        self.put(key, {"atr": atr}, st_length=int(length), bars=len(atr))
+        return atr
+
+    def supertrend(
+        self,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        length: int,
+        multiplier: float,
+        index_ns: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Cached (direction, supertrend, atr) for the given bars and parameters."""
+        high = np.asarray(high, dtype=float)
+        low = np.asarray(low, dtype=float)
+        close = np.asarray(close, dtype=float)
+        fp = data_fingerprint(high, low, close, index_ns)
+        key = self.make_key("supertrend", fp, st_length=int(length), st_multiplier=float(multiplier))
+        hit = self.get(key)
+        if hit is not None:
+            return hit["direction"], hit["supertrend"], hit["atr"]
+        atr = np.asarray(self.atr(fp, high, low, close, length))
+        direction, supertrend = supertrend_from_atr((high + low) / 2.0, close, atr, multiplier)
+        self.put(
+            key,
+            {"direction": direction, "supertrend": supertrend, "atr": atr},
+            st_length=int(length),
+            st_multiplier=float(multiplier),
+            bars=len(close),
+        )
+        return direction, supertrend, atr
@@ -0,0 +1,472 @@
+"""
+Array-native indicator kernels for the SuperTrend strategy.
+
+These mirror the pandas implementations that used to live in base_strategy.py bar-for-bar,
+but operate on plain NumPy float64 arrays so multi-million-row inputs avoid per-bar .iloc overhead.
+"""
+
+import math
+from typing import List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+def true_range(high: np.ndarray, low: np.ndarray, close: np.ndarray) -> np.ndarray:
+    """True Range; the first bar falls back to High-Low (no NaN from the missing prior close)."""
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    prev_close = np.empty_like(close)
+    prev_close[:1] = np.nan
+    prev_close[1:] = close[:-1]
+    # fmax skips NaN like DataFrame.max(axis=1, skipna=True)
+    return np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+
+
+def _sma_seed(values: np.ndarray, length: int) -> float:
+    """Mean of the first `length` values, accumulated exactly like pandas' rolling mean.
+
+    Uses the same Kahan-compensated running sum (and the constant-window shortcut) so the
+    RMA seed matches Series.rolling(length).mean() to the last bit.
+    """
+    window = values[:length]
+    if np.isnan(window).any():
+        return np.nan
+    sum_x = 0.0
+    compensation = 0.0
+    neg_ct = 0
+    for val in window.tolist():
+        y = val - compensation
+        t = sum_x + y
+        compensation = t - sum_x - y
+        sum_x = t
+        if val < 0:
+            neg_ct += 1
+    if bool((window == window[-1]).all()):
+        return float(window[-1])
+    result = sum_x / length
+    if neg_ct == 0 and result < 0:
+        return 0.0
+    if neg_ct == length and result > 0:
+        return 0.0
+    return result
+
+
+def rma_values(values: np.ndarray, length: int, exact: bool = False) -> np.ndarray:
+    """Pine RMA on a float array: EMA with alpha = 1/length, seeded by the SMA of the first `length` values.
+
+    The default path is vectorised: the SMA seed is spliced in front of the tail and run through
+    a seeded ewm(adjust=False), which agrees with the recursive form to within an ulp or so.
+    Pass exact=True for the per-bar recursion, bit-identical to the original Python loop.
+    NaN handling follows the recursion: NaN until the seed bar, and NaN from the first missing
+    value onward.
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    out = np.full(n, np.nan)
+    if n < length:
+        return out
+    alpha = 1.0 / length
+    seed = _sma_seed(values, length)
+    if exact:
+        beta = 1 - alpha
+        prev = seed
+        res = [prev]
+        for x in values[length:].tolist():
+            prev = alpha * x + beta * prev
+            res.append(prev)
+        out[length - 1:] = res
+        return out
+
+    tail = values[length - 1:].copy()
+    tail[0] = seed
+    out[length - 1:] = pd.Series(tail).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+    # ewm carries the last value over gaps; the recursion propagates NaN forever instead
+    missing = np.flatnonzero(np.isnan(tail))
+    if missing.size:
+        out[length - 1 + missing[0]:] = np.nan
+    return out
+
+
+def _supertrend_loop(
+    hl2: np.ndarray,
+    close: np.ndarray,
+    upper_raw: np.ndarray,
+    lower_raw: np.ndarray,
+    direction: np.ndarray,
+    supertrend: np.ndarray,
+    start: int,
+    end: int,
+    first_dir: float = math.nan,
+) -> None:
+    """Per-bar band recursion over the valid run [start, end); writes into direction/supertrend.
+
+    Reference implementation, used for runs containing NaN prices where the segment scan below
+    would not reproduce Python's max/min NaN semantics. first_dir, when given, is the known
+    direction of bar start (whose bands are then already clamped) instead of seeding it.
+    """
+    upper = upper_raw[start:end].tolist()
+    lower = lower_raw[start:end].tolist()
+    c = close[start:end].tolist()
+    mid = hl2[start:end].tolist()
+    m = end - start
+    dirs = [0.0] * m
+    line = [0.0] * m
+
+    prev_dir = 0.0
+    first = 0
+    if first_dir == first_dir:
+        prev_dir = dirs[0] = first_dir
+        line[0] = lower[0] if first_dir == 1 else upper[0]
+        first = 1
+    for i in range(first, m):
+        if prev_dir == 1:
+            lower[i] = max(lower[i], lower[i - 1])
+            if c[i] < lower[i]:
+                prev_dir = -1.0
+                line[i] = upper[i]
+            else:
+                line[i] = lower[i]
+        elif prev_dir == -1:
+            upper[i] = min(upper[i], upper[i - 1])
+            if c[i] > upper[i]:
+                prev_dir = 1.0
+                line[i] = lower[i]
+            else:
+                line[i] = upper[i]
+        else:
+            # Seed direction based on where close sits relative to hl2
+            if c[i] >= mid[i]:
+                prev_dir = 1.0
+                line[i] = lower[i]
+            else:
+                prev_dir = -1.0
+                line[i] = upper[i]
+        dirs[i] = prev_dir
+    direction[start:end] = dirs
+    supertrend[start:end] = line
+
+
+def _supertrend_segments(
+    hl2: np.ndarray,
+    close: np.ndarray,
+    upper_raw: np.ndarray,
+    lower_raw: np.ndarray,
+    direction: np.ndarray,
+    supertrend: np.ndarray,
+    start: int,
+    end: int,
+    first_dir: float = math.nan,
+) -> None:
+    """Band recursion over the valid run [start, end), one trend segment at a time.
+
+    Within an up segment the clamped lower band is the running max of the raw lower band since
+    the segment's first bar, and the trend flips on the first close below it (mirror image for
+    down segments). Each segment is therefore a cummax/cummin plus a first-crossing search in
+    NumPy, giving the same values as the per-bar loop without touching bars one by one.
+    """
+    i = start
+    if first_dir == first_dir:
+        side = first_dir
+    else:
+        side = 1.0 if close[i] >= hl2[i] else -1.0
+    while i < end:
+        # Find the first bar after i where the trend flips, growing the window as needed
+        j = end
+        w = 256
+        while True:
+            stop = min(end, i + w)
+            if side == 1.0:
+                band = np.maximum.accumulate(lower_raw[i:stop])
+                hit = np.flatnonzero(close[i + 1:stop] < band[1:])
+            else:
+                band = np.minimum.accumulate(upper_raw[i:stop])
+                hit = np.flatnonzero(close[i + 1:stop] > band[1:])
+            if hit.size:
+                j = i + 1 + int(hit[0])
+                break
+            if stop == end:
+                break
+            w *= 2
+        direction[i:j] = side
+        supertrend[i:j] = band[: j - i]
+        # The flip bar opens the opposite segment, whose band starts unclamped
+        side = -side
+        i = j
+
+
+def _supertrend_runs(
+    hl2: np.ndarray,
+    close: np.ndarray,
+    atr: np.ndarray,
+    upper_raw: np.ndarray,
+    lower_raw: np.ndarray,
+    first_dir: float = math.nan,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Apply the band recursion to each contiguous run of bars with a valid ATR.
+
+    first_dir continues an earlier run: bar 0 is then that run's last bar, with its direction and
+    (clamped) bands given, rather than a first bar without a direction.
+    """
+    n = len(close)
+    direction = np.full(n, np.nan)
+    supertrend = np.full(n, np.nan)
+    valid = ~np.isnan(atr)
+    if n and first_dir != first_dir:
+        valid[0] = False  # the first bar never has a direction
+    edges = np.flatnonzero(np.diff(np.r_[0, valid.astype(np.int8), 0]))
+    for start, end in zip(edges[::2].tolist(), edges[1::2].tolist()):
+        clean = not (
+            np.isnan(close[start:end]).any()
+            or np.isnan(upper_raw[start:end]).any()
+            or np.isnan(lower_raw[start:end]).any()
+        )
+        kernel = _supertrend_segments if clean else _supertrend_loop
+        kernel(hl2, close, upper_raw, lower_raw, direction, supertrend, start, end, first_dir if start == 0 else math.nan)
+    return direction, supertrend
+
+
+def supertrend_from_atr(
+    hl2: np.ndarray,
+    close: np.ndarray,
+    atr: np.ndarray,
+    multiplier: float,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Run the SuperTrend band recursion given a precomputed ATR.
+
+    Returns (direction, supertrend) as float arrays (+1/-1, NaN during warm-up).
+    """
+    hl2 = np.asarray(hl2, dtype=float)
+    close = np.asarray(close, dtype=float)
+    atr = np.asarray(atr, dtype=float)
+    return _supertrend_runs(hl2, close, atr, hl2 + multiplier * atr, hl2 - multiplier * atr)
+
+
+def supertrend_arrays(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    length: int,
+    multiplier: float,
+    exact: bool = False,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """SuperTrend direction (+1/-1) and line from raw High/Low/Close arrays, ATR via RMA.
+
+    exact=True uses the recursive RMA so the bands match the legacy pandas loop bit-for-bit.
+    Returns (direction, supertrend).
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    hl2 = (high + low) / 2.0
+    atr = rma_values(true_range(high, low, close), length, exact=exact)
+    return supertrend_from_atr(hl2, close, atr, multiplier)
+
+
+class SuperTrendCarry(NamedTuple):
+    """What supertrend_arrays' recursion carries past one bar, to continue it on appended bars."""
+
+    close: float
+    atr: float
+    direction: float
+    upper: float  # band as the recursion holds it (clamped on the side of the current trend)
+    lower: float
+
+
+def supertrend_carry(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    length: int,
+    multiplier: float,
+    direction: np.ndarray,
+    supertrend: np.ndarray,
+    pos: int,
+) -> SuperTrendCarry:
+    """Carry at bar pos of a supertrend_arrays(high, low, close, length, multiplier) result."""
+    atr = rma_values(true_range(high[: pos + 1], low[: pos + 1], close[: pos + 1]), length)[pos]
+    return carry_at(high, low, close, atr, multiplier, direction, supertrend, pos)
+
+
+def carry_at(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    atr: float,
+    multiplier: float,
+    direction: np.ndarray,
+    supertrend: np.ndarray,
+    pos: int,
+) -> SuperTrendCarry:
+    """Carry at bar pos given that bar's ATR."""
+    hl2 = (high[pos] + low[pos]) / 2.0
+    upper, lower = hl2 + multiplier * atr, hl2 - multiplier * atr
+    d = float(direction[pos])
+    if d == 1:
+        lower = supertrend[pos]
+    elif d == -1:
+        upper = supertrend[pos]
+    return SuperTrendCarry(float(close[pos]), float(atr), d, float(upper), float(lower))
+
+
+def supertrend_continue(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    length: int,
+    multiplier: float,
+    carry: SuperTrendCarry,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """supertrend_arrays over bars appended after the carry's bar, bit-identical to a full re-run.
+
+    The ATR continues the same seeded ewm(adjust=False) (whose only state is the previous value)
+    and the band recursion resumes from the carried direction and bands. The carry must be past
+    the RMA warm-up. Returns (direction, supertrend, atr) for the appended bars.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n = len(close)
+    if n == 0:
+        return np.zeros(0), np.zeros(0), np.zeros(0)
+    prev_close = np.empty(n)
+    prev_close[0] = carry.close
+    prev_close[1:] = close[:-1]
+    tr = np.fmax(np.fmax(high - low, np.abs(high - prev_close)), np.abs(low - prev_close))
+    tail = np.concatenate(([carry.atr], tr))
+    atr = pd.Series(tail).ewm(alpha=1.0 / length, adjust=False).mean().to_numpy()
+    missing = np.flatnonzero(np.isnan(tail))
+    if missing.size:
+        atr[missing[0]:] = np.nan
+    hl2 = (high + low) / 2.0
+    upper = np.concatenate(([carry.upper], hl2 + multiplier * atr[1:]))
+    lower = np.concatenate(([carry.lower], hl2 - multiplier * atr[1:]))
+    hl2 = np.concatenate(([math.nan], hl2))
+    close = np.concatenate(([carry.close], close))
+    direction, supertrend = _supertrend_runs(hl2, close, atr, upper, lower, first_dir=carry.direction)
+    return direction[1:], supertrend[1:], atr[1:]
+
+
+def supertrend_grid_arrays(
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    lengths: Sequence[int],
+    multipliers: Sequence[float],
+) -> Tuple[List[Tuple[int, float]], np.ndarray, np.ndarray]:
+    """SuperTrend for every (length, multiplier) pair from a single TR pass.
+
+    True Range and hl2 are computed once and the ATR once per length; all multipliers for a
+    length then share one (bars x multipliers) band array before the band recursion runs per
+    column. Each column matches supertrend_arrays() for the same pair. Output is
+    (configs, direction, supertrend) with (bars x configs) matrices in configs order, so memory
+    is 16 bytes per bar per config — chunk the grid for very large inputs.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    lengths = [int(x) for x in lengths]
+    mults = np.asarray([float(x) for x in multipliers], dtype=float)
+    configs = [(ln, float(m)) for ln in lengths for m in mults]
+    n = len(close)
+
+    hl2 = (high + low) / 2.0
+    tr = true_range(high, low, close)
+    direction = np.full((n, len(configs)), np.nan)
+    supertrend = np.full((n, len(configs)), np.nan)
+    col = 0
+    for ln in lengths:
+        atr = rma_values(tr, ln)
+        # (multipliers x bars) so each config's band row is contiguous for the segment scan
+        offset = mults[:, None] * atr[None, :]
+        upper = hl2[None, :] + offset
+        lower = hl2[None, :] - offset
+        for k in range(len(mults)):
+            d, st = _supertrend_runs(hl2, close, atr, upper[k], lower[k])
+            direction[:, col] = d
+            supertrend[:, col] = st
+            col += 1
+    return configs, direction, supertrend
+
+
+class SuperTrendState:
+    """Incremental SuperTrend for live feeds: O(1) time and memory per bar.
+
+    Holds the RMA accumulator, the previous (clamped) bands, the previous close and direction.
+    Feeding bars one at a time through update() reproduces supertrend_arrays(..., exact=True)
+    bar-for-bar; the vectorised default differs from it only by float rounding in the ATR.
+    """
+
+    def __init__(self, length: int = 10, multiplier: float = 3.6):
+        if length < 1:
+            raise ValueError(f"length must be >= 1, got {length}")
+        self.length = int(length)
+        self.multiplier = float(multiplier)
+        self.bars_seen = 0
+        self.atr = math.nan
+        self.direction = math.nan
+        self.supertrend = math.nan
+        self._alpha = 1.0 / self.length
+        self._beta = 1 - self._alpha
+        self._seed_buffer: List[float] = []  # TR values until the SMA seed bar, then emptied
+        self._prev_close = math.nan
+        self._prev_upper = math.nan
+        self._prev_lower = math.nan
+
+    def update(self, bar) -> Tuple[float, float]:
+        """Consume one bar (mapping with High/Low/Close) and return (direction, supertrend)."""
+        high = float(bar["High"])
+        low = float(bar["Low"])
+        close = float(bar["Close"])
+        i = self.bars_seen
+
+        tr = high - low
+        if i > 0:
+            # NaN-skipping max, matching true_range()
+            for cand in (abs(high - self._prev_close), abs(low - self._prev_close)):
+                if tr != tr or cand > tr:
+                    tr = cand
+
+        if i < self.length - 1:
+            self._seed_buffer.append(tr)
+        elif i == self.length - 1:
+            self._seed_buffer.append(tr)
+            self.atr = _sma_seed(np.array(self._seed_buffer, dtype=float), self.length)
+            self._seed_buffer = []
+        else:
+            self.atr = self._alpha * tr + self._beta * self.atr
+
+        hl2 = (high + low) / 2.0
+        upper = hl2 + self.multiplier * self.atr
+        lower = hl2 - self.multiplier * self.atr
+
+        prev_dir = self.direction
+        if i == 0 or self.atr != self.atr:
+            direction = supertrend = math.nan
+        elif prev_dir == 1:
+            lower = max(lower, self._prev_lower)
+            if close < lower:
+                direction, supertrend = -1.0, upper
+            else:
+                direction, supertrend = 1.0, lower
+        elif prev_dir == -1:
+            upper = min(upper, self._prev_upper)
+            if close > upper:
+                direction, supertrend = 1.0, lower
+            else:
+                direction, supertrend = -1.0, upper
+        else:
+            # Seed direction based on where close sits relative to hl2
+            if close >= hl2:
+                direction, supertrend = 1.0, lower
+            else:
+                direction, supertrend = -1.0, upper
+
+        self._prev_close = close
+        self._prev_upper = upper
+        self._prev_lower = lower
+        self.direction = direction
+        self.supertrend = supertrend
+        self.bars_seen = i + 1
+        return direction, supertrend
@@ -0,0 +1,63 @@
+"""
+Trade-list summary metrics shared by the sweep / walk-forward runners and reports.
+
+Definitions follow the performance summary printed by base_strategy.py: profit factor is gross
+gain over |gross loss|, max drawdown is the lowest point of the pip equity curve below its
+running peak, and Sharpe is per trade, annualised by sqrt(trades per year).
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from calendar_index import NS_PER_DAY
+
+METRIC_COLUMNS = [
+    "trades",
+    "win_rate",
+    "total_pips",
+    "avg_pips",
+    "profit_factor",
+    "max_drawdown",
+    "sharpe",
+    "sharpe_annual",
+]
+
+
+def trade_metrics(pips: np.ndarray, entry_ns: Optional[np.ndarray] = None) -> dict:
+    """Summary metrics for one trade list (pips in trade order; entry_ns for the annualised Sharpe)."""
+    pips = np.asarray(pips, dtype=float)
+    n = len(pips)
+    if n == 0:
+        return {
+            "trades": 0,
+            "win_rate": math.nan,
+            "total_pips": 0.0,
+            "avg_pips": math.nan,
+            "profit_factor": math.nan,
+            "max_drawdown": math.nan,
+            "sharpe": math.nan,
+            "sharpe_annual": math.nan,
+        }
+    gross_gain = pips[pips > 0].sum()
+    gross_loss = pips[pips < 0].sum()
+    equity = np.cumsum(pips)
+    avg = pips.mean()
+    std = pips.std(ddof=1) if n > 1 else math.nan
+    sharpe = avg / std if std and std > 0 else math.nan
+    sharpe_annual = math.nan
+    if entry_ns is not None and np.isfinite(sharpe):
+        days = (int(entry_ns[-1]) - int(entry_ns[0])) // NS_PER_DAY
+        years = max(days / 365.25, 1e-9)
+        sharpe_annual = sharpe * math.sqrt(n / years)
+    return {
+        "trades": n,
+        "win_rate": float((pips > 0).sum() / n),
+        "total_pips": float(pips.sum()),
+        "avg_pips": float(avg),
+        "profit_factor": float(gross_gain / abs(gross_loss)) if gross_loss != 0 else math.inf,
+        "max_drawdown": float((equity - np.maximum.accumulate(equity)).min()),
+        "sharpe": float(sharpe),
+        "sharpe_annual": float(sharpe_annual),
+    }
@@ -0,0 +1,126 @@
+"""
+Monte Carlo bootstrap of a backtest's trade sequence.
+
+Resamples the `pips` column of a trades CSV (from base_strategy.py) with replacement, either
+trade-by-trade or in moving blocks that keep streaks together, as one (sims x trades) matrix.
+Equity curves, max drawdown, profit factor and final equity for every simulation then come from
+vectorised cumsum / running-max over that matrix (processed in row chunks to bound memory).
+
+Example:
+    python scripts/monte_carlo.py --trades-csv results/trends/1m/trades.csv --sims 100000 --block-size 5
+"""
+
+import math
+import os
+import sys
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+PERCENTILES = (1, 5, 25, 50, 75, 95, 99)
+DEFAULT_DD_LIMIT = 2500.0  # DeploymentConfig.MAX_ACCEPTABLE_DD (pips)
+
+
+def bootstrap_indices(n_trades: int, sims: int, rng: np.random.Generator, block_size: int = 1) -> np.ndarray:
+    """(sims, n_trades) trade indices; block_size > 1 draws circular moving blocks of consecutive trades."""
+    if block_size <= 1:
+        return rng.integers(0, n_trades, size=(sims, n_trades))
+    n_blocks = -(-n_trades // block_size)
+    starts = rng.integers(0, n_trades, size=(sims, n_blocks, 1))
+    idx = (starts + np.arange(block_size)) % n_trades
+    return idx.reshape(sims, n_blocks * block_size)[:, :n_trades]
+
+
+def simulate(
+    pips: np.ndarray,
+    sims: int = 10_000,
+    block_size: int = 1,
+    seed: Optional[int] = None,
+    chunk_rows: Optional[int] = None,
+) -> Dict[str, np.ndarray]:
+    """Per-simulation final_equity, max_drawdown (<= 0, pips below running peak) and profit_factor."""
+    pips = np.asarray(pips, dtype=float)
+    pips = pips[~np.isnan(pips)]
+    n = len(pips)
+    if n == 0:
+        raise ValueError("No trades with pips to resample.")
+    rng = np.random.default_rng(seed)
+    # ~64 MB of float64 per chunk
+    chunk_rows = chunk_rows or max(1, (8 * 1024 * 1024) // n)
+
+    out = {name: np.empty(sims) for name in ("final_equity", "max_drawdown", "profit_factor")}
+    for lo in range(0, sims, chunk_rows):
+        hi = min(sims, lo + chunk_rows)
+        paths = pips[bootstrap_indices(n, hi - lo, rng, block_size)]
+        gains = np.where(paths > 0, paths, 0.0).sum(axis=1)
+        losses = np.where(paths < 0, -paths, 0.0).sum(axis=1)
+        np.cumsum(paths, axis=1, out=paths)  # paths -> equity curves in place
+        out["final_equity"][lo:hi] = paths[:, -1]
+        out["max_drawdown"][lo:hi] = (paths - np.maximum.accumulate(paths, axis=1)).min(axis=1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["profit_factor"][lo:hi] = np.where(losses > 0, gains / losses, math.inf)
+    return out
+
+
+def summarize(dist: Dict[str, np.ndarray], dd_limit: float = DEFAULT_DD_LIMIT) -> pd.DataFrame:
+    """One row per metric: mean and percentiles, plus tail probabilities as extra rows."""
+    rows = []
+    for name, values in dist.items():
+        finite = values[np.isfinite(values)]
+        row = {"metric": name, "mean": finite.mean() if len(finite) else math.nan}
+        for p, v in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+            row[f"p{p}"] = v
+        rows.append(row)
+    probs = {
+        f"P(max_drawdown < -{dd_limit:g})": float((dist["max_drawdown"] < -dd_limit).mean()),
+        "P(final_equity < 0)": float((dist["final_equity"] < 0).mean()),
+        "P(profit_factor < 1)": float((dist["profit_factor"] < 1).mean()),
+    }
+    rows.extend({"metric": k, "mean": v} for k, v in probs.items())
+    return pd.DataFrame(rows, columns=["metric", "mean"] + [f"p{p}" for p in PERCENTILES])
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Monte Carlo bootstrap of a trades CSV's pips sequence.")
+    parser.add_argument("--trades-csv", required=True, help="Trades CSV with a 'pips' column (e.g. results/trends/1m/trades.csv)")
+    parser.add_argument("--sims", type=int, default=10_000, help="Number of resampled trade sequences (default: 10000)")
+    parser.add_argument("--block-size", type=int, default=1, help="Moving-block length; 1 = plain i.i.d. bootstrap")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--dd-limit", type=float, default=DEFAULT_DD_LIMIT, help=f"Drawdown limit in pips for the tail probability (default: {DEFAULT_DD_LIMIT:g})")
+    parser.add_argument("--out-csv", default=None, help="Summary CSV (default: <trades>_montecarlo.csv next to the input)")
+    parser.add_argument("--save-sims", action="store_true", help="Also write the per-simulation distributions (<out>_sims.csv)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.trades_csv):
+        raise SystemExit(f"Trades CSV not found: {args.trades_csv}")
+    trades = pd.read_csv(args.trades_csv)
+    if "pips" not in trades.columns:
+        raise SystemExit(f"{args.trades_csv} has no 'pips' column")
+    pips = trades["pips"].to_numpy(dtype=float)
+
+    t0 = time.perf_counter()
+    try:
+        dist = simulate(pips, sims=args.sims, block_size=args.block_size, seed=args.seed)
+    except ValueError as e:
+        raise SystemExit(str(e))
+    elapsed = time.perf_counter() - t0
+    summary = summarize(dist, args.dd_limit)
+
+    out_csv = args.out_csv or f"{os.path.splitext(args.trades_csv)[0]}_montecarlo.csv"
+    os.makedirs(os.path.dirname(out_csv) or ".", exist_ok=True)
+    summary.to_csv(out_csv, index=False)
+    print(f"{args.sims} simulations x {int((~np.isnan(pips)).sum())} trades (block size {args.block_size}) in {elapsed:.2f}s")
+    print(summary.to_string(index=False))
+    print(f"Saved Monte Carlo summary to: {out_csv}")
+    if args.save_sims:
+        sims_csv = f"{os.path.splitext(out_csv)[0]}_sims.csv"
+        pd.DataFrame(dist).to_csv(sims_csv, index=False)
+        print(f"Saved per-simulation results to: {sims_csv}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
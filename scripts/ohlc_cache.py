@@ -0,0 +1,220 @@
+"""
+Columnar binary cache of a 1-minute OHLC CSV.
+
+The first load parses the CSV once and writes one .npy file per column next to a meta.json
+(timestamps as int64 epoch nanoseconds UTC, OHLC as float64 or optionally float32). Later loads
+read those columns directly, skipping CSV tokenising and timestamp string parsing. The entry is
+rebuilt automatically when the source CSV's size or mtime changes.
+
+For time-sorted files the entry also holds a sparse index (every INDEX_STRIDE-th timestamp), so
+load_ohlc_range() can memory-map the columns and return a date range as views over the mapped
+pages: two binary searches instead of a parse, a mask and a copy. Only the range's pages are
+read, and concurrent processes share them through the OS page cache.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_OHLC_CACHE_DIR = os.path.join("data", "cache", "ohlc")
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+FORMAT_VERSION = 2  # 2: sparse timestamp index + sorted flag
+INDEX_STRIDE = 4096
+_UTC_NS = pd.DatetimeTZDtype("ns", "UTC")
+
+
+def utc_times(ts_ns: np.ndarray):
+    """tz-aware UTC datetimes over an int64 epoch-ns buffer, without copying where pandas allows."""
+    values = ts_ns.view("M8[ns]")
+    try:
+        return pd.arrays.DatetimeArray._simple_new(values, dtype=_UTC_NS)
+    except (AttributeError, TypeError):
+        return pd.array(values).tz_localize("UTC")
+
+
+def _entry_dir(csv_path: str, cache_dir: str, float32: bool) -> str:
+    src = os.path.abspath(csv_path)
+    stem = os.path.splitext(os.path.basename(src))[0]
+    digest = hashlib.sha1(src.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{stem}_{digest}{'_f32' if float32 else ''}")
+
+
+def _source_stamp(csv_path: str) -> dict:
+    st = os.stat(csv_path)
+    return {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def _read_meta(entry: str, stamp: dict) -> Optional[dict]:
+    meta_path = os.path.join(entry, "meta.json")
+    if not os.path.exists(meta_path):
+        return None
+    try:
+        with open(meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get("source_size") != stamp["size"] or meta.get("source_mtime_ns") != stamp["mtime_ns"]:
+        return None  # source changed since the cache was built
+    if meta.get("format") != FORMAT_VERSION:
+        return None  # written by an older version; rebuilt once
+    return meta
+
+
+def _frame(entry: str, meta: dict, rows: slice = slice(None), mmap: bool = False) -> pd.DataFrame:
+    """The entry's columns (optionally a row slice of memory-mapped columns) as a DataFrame."""
+    data = {}
+    for i, col in enumerate(meta["columns"]):
+        arr = np.load(os.path.join(entry, f"c{i}.npy"), mmap_mode="r" if mmap else None)[rows]
+        if col == meta["timestamp_col"]:
+            data[col] = utc_times(arr)
+        else:
+            data[col] = arr
+    return pd.DataFrame(data, copy=False)
+
+
+def _read_entry(entry: str, stamp: dict) -> Optional[pd.DataFrame]:
+    meta = _read_meta(entry, stamp)
+    if meta is None:
+        return None
+    try:
+        return _frame(entry, meta)
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def _write_entry(entry: str, df: pd.DataFrame, stamp: dict, timestamp_col: str) -> None:
+    parent = os.path.dirname(entry)
+    os.makedirs(parent, exist_ok=True)
+    tmp = f"{entry}.tmp{os.getpid()}"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for i, col in enumerate(df.columns):
+        values = df[col]
+        if col == timestamp_col:
+            arr = np.asarray(values.dt.tz_convert("UTC").dt.tz_localize(None), dtype="datetime64[ns]").view(np.int64)
+            ts_sorted = bool(np.all(arr[1:] >= arr[:-1]))
+            np.save(os.path.join(tmp, "index.npy"), arr[::INDEX_STRIDE])
+        else:
+            arr = values.to_numpy()
+        np.save(os.path.join(tmp, f"c{i}.npy"), arr)
+    meta = {
+        "format": FORMAT_VERSION,
+        "columns": list(df.columns),
+        "timestamp_col": timestamp_col,
+        "sorted": ts_sorted,
+        "index_stride": INDEX_STRIDE,
+        "rows": len(df),
+        "source_size": stamp["size"],
+        "source_mtime_ns": stamp["mtime_ns"],
+        "created": time.time(),
+    }
+    with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    shutil.rmtree(entry, ignore_errors=True)
+    try:
+        os.replace(tmp, entry)
+    except OSError:
+        # Another process rebuilt it concurrently; keep theirs
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+def load_ohlc(
+    csv_path: str,
+    cache_dir: Optional[str] = DEFAULT_OHLC_CACHE_DIR,
+    float32: bool = False,
+    timestamp_col: str = "timestamp",
+) -> pd.DataFrame:
+    """Load an OHLC CSV, via the columnar cache when cache_dir is set.
+
+    Returns the CSV's columns in file order with the timestamp column parsed to UTC datetimes.
+    With float32=True the price columns are stored and returned as float32.
+    Falls back to a plain read (no cache written) if the file has non-numeric data columns.
+    """
+    if not cache_dir:
+        return pd.read_csv(csv_path)
+
+    entry = _entry_dir(csv_path, cache_dir, float32)
+    stamp = _source_stamp(csv_path)
+    cached = _read_entry(entry, stamp)
+    if cached is not None:
+        return cached
+
+    df = pd.read_csv(csv_path)
+    if timestamp_col not in df.columns:
+        return df
+    data_cols = [c for c in df.columns if c != timestamp_col]
+    if any(not pd.api.types.is_numeric_dtype(df[c]) for c in data_cols):
+        return df
+    df[timestamp_col] = pd.to_datetime(df[timestamp_col], utc=True)
+    for col in data_cols:
+        if col in PRICE_COLUMNS:
+            df[col] = df[col].astype(np.float32 if float32 else np.float64)
+    _write_entry(entry, df, stamp, timestamp_col)
+    return df
+
+
+def date_bounds_ns(date_start: Optional[str] = None, date_end: Optional[str] = None) -> Tuple[Optional[int], Optional[int]]:
+    """[date_start, date_end + 1 day) as epoch ns (end date inclusive; naive dates are UTC, None = open)."""
+
+    def utc(value: str) -> pd.Timestamp:
+        ts = pd.Timestamp(value)
+        return ts.tz_localize("UTC") if ts.tzinfo is None else ts.tz_convert("UTC")
+
+    lo = utc(date_start).value if date_start else None
+    hi = (utc(date_end) + pd.Timedelta(days=1)).value if date_end else None
+    return lo, hi
+
+
+def _search(ts: np.ndarray, index: np.ndarray, stride: int, value: int, side: str) -> int:
+    """np.searchsorted(ts, value, side) reading only the index and one stride of ts."""
+    k = int(np.searchsorted(index, value, side))
+    base = max(k - 1, 0) * stride
+    return base + int(np.searchsorted(ts[base : min(k * stride, len(ts))], value, side))
+
+
+def load_ohlc_range(
+    csv_path: str,
+    cache_dir: Optional[str] = DEFAULT_OHLC_CACHE_DIR,
+    date_start: Optional[str] = None,
+    date_end: Optional[str] = None,
+    float32: bool = False,
+    timestamp_col: str = "timestamp",
+) -> pd.DataFrame:
+    """load_ohlc restricted to date_start <= date <= date_end (UTC calendar dates, end inclusive).
+
+    With the cache, the result's columns are read-only views into the memory-mapped entry, so
+    only the selected rows' pages are read. Without a usable cache (cache_dir None, non-numeric
+    columns, unsorted timestamps) the file is loaded in full and masked.
+    """
+    lo, hi = date_bounds_ns(date_start, date_end)
+    df = meta = None
+    if cache_dir:
+        entry = _entry_dir(csv_path, cache_dir, float32)
+        stamp = _source_stamp(csv_path)
+        meta = _read_meta(entry, stamp)
+        if meta is None:
+            df = load_ohlc(csv_path, cache_dir, float32, timestamp_col)  # builds the entry
+            meta = _read_meta(entry, stamp)
+    if meta is None or not meta["sorted"] or meta["timestamp_col"] != timestamp_col:
+        if df is None:
+            df = load_ohlc(csv_path, cache_dir, float32, timestamp_col)
+        ts = pd.to_datetime(df[timestamp_col], utc=True)
+        mask = np.ones(len(df), dtype=bool)
+        if lo is not None:
+            mask &= (ts >= pd.Timestamp(lo, tz="UTC")).to_numpy()
+        if hi is not None:
+            mask &= (ts < pd.Timestamp(hi, tz="UTC")).to_numpy()
+        return df.loc[mask].reset_index(drop=True)
+
+    ts_path = os.path.join(entry, f"c{meta['columns'].index(timestamp_col)}.npy")
+    ts = np.load(ts_path, mmap_mode="r")
+    index = np.load(os.path.join(entry, "index.npy"))
+    start = 0 if lo is None else _search(ts, index, meta["index_stride"], lo, "left")
+    stop = len(ts) if hi is None else _search(ts, index, meta["index_stride"], hi, "left")
+    return _frame(entry, meta, slice(start, max(start, stop)), mmap=True)
@@ -0,0 +1,165 @@
+"""
+Day-partitioned parallel run of the array engine, stitched to match the serial engine exactly.
+
+SuperTrend and the entry schedule targets are computed once over the whole history, so every
+chunk starts from the correct indicator state. The bars are split into chunks on UTC day
+boundaries and each chunk runs in a worker process as if flat with nothing pending (only the
+carried-forward ST is seeded). A sequential stitching pass then walks the chunks in order: when
+the true state at a chunk edge is flat and idle, the chunk's speculative trades are exact; when a
+position or pending entry carries over, the serial engine is re-run from that state only until it
+and the speculative run are both idle at the same bar, after which their trades coincide.
+Positions usually close within a day, so the re-runs are a few hundred bars per edge.
+
+Used by backtest_supertrend when StrategyConfig.workers > 1 (--workers on the CLI).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backtest_engine import (
+    BarArrays,
+    EngineInputs,
+    EngineState,
+    carried_supertrend,
+    engine_inputs,
+    run_engine_span,
+)
+from calendar_index import CalendarIndex
+from shared_arrays import SharedArrays
+from trade_table import TradeTable
+
+MIN_CHUNK_BARS = 50_000  # smaller chunks cost more in process overhead than they save
+_RERUN_WINDOW = 4096  # first stitch re-run window, doubled until the runs sync
+
+
+def day_chunks(ts_ns: np.ndarray, chunks: int) -> List[int]:
+    """Chunk edges [1, b1, ..., n] at the first bar of UTC days, roughly equal in bar count."""
+    n = len(ts_ns)
+    day_start = CalendarIndex.from_ns(ts_ns).day_start
+    edges = [1]
+    for k in range(1, chunks):
+        j = np.searchsorted(day_start, k * n // chunks)
+        if j < len(day_start) and edges[-1] < day_start[j] < n:
+            edges.append(int(day_start[j]))
+    edges.append(n)
+    return edges
+
+
+def _inputs_from_shared(arrays: Dict[str, np.ndarray]) -> EngineInputs:
+    return EngineInputs(**{f: arrays.get(f) for f in EngineInputs._fields})
+
+
+_WORKER: Dict[str, object] = {}
+
+
+def _init_worker(spec: Tuple[str, list], max_sl_distance_pips: float, pip_size: float, record_rejected: bool) -> None:
+    shared = SharedArrays.attach(*spec)
+    _WORKER["shared"] = shared
+    _WORKER["inputs"] = _inputs_from_shared(shared.arrays)
+    _WORKER["params"] = (max_sl_distance_pips, pip_size, record_rejected)
+
+
+def _run_chunk(inputs: EngineInputs, params: tuple, start: int, stop: int, prev_st: float):
+    max_sl_distance_pips, pip_size, record_rejected = params
+    busy: list = []
+    res = run_engine_span(
+        inputs, max_sl_distance_pips, pip_size, start, stop, EngineState(prev_st=prev_st), record_rejected, busy_spans=busy
+    )
+    return res.trades, res.state, busy
+
+
+def _run_chunk_task(task: Tuple[int, int, float]):
+    return _run_chunk(_WORKER["inputs"], _WORKER["params"], *task)
+
+
+def _emitted_from(trades: TradeTable, ts_ns: int) -> TradeTable:
+    """Rows the engine emitted on or after the bar at ts_ns (exit bar, or entry bar for a rejection).
+
+    Rows are in emission order, so these are a suffix of the table.
+    """
+    event_ns = np.where(trades.column("passed"), trades.column("exit_ns"), trades.column("entry_ns"))
+    first = int(np.searchsorted(event_ns, ts_ns, "left"))
+    tail = TradeTable(len(trades) - first)
+    tail.extend(**{name: col[first:] for name, col in trades.columns().items()})
+    return tail
+
+
+def stitch_chunks(
+    inputs: EngineInputs,
+    edges: Sequence[int],
+    chunk_results: Sequence[tuple],
+    max_sl_distance_pips: float,
+    pip_size: float,
+    record_rejected: bool = False,
+) -> TradeTable:
+    """Combine speculative chunk runs into the serial engine's trades (see module docstring)."""
+    pieces: List[TradeTable] = []
+    state: Optional[EngineState] = None
+    for k, (spec_trades, spec_state, spec_busy) in enumerate(chunk_results):
+        start, stop = edges[k], edges[k + 1]
+        if state is None or state.idle:
+            pieces.append(spec_trades)
+            state = spec_state
+            continue
+        # Speculative run idle at the end of bar start - 1 + j
+        spec_idle = np.ones(stop - start + 1, dtype=bool)
+        for first, end in spec_busy:
+            spec_idle[first - start + 1 : end - start + 1] = False
+        pos, window = start, _RERUN_WINDOW
+        while True:
+            hi = min(pos + window, stop)
+            res = run_engine_span(
+                inputs, max_sl_distance_pips, pip_size, pos, hi, state, record_rejected,
+                sync_idle=spec_idle[pos - start : hi - start + 1],
+            )
+            pieces.append(res.trades)
+            if res.stop < hi:
+                # Both runs idle before bar res.stop: the speculative trades from there on are exact
+                pieces.append(_emitted_from(spec_trades, int(inputs.ts_ns[res.stop])))
+                state = spec_state
+                break
+            state = res.state
+            if hi == stop:
+                break
+            pos, window = hi, window * 2
+    return TradeTable.concat(pieces)
+
+
+def run_supertrend_parallel(
+    bars: BarArrays,
+    in_hours: np.ndarray,
+    allowed_sides: Optional[set],
+    max_sl_distance_pips: float,
+    pip_size: float,
+    entry_ok: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    record_rejected: bool = False,
+    workers: int = 2,
+    chunks: Optional[int] = None,
+) -> TradeTable:
+    """Same trades as run_supertrend_trades, computed over day-aligned chunks in a process pool.
+
+    chunks defaults to one per worker (fewer when chunks would drop below MIN_CHUNK_BARS).
+    """
+    n = len(bars.ts_ns)
+    if n < 2:
+        return TradeTable()
+    inputs = engine_inputs(bars, in_hours, allowed_sides, entry_ok)
+    chunks = chunks or min(workers, max(1, n // MIN_CHUNK_BARS))
+    edges = day_chunks(bars.ts_ns, chunks)
+    stv, _ = carried_supertrend(bars.supertrend)
+    tasks = [(edges[k], edges[k + 1], float(stv[edges[k] - 1])) for k in range(len(edges) - 1)]
+    params = (max_sl_distance_pips, pip_size, record_rejected)
+
+    if workers <= 1 or len(tasks) <= 1:
+        results = [_run_chunk(inputs, params, *t) for t in tasks]
+    else:
+        arrays = {f: np.ascontiguousarray(a) for f, a in inputs._asdict().items() if a is not None}
+        shared = SharedArrays.create(arrays)
+        try:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared.spec(), *params)) as pool:
+                results = list(pool.map(_run_chunk_task, tasks))
+        finally:
+            shared.release()
+    return stitch_chunks(inputs, edges, results, max_sl_distance_pips, pip_size, record_rejected)
@@ -0,0 +1,160 @@
+"""
+Per-stage wall time, CPU time and peak memory for script runs (--profile).
+
+    profiler = StageProfiler.start()      # activates the module-level hook
+    with stage("load_csv"):
+        df = pd.read_csv(path)
+    profiler.report()
+    profiler.save("results/trends/1m/profile.json")
+
+stage(name) is a no-op unless a profiler is active, so library code (prepare_backtest, the
+engines) can mark its stages unconditionally. Stages may nest; a stage's numbers include its
+children. CPU time counts this process plus finished child processes (subprocess pipelines),
+whose RSS high-water mark is kept in the JSON as children_rss_peak_mb. Python-level peak memory
+comes from tracemalloc (NumPy buffers included), which slows allocation-heavy code such as the
+pandas engine; RSS and its high-water mark are read from the OS where available.
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_CHILDREN = resource.RUSAGE_CHILDREN if resource is not None else None
+_MB = 1024.0 * 1024.0
+_ACTIVE: Optional["StageProfiler"] = None
+
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size (Linux /proc only)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / _MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb(who=None) -> Optional[float]:
+    """High-water RSS of this process (or, with _CHILDREN, of the largest finished child) so far."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who is None else who).ru_maxrss
+    return peak / (_MB if sys.platform == "darwin" else 1024.0)  # bytes on macOS, KiB on Linux
+
+
+class _Frame:
+    __slots__ = ("name", "depth", "wall0", "cpu0", "peak")
+
+    def __init__(self, name: str, depth: int):
+        self.name = name
+        self.depth = depth
+        self.wall0 = time.perf_counter()
+        self.cpu0 = _cpu_seconds()
+        self.peak = 0
+
+
+class StageProfiler:
+    """Collects one row per stage run; see the module docstring."""
+
+    def __init__(self, trace_memory: bool = True):
+        self.trace_memory = trace_memory
+        self.rows: List[dict] = []
+        self._stack: List[_Frame] = []
+        self._started = time.perf_counter()
+        self._cpu_started = _cpu_seconds()
+
+    @classmethod
+    def start(cls, trace_memory: bool = True) -> "StageProfiler":
+        """Create a profiler and make it the target of stage()."""
+        global _ACTIVE
+        profiler = cls(trace_memory)
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _ACTIVE = profiler
+        return profiler
+
+    def stop(self) -> None:
+        global _ACTIVE
+        if _ACTIVE is self:
+            _ACTIVE = None
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, name: str):
+        tracing = self.trace_memory and tracemalloc.is_tracing()
+        if tracing and self._stack:
+            # Bank the parent's peak so far before the child resets the counter
+            parent = self._stack[-1]
+            parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+        if tracing:
+            tracemalloc.reset_peak()
+        frame = _Frame(name, len(self._stack))
+        self._stack.append(frame)
+        row = {"stage": name, "depth": frame.depth}
+        self.rows.append(row)  # in start order, so nested stages follow their parent
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            if tracing:
+                frame.peak = max(frame.peak, tracemalloc.get_traced_memory()[1])
+                if self._stack:
+                    self._stack[-1].peak = max(self._stack[-1].peak, frame.peak)
+                tracemalloc.reset_peak()
+            row.update(
+                wall_s=time.perf_counter() - frame.wall0,
+                cpu_s=_cpu_seconds() - frame.cpu0,
+                py_peak_mb=frame.peak / _MB if tracing else None,
+                rss_mb=_rss_mb(),
+                rss_peak_mb=_peak_rss_mb(),
+                children_rss_peak_mb=_peak_rss_mb(_CHILDREN),
+            )
+
+    def summary(self) -> dict:
+        return {
+            "argv": sys.argv,
+            "wall_s": time.perf_counter() - self._started,
+            "cpu_s": _cpu_seconds() - self._cpu_started,
+            "rss_peak_mb": _peak_rss_mb(),
+            "children_rss_peak_mb": _peak_rss_mb(_CHILDREN),
+            "stages": self.rows,
+        }
+
+    def report(self) -> None:
+        """Print the stage table."""
+        fmt = lambda v, spec: f"{'-':>{spec.split('.')[0]}}" if v is None else format(v, spec)
+        width = max([len("  " * r["depth"] + r["stage"]) for r in self.rows] + [5])
+        print(f"\n{'stage':<{width}}  {'wall s':>8}  {'cpu s':>8}  {'py peak MB':>10}  {'rss MB':>8}  {'rss peak MB':>11}")
+        for r in self.rows:
+            name = "  " * r["depth"] + r["stage"]
+            print(
+                f"{name:<{width}}  {fmt(r.get('wall_s'), '8.3f')}  {fmt(r.get('cpu_s'), '8.3f')}  "
+                f"{fmt(r.get('py_peak_mb'), '10.1f')}  {fmt(r.get('rss_mb'), '8.1f')}  {fmt(r.get('rss_peak_mb'), '11.1f')}"
+            )
+        s = self.summary()
+        print(f"{'total':<{width}}  {s['wall_s']:8.3f}  {s['cpu_s']:8.3f}")
+
+    def save(self, path: str) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.summary(), f, indent=2)
+        print(f"Saved profile to: {path}")
+
+
+def stage(name: str):
+    """Context manager timing a named stage on the active profiler (no-op when none is active)."""
+    return _ACTIVE.stage(name) if _ACTIVE is not None else nullcontext()
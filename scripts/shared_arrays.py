@@ -0,0 +1,64 @@
+"""
+Named NumPy arrays in one multiprocessing.shared_memory block, for process-pool workers.
+
+The parent creates the block (copying arrays in, or allocating arrays for workers to fill) and
+passes spec() through the pool initializer; each worker attaches by name and gets views of the
+same memory instead of a pickled copy. Used for the bars in sweep / walk_forward, the per-pair
+indicators in walk_forward and the engine inputs in parallel_backtest.
+"""
+
+from multiprocessing import shared_memory
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+Layout = Sequence[Tuple[str, str, Tuple[int, ...], int]]  # (name, dtype str, shape, byte offset)
+
+
+class SharedArrays:
+    """Named arrays packed into one shared-memory block (each 8-byte aligned)."""
+
+    def __init__(self, shm: shared_memory.SharedMemory, layout: Layout, owner: bool):
+        self.shm = shm
+        self.layout = [(name, dtype, tuple(shape), offset) for name, dtype, shape, offset in layout]
+        self.owner = owner
+        self.arrays: Dict[str, np.ndarray] = {
+            name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, dtype, shape, offset in self.layout
+        }
+
+    @classmethod
+    def allocate(cls, shapes: Dict[str, Tuple[Tuple[int, ...], np.dtype]]) -> "SharedArrays":
+        """Uninitialised arrays, {name: (shape, dtype)}."""
+        layout, offset = [], 0
+        for name, (shape, dtype) in shapes.items():
+            dtype = np.dtype(dtype)
+            layout.append((name, dtype.str, tuple(shape), offset))
+            offset += -(-int(np.prod(shape)) * dtype.itemsize // 8) * 8
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        return cls(shm, layout, owner=True)
+
+    @classmethod
+    def create(cls, arrays: Dict[str, np.ndarray]) -> "SharedArrays":
+        """Copies of arrays."""
+        shared = cls.allocate({name: (a.shape, a.dtype) for name, a in arrays.items()})
+        for name, a in arrays.items():
+            shared.arrays[name][...] = a
+        return shared
+
+    @classmethod
+    def attach(cls, name: str, layout: Layout) -> "SharedArrays":
+        return cls(shared_memory.SharedMemory(name=name), layout, owner=False)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.arrays[name]
+
+    def spec(self) -> Tuple[str, list]:
+        return self.shm.name, self.layout
+
+    def release(self) -> None:
+        # Drop views before closing the mapping
+        self.arrays = {}
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
@@ -12,21 +12,20 @@ still triggers, it catches oversold bounces.
 import os
 import sys
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from typing import Optional
 
-import numpy as np
 import pandas as pd
 
+import base_strategy
+from csv_stream import read_ohlc_csv
+from engine_jit import jit_available
+from entry_filters import NewsSentimentFilter
+from indicator_cache import DEFAULT_CACHE_DIR, DEFAULT_MAX_MB
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR, load_ohlc, load_ohlc_range
+
 
 @dataclass
-class StrategyConfig:
-    st_length: int = 10
-    st_multiplier: float = 3.6
-    max_sl_distance_pips: float = 520.0
-    pip_size: float = 0.01
-    entry_hours: Optional[Tuple[int, int]] = (13, 16)
-    filter_days: Optional[set] = None
-    allowed_sides: Optional[set] = None
+class StrategyConfig(base_strategy.StrategyConfig):
     # News filter parameters
     use_news_filter: bool = False
     news_sentiment_parquet: Optional[str] = None
@@ -36,79 +35,6 @@ class StrategyConfig:
     bullish_threshold: float = 0.3   # net_sentiment > this for bullish
 
 
-def rma(series: pd.Series, length: int) -> pd.Series:
-    """Pine RMA: EMA with alpha = 1/length, seeded by SMA."""
-    alpha = 1.0 / length
-    sma = series.rolling(length, min_periods=length).mean()
-    r = pd.Series(index=series.index, dtype=float)
-    if len(series) >= length:
-        r.iloc[length - 1] = sma.iloc[length - 1]
-    for i in range(length, len(series)):
-        prev = r.iloc[i - 1]
-        r.iloc[i] = alpha * series.iloc[i] + (1 - alpha) * prev
-    return r
-
-
-def compute_supertrend(df: pd.DataFrame, length: int, multiplier: float) -> Tuple[pd.Series, pd.Series]:
-    """Compute SuperTrend direction (+1/-1) and line using an ATR based on RMA."""
-    high = df["High"].astype(float)
-    low = df["Low"].astype(float)
-    close = df["Close"].astype(float)
-
-    hl2 = (high + low) / 2.0
-    tr = pd.concat([
-        (high - low),
-        (high - close.shift()).abs(),
-        (low - close.shift()).abs(),
-    ], axis=1).max(axis=1, skipna=True)
-    atr = rma(tr, length)
-
-    upperband = hl2 + multiplier * atr
-    lowerband = hl2 - multiplier * atr
-
-    direction = pd.Series(index=df.index, dtype=float)
-    supertrend = pd.Series(index=df.index, dtype=float)
-
-    for i in range(len(df)):
-        if i == 0 or np.isnan(atr.iloc[i]):
-            direction.iloc[i] = np.nan
-            supertrend.iloc[i] = np.nan
-            continue
-
-        if direction.iloc[i - 1] == 1:
-            lowerband.iloc[i] = max(lowerband.iloc[i], lowerband.iloc[i - 1])
-            if close.iloc[i] < lowerband.iloc[i]:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
-            else:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-        elif direction.iloc[i - 1] == -1:
-            upperband.iloc[i] = min(upperband.iloc[i], upperband.iloc[i - 1])
-            if close.iloc[i] > upperband.iloc[i]:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-            else:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
-        else:
-            if close.iloc[i] >= hl2.iloc[i]:
-                direction.iloc[i] = 1
-                supertrend.iloc[i] = lowerband.iloc[i]
-            else:
-                direction.iloc[i] = -1
-                supertrend.iloc[i] = upperband.iloc[i]
-
-    return direction, supertrend
-
-
-def within_entry_hours(ts: pd.Timestamp, entry_hours: Optional[Tuple[int, int]]) -> bool:
-    if entry_hours is None:
-        return True
-    start_h, end_h = entry_hours
-    return start_h <= ts.hour < end_h
-
-
 def load_news_sentiment(parquet_path: str) -> pd.DataFrame:
     """Load GDELT sentiment features from parquet file."""
     if not os.path.exists(parquet_path):
@@ -120,73 +46,20 @@ def load_news_sentiment(parquet_path: str) -> pd.DataFrame:
     return df
 
 
-def passes_news_filter(entry_time: pd.Timestamp, sentiment_df: pd.DataFrame, 
-                       min_headline_count: int, filter_type: str,
-                       bearish_threshold: float, bullish_threshold: float) -> bool:
-    """
-    Check if trade passes news sentiment filter.
-    
+def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
+    """Backtest SuperTrend strategy with optional news filter.
+
+    Runs base_strategy's engine with a NewsSentimentFilter plugin. Entries the news filter rejects
+    are kept as rows with passed_news_filter=False (exit/pips empty).
+
     Filter types:
     - "bearish": moderate_bearish (net_sentiment < bearish_threshold, default -0.1)
     - "bullish": strong_bullish (net_sentiment > bullish_threshold, default 0.3)
     - "combined": Either bearish OR bullish passes
-    
-    All require headline_count >= min_headline_count
-    
-    Returns True if filter passes, False otherwise.
+    All require headline_count >= min_headline_count.
     """
-    # Find matching sentiment record
-    match = sentiment_df[sentiment_df['entry_time'] == entry_time]
-    
-    if match.empty:
-        # No sentiment data for this timestamp
-        return False
-    
-    row = match.iloc[0]
-    headline_count = row.get('headline_count', 0)
-    net_sentiment = row.get('net_sentiment', 0)
-    
-    # Check headline count first
-    if headline_count < min_headline_count:
-        return False
-    
-    # Apply filter type
-    if filter_type == "bearish":
-        # moderate_bearish: bearish sentiment
-        return net_sentiment < bearish_threshold
-    elif filter_type == "bullish":
-        # strong_bullish: bullish sentiment
-        return net_sentiment > bullish_threshold
-    elif filter_type == "combined":
-        # Either bearish OR bullish
-        return (net_sentiment < bearish_threshold) or (net_sentiment > bullish_threshold)
-    else:
-        raise ValueError(f"Unknown filter_type: {filter_type}")
-    
-    return False
-
-
-def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
-    """Backtest SuperTrend strategy with optional news filter."""
-    if df.empty:
-        return pd.DataFrame(columns=["entry_time", "exit_time", "side", "entry", "exit", 
-                                    "final_stop", "pips", "passed_news_filter"])
-
-    df = df.copy()
-    df["timestamp"] = pd.to_datetime(df["timestamp"], utc=True)
-    df.set_index("timestamp", inplace=True)
-    df = df.sort_index()
-
-    if cfg.filter_days:
-        mask = pd.Series([ts.date() in cfg.filter_days for ts in df.index], index=df.index)
-        df = df[mask]
-        if df.empty:
-            return pd.DataFrame(columns=["entry_time", "exit_time", "side", "entry", "exit", 
-                                        "final_stop", "pips", "passed_news_filter"])
-
-    # Load news sentiment if filter enabled
     sentiment_df = None
-    if cfg.use_news_filter and cfg.news_sentiment_parquet:
+    if cfg.use_news_filter and cfg.news_sentiment_parquet and not df.empty:
         try:
             sentiment_df = load_news_sentiment(cfg.news_sentiment_parquet)
             print(f"✅ Loaded news sentiment features: {len(sentiment_df)} trades")
@@ -195,165 +68,17 @@ def backtest_supertrend(df: pd.DataFrame, cfg: StrategyConfig) -> pd.DataFrame:
             print("   Proceeding without news filter.")
             cfg.use_news_filter = False
 
-    direction, st = compute_supertrend(df, cfg.st_length, cfg.st_multiplier)
-    df["direction"] = direction
-    df["supertrend"] = st
-
-    trades = []
-    position: Optional[Tuple[str, pd.Timestamp, float, float]] = None
-    pending_entry: Optional[dict] = None
-    direction_prev: Optional[float] = None
-    prev_supertrend: Optional[float] = None
-
-    def pips_between(a: float, b: float) -> float:
-        return abs(float(a) - float(b)) / cfg.pip_size
-
-    idx = list(df.index)
-    n = len(idx)
-    
-    for i in range(1, n):
-        ts = idx[i]
-        current_direction = df.iloc[i]["direction"]
-        prior_supertrend = prev_supertrend
-        st_raw = df.iloc[i]["supertrend"]
-        supertrend = float(st_raw) if not np.isnan(st_raw) else (float(prior_supertrend) if prior_supertrend is not None else np.nan)
-
-        # 1) Activate pending entry
-        if pending_entry is not None and ts >= pending_entry["entry_idx"]:
-            if within_entry_hours(ts, cfg.entry_hours) and position is None:
-                st_now = df.loc[ts, "supertrend"]
-                if not np.isnan(st_now):
-                    entry_price = float(df.loc[ts, "Close"])
-                    if pips_between(entry_price, st_now) <= cfg.max_sl_distance_pips:
-                        # Apply news filter if enabled
-                        passed_filter = True
-                        if cfg.use_news_filter and sentiment_df is not None:
-                            passed_filter = passes_news_filter(
-                                ts, sentiment_df, 
-                                cfg.min_headline_count,
-                                cfg.filter_type,
-                                cfg.bearish_threshold,
-                                cfg.bullish_threshold
-                            )
-                        
-                        if passed_filter:
-                            position = (pending_entry["side"], ts, entry_price, float(st_now))
-                        else:
-                            # Trade filtered out by news
-                            trades.append({
-                                "entry_time": ts,
-                                "exit_time": None,
-                                "side": pending_entry["side"],
-                                "entry": entry_price,
-                                "exit": None,
-                                "final_stop": None,
-                                "pips": None,
-                                "passed_news_filter": False,
-                            })
-            pending_entry = None
-
-        # 2) Manage open position
-        if position is not None:
-            side, ent_time, ent_price, sl_price = position
-            trail_st = supertrend if not np.isnan(supertrend) else prior_supertrend
-            if side == "long" and current_direction != 1:
-                trail_st = prior_supertrend
-            elif side == "short" and current_direction != -1:
-                trail_st = prior_supertrend
-
-            if trail_st is not None and not np.isnan(trail_st):
-                if side == "long" and trail_st > sl_price:
-                    sl_price = float(trail_st)
-                elif side == "short" and trail_st < sl_price:
-                    sl_price = float(trail_st)
-
-            low_now = float(df.iloc[i]["Low"])
-            high_now = float(df.iloc[i]["High"])
-            exit_hit = (side == "long" and trail_st is not None and not np.isnan(trail_st) and low_now <= trail_st) or \
-                       (side == "short" and trail_st is not None and not np.isnan(trail_st) and high_now >= trail_st)
-            
-            if exit_hit:
-                exit_price = float(prior_supertrend) if (prior_supertrend is not None and not np.isnan(prior_supertrend)) else (low_now if side == "long" else high_now)
-                pnl_pips = (exit_price - ent_price) / cfg.pip_size * (1 if side == "long" else -1)
-                trades.append({
-                    "entry_time": ent_time,
-                    "exit_time": ts,
-                    "side": side,
-                    "entry": ent_price,
-                    "exit": exit_price,
-                    "final_stop": sl_price,
-                    "pips": pnl_pips,
-                    "passed_news_filter": True,
-                })
-                position = None
-            else:
-                position = (side, ent_time, ent_price, sl_price)
+    filters = []
+    if sentiment_df is not None:
+        filters.append(NewsSentimentFilter(
+            sentiment_df,
+            cfg.min_headline_count,
+            cfg.filter_type,
+            cfg.bearish_threshold,
+            cfg.bullish_threshold,
+        ))
 
-        # 3) Schedule new entries
-        if not within_entry_hours(ts, cfg.entry_hours) or pending_entry is not None:
-            direction_prev = current_direction
-            prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-            continue
-
-        prev_dir = df.iloc[i - 1]["direction"]
-        curr_dir = current_direction
-        if np.isnan(prev_dir) or np.isnan(curr_dir) or prev_dir == curr_dir:
-            direction_prev = current_direction
-            prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-            continue
-
-        curr_open = float(df.iloc[i]["Open"])
-        curr_close = float(df.iloc[i]["Close"])
-        flip_bull = prev_dir == -1 and curr_dir == 1
-        flip_bear = prev_dir == 1 and curr_dir == -1
-
-        C0_green = curr_close > curr_open
-        C0_red = curr_close < curr_open
-
-        if flip_bull and C0_green:
-            if i + 1 >= n:
-                direction_prev = current_direction
-                prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-                continue
-            future = df.iloc[i + 1:]
-            next_red = future[future["Close"] < future["Open"]].head(1)
-            if next_red.empty:
-                direction_prev = current_direction
-                prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-                continue
-            red_ts = next_red.index[0]
-            red_pos = df.index.get_loc(red_ts)
-            enter_pos = red_pos + 1
-            if enter_pos < n:
-                enter_row = df.iloc[enter_pos]
-                if float(enter_row["Close"]) > float(enter_row["Open"]):
-                    if cfg.allowed_sides is None or "long" in cfg.allowed_sides:
-                        pending_entry = {"entry_idx": df.index[enter_pos], "side": "long"}
-
-        elif flip_bear and C0_red:
-            if i + 1 >= n:
-                direction_prev = current_direction
-                prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-                continue
-            future = df.iloc[i + 1:]
-            next_green = future[future["Close"] > future["Open"]].head(1)
-            if next_green.empty:
-                direction_prev = current_direction
-                prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-                continue
-            green_ts = next_green.index[0]
-            green_pos = df.index.get_loc(green_ts)
-            enter_pos = green_pos + 1
-            if enter_pos < n:
-                enter_row = df.iloc[enter_pos]
-                if float(enter_row["Close"]) < float(enter_row["Open"]):
-                    if cfg.allowed_sides is None or "short" in cfg.allowed_sides:
-                        pending_entry = {"entry_idx": df.index[enter_pos], "side": "short"}
-
-        direction_prev = current_direction
-        prev_supertrend = supertrend if not np.isnan(supertrend) else prior_supertrend
-
-    return pd.DataFrame(trades)
+    return base_strategy.backtest_supertrend(df, cfg, filters=filters, record_rejected=True)
 
 
 def main(argv=None):
@@ -401,8 +126,23 @@ def main(argv=None):
     # Date filtering
     parser.add_argument("--date-start", default=None, help="Start date (YYYY-MM-DD)")
     parser.add_argument("--date-end", default=None, help="End date (YYYY-MM-DD)")
+
+    # Indicator cache
+    parser.add_argument("--indicator-cache-dir", default=DEFAULT_CACHE_DIR, help="On-disk SuperTrend cache directory")
+    parser.add_argument("--indicator-cache-max-mb", type=float, default=DEFAULT_MAX_MB, help="Cache size budget (LRU eviction)")
+    parser.add_argument("--no-indicator-cache", action="store_true", help="Always recompute SuperTrend")
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR, help="Columnar cache of the input CSV (rebuilt when the CSV changes)")
+    parser.add_argument("--no-ohlc-cache", action="store_true", help="Always parse the input CSV")
+    parser.add_argument("--ohlc-float32", action="store_true", help="Store/load OHLC as float32 in the columnar cache")
+    parser.add_argument(
+        "--engine",
+        choices=["numpy", "jit", "pandas"],
+        default="numpy",
+        help="Backtest loop: array engine (default), compiled kernel (needs numba; falls back to numpy) or the reference pandas loop",
+    )
     
     args = parser.parse_args(argv)
+    ohlc_cache_dir = None if args.no_ohlc_cache else args.ohlc_cache_dir
 
     # Parse entry hours
     if args.entry_hours.lower() == "all":
@@ -418,20 +158,20 @@ def main(argv=None):
     if not os.path.exists(args.input_csv):
         raise SystemExit(f"Input CSV not found: {args.input_csv}")
     print(f"Using input CSV: {args.input_csv}")
-    df = pd.read_csv(args.input_csv)
-    
-    # Apply date filtering if specified
+    # Apply date filtering if specified (a view of the memory-mapped OHLC cache when enabled,
+    # otherwise a chunked read of just the range)
     if args.date_start or args.date_end:
-        df['timestamp'] = pd.to_datetime(df['timestamp'], utc=True)
+        if ohlc_cache_dir:
+            df = load_ohlc_range(args.input_csv, ohlc_cache_dir, args.date_start, args.date_end, float32=args.ohlc_float32)
+        else:
+            df = read_ohlc_csv(args.input_csv, args.date_start, args.date_end)
         if args.date_start:
-            start_date = pd.to_datetime(args.date_start).tz_localize('UTC')
-            df = df[df['timestamp'] >= start_date]
             print(f"  Filtered to start date: {args.date_start}")
         if args.date_end:
-            end_date = pd.to_datetime(args.date_end).tz_localize('UTC') + pd.Timedelta(days=1)
-            df = df[df['timestamp'] < end_date]
             print(f"  Filtered to end date: {args.date_end}")
         print(f"  Remaining rows: {len(df)}")
+    else:
+        df = load_ohlc(args.input_csv, ohlc_cache_dir, float32=args.ohlc_float32)
 
     # Filter days (EMA trend filter)
     filter_days = None
@@ -461,6 +201,9 @@ def main(argv=None):
     else:
         allowed_sides = {"long"}
 
+    if args.engine == "jit" and not jit_available():
+        print("⚠️ numba is not installed; --engine jit falls back to the numpy engine ('pip install numba' to compile)")
+
     # Build config
     cfg = StrategyConfig(
         st_length=args.st_length,
@@ -475,6 +218,9 @@ def main(argv=None):
         min_headline_count=args.min_headline_count,
         bearish_threshold=args.bearish_threshold,
         bullish_threshold=args.bullish_threshold,
+        indicator_cache_dir=None if args.no_indicator_cache else args.indicator_cache_dir,
+        indicator_cache_max_mb=args.indicator_cache_max_mb,
+        engine=args.engine,
     )
 
     print(f"\n{'='*60}")
@@ -0,0 +1,236 @@
+"""
+Parameter sweep for the SuperTrend strategy over a process pool.
+
+Bars are loaded once and placed in multiprocessing.shared_memory; workers attach to that block
+instead of re-reading the CSV. Work is grouped by (st_length, st_multiplier) so each task
+computes SuperTrend once per pair and then runs its max_sl / entry_hours / sides combinations on
+it with the array engine. With more workers than pairs, each pair's combinations are split into
+ceil(workers / pairs) tasks (each recomputes that pair's SuperTrend, a small cost next to the bar
+loops), so the sweep scales with cores up to the number of grid points rather than the number of
+pairs. Writes one tidy CSV: config columns + trades, PF, win rate, max DD, Sharpe.
+
+Example:
+    python scripts/sweep.py --st-lengths 8,10,12 --st-multipliers 3.0,3.6,4.2 \
+        --max-sl-pips 300,520 --entry-hours 13-16,all --sides long,both --workers 8
+"""
+
+import itertools
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BarArrays, run_supertrend_trades
+from bar_set import load_bars
+from calendar_index import CalendarIndex, day_mask, hour_mask
+from engine_jit import jit_available
+from indicators import supertrend_arrays
+from metrics import METRIC_COLUMNS, trade_metrics
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR
+from shared_arrays import SharedArrays
+
+DEFAULT_OUT_CSV = os.path.join("results", "sweep", "sweep_results.csv")
+PIP_SIZE = 0.01
+
+SIDES = {"long": {"long"}, "short": {"short"}, "both": None}
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    st_length: int
+    st_multiplier: float
+    max_sl_distance_pips: float
+    entry_hours: str  # "all" or "HH-HH"
+    sides: str  # "long" | "short" | "both"
+
+
+def parse_entry_hours(value: str) -> Optional[Tuple[int, int]]:
+    if value.lower() == "all":
+        return None
+    h0, h1 = value.split("-")
+    return int(h0), int(h1)
+
+
+def build_grid(
+    lengths: Sequence[int],
+    multipliers: Sequence[float],
+    max_sl_pips: Sequence[float],
+    entry_hours: Sequence[str],
+    sides: Sequence[str],
+) -> List[SweepPoint]:
+    return [SweepPoint(*combo) for combo in itertools.product(lengths, multipliers, max_sl_pips, entry_hours, sides)]
+
+
+def share_bars(ts_ns: np.ndarray, df: pd.DataFrame) -> SharedArrays:
+    """int64 timestamps + float64 OHLC of df as shared arrays (ts_ns, open, high, low, close)."""
+    arrays = {"ts_ns": np.asarray(ts_ns, dtype=np.int64)}
+    arrays.update({col.lower(): df[col].to_numpy(dtype=float) for col in ("Open", "High", "Low", "Close")})
+    return SharedArrays.create(arrays)
+
+
+_WORKER_BARS: Optional[SharedArrays] = None
+_WORKER_CAL: Optional[CalendarIndex] = None
+_WORKER_ENGINE = "numpy"
+
+
+def _init_worker(spec: Tuple[str, list], engine: str) -> None:
+    global _WORKER_BARS, _WORKER_CAL, _WORKER_ENGINE
+    _WORKER_BARS = SharedArrays.attach(*spec)
+    _WORKER_CAL = CalendarIndex.from_ns(_WORKER_BARS["ts_ns"])
+    _WORKER_ENGINE = engine
+
+
+def evaluate_pair(
+    bars: SharedArrays,
+    cal: CalendarIndex,
+    points: Sequence[SweepPoint],
+    pip_size: float = PIP_SIZE,
+    engine: str = "numpy",
+) -> List[dict]:
+    """Run every point sharing one (st_length, st_multiplier) pair; SuperTrend is computed once."""
+    length, multiplier = points[0].st_length, points[0].st_multiplier
+    direction, supertrend = supertrend_arrays(bars["high"], bars["low"], bars["close"], length, multiplier)
+    arrays = BarArrays(bars["ts_ns"], bars["open"], bars["high"], bars["low"], bars["close"], direction, supertrend)
+    hour_masks: Dict[str, np.ndarray] = {}
+    rows = []
+    for p in points:
+        if p.entry_hours not in hour_masks:
+            hour_masks[p.entry_hours] = hour_mask(cal, parse_entry_hours(p.entry_hours))
+        trades = run_supertrend_trades(
+            arrays, hour_masks[p.entry_hours], SIDES[p.sides], p.max_sl_distance_pips, pip_size, engine=engine
+        )
+        rows.append({**asdict(p), **trade_metrics(trades.column("pips"), trades.column("entry_ns"))})
+    return rows
+
+
+def _evaluate_pair_task(points: Sequence[SweepPoint]) -> List[dict]:
+    return evaluate_pair(_WORKER_BARS, _WORKER_CAL, points, engine=_WORKER_ENGINE)
+
+
+def split_tasks(groups: Sequence[List[SweepPoint]], workers: int) -> List[List[SweepPoint]]:
+    """One task per pair group, or with workers > len(groups), ceil(workers / len(groups)) per group.
+
+    Groups are cut into contiguous near-equal chunks (never more chunks than points), so every
+    worker gets work as long as the grid has at least `workers` points.
+    """
+    if workers <= len(groups) or not groups:
+        return [list(g) for g in groups]
+    per_group = math.ceil(workers / len(groups))
+    tasks = []
+    for g in groups:
+        n = min(per_group, len(g))
+        bounds = [len(g) * i // n for i in range(n + 1)]
+        tasks.extend(list(g[a:b]) for a, b in zip(bounds[:-1], bounds[1:]))
+    return tasks
+
+
+def run_sweep(bars: SharedArrays, points: Sequence[SweepPoint], workers: int = 1, engine: str = "numpy") -> pd.DataFrame:
+    """Evaluate the grid; rows come back in grid order. engine is "numpy" or "jit" (see engine_jit).
+
+    Parallelism is min(workers, grid points): pair groups are split when there are fewer pairs
+    than workers (see split_tasks).
+    """
+    groups: Dict[Tuple[int, float], List[SweepPoint]] = {}
+    for p in points:
+        groups.setdefault((p.st_length, p.st_multiplier), []).append(p)
+    tasks = list(groups.values()) if workers <= 1 else split_tasks(list(groups.values()), workers)
+
+    if workers <= 1:
+        cal = CalendarIndex.from_ns(bars["ts_ns"])
+        results = [evaluate_pair(bars, cal, t, engine=engine) for t in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bars.spec(), engine)) as pool:
+            results = list(pool.map(_evaluate_pair_task, tasks))
+
+    by_point = {p: row for task, rows in zip(tasks, results) for p, row in zip(task, rows)}
+    return pd.DataFrame([by_point[p] for p in points], columns=list(SweepPoint.__dataclass_fields__) + METRIC_COLUMNS)
+
+
+def load_trend_days(path: str, trend: str) -> set:
+    """Dates from a date,trend file (e.g. data/trend/ema200_trend_by_date_1m.csv) matching trend."""
+    fdf = pd.read_csv(path)
+    date_col = "date" if "date" in fdf.columns else "Date"
+    dates = pd.to_datetime(fdf[date_col], utc=True, errors="coerce").dt.date
+    if trend == "both":
+        sel = pd.Series(True, index=fdf.index)
+    else:
+        sel = fdf["trend"].astype(str).str.strip().str.lower() == trend
+    return set(dates[sel].dropna().unique().tolist())
+
+
+def parse_list(value: str, cast) -> list:
+    """Comma-separated CLI value -> list of cast items."""
+    return [cast(v.strip()) for v in value.split(",") if v.strip()]
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Parallel parameter sweep for the SuperTrend strategy.")
+    parser.add_argument("--input-csv", default=os.path.join("data", "combined_xauusd_1min_full.csv"))
+    parser.add_argument("--st-lengths", default="10", help="Comma-separated st_length values")
+    parser.add_argument("--st-multipliers", default="3.6", help="Comma-separated st_multiplier values")
+    parser.add_argument("--max-sl-pips", default="520", help="Comma-separated max_sl_distance_pips values")
+    parser.add_argument("--entry-hours", default="13-16", help="Comma-separated windows, each 'HH-HH' or 'all'")
+    parser.add_argument("--sides", default="long", help="Comma-separated from long,short,both")
+    parser.add_argument("--trend-csv", default=None, help="Optional date,trend file; only matching days are traded")
+    parser.add_argument("--trend", choices=["up", "down", "both"], default="up")
+    parser.add_argument("--date-start", default=None, help="Optional start date (UTC, YYYY-MM-DD)")
+    parser.add_argument("--date-end", default=None, help="Optional end date (UTC, YYYY-MM-DD, inclusive)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = run in-process)")
+    parser.add_argument("--engine", choices=["numpy", "jit"], default="numpy", help="Backtest loop: array engine or compiled kernel (needs numba; falls back to numpy)")
+    parser.add_argument("--out-csv", default=DEFAULT_OUT_CSV)
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR)
+    parser.add_argument("--no-ohlc-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    for s in parse_list(args.sides, str):
+        if s not in SIDES:
+            raise SystemExit(f"Invalid --sides value: {s}. Use long, short or both.")
+    try:
+        hours = parse_list(args.entry_hours, str)
+        for h in hours:
+            parse_entry_hours(h)
+    except ValueError:
+        raise SystemExit("Invalid --entry-hours. Use 'all' or 'HH-HH' like 13-16 (comma-separated).")
+    points = build_grid(
+        parse_list(args.st_lengths, int),
+        parse_list(args.st_multipliers, float),
+        parse_list(args.max_sl_pips, float),
+        hours,
+        parse_list(args.sides, str),
+    )
+
+    if not os.path.exists(args.input_csv):
+        raise SystemExit(f"Input CSV not found: {args.input_csv}")
+    loaded = load_bars(args.input_csv, None if args.no_ohlc_cache else args.ohlc_cache_dir, args.date_start, args.date_end)
+    if args.trend_csv:
+        loaded = loaded.select(day_mask(loaded.cal, load_trend_days(args.trend_csv, args.trend)))
+        print(f"Trend filter ({args.trend}) from {args.trend_csv}: {len(loaded)} bars kept")
+    df, ts_ns = loaded.frame, loaded.ts_ns
+    del loaded
+
+    if args.engine == "jit" and not jit_available():
+        print("⚠️ numba is not installed; --engine jit falls back to the numpy engine")
+    print(f"Sweeping {len(points)} configs over {len(df)} bars with {args.workers} worker(s)")
+    bars = share_bars(ts_ns, df)
+    del df
+    try:
+        results = run_sweep(bars, points, workers=args.workers, engine=args.engine)
+    finally:
+        bars.release()
+
+    os.makedirs(os.path.dirname(args.out_csv) or ".", exist_ok=True)
+    results.to_csv(args.out_csv, index=False)
+    print(f"Saved sweep results to: {args.out_csv}")
+    if not results.empty:
+        print(results.sort_values("profit_factor", ascending=False).head(10).to_string(index=False))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+"""
+Compact trade storage: growable NumPy column buffers instead of a list of per-trade dicts.
+
+A TradeTable holds one array per TRADE_DTYPE field (int64 epoch-ns times, int8 side, float64
+prices / pips, bool filter flag) and grows them by doubling, so sweeps that produce millions of
+trades keep a few flat arrays alive instead of millions of dicts. frame() exposes the filled part
+as a DataFrame over the same buffers (trades.csv layout), which the CSV / Parquet writers consume
+directly.
+"""
+
+from typing import Dict, Iterable
+
+import numpy as np
+import pandas as pd
+
+from ohlc_cache import utc_times
+
+TRADE_DTYPE = np.dtype(
+    [
+        ("entry_ns", np.int64),
+        ("exit_ns", np.int64),  # NAT_NS for entries the entry filters rejected
+        ("side", np.int8),  # +1 long / -1 short (backtest_engine.LONG / SHORT)
+        ("entry", np.float64),
+        ("exit", np.float64),
+        ("final_stop", np.float64),
+        ("pips", np.float64),
+        ("passed", np.bool_),  # False for rejected entries (exit / final_stop / pips are NaN)
+    ]
+)
+NAT_NS = np.iinfo(np.int64).min  # int64 view of NaT
+SIDE_LABELS = ["long", "short"]
+
+
+class TradeTable:
+    """Growable column buffers of trades, one NumPy array per TRADE_DTYPE field."""
+
+    def __init__(self, capacity: int = 256):
+        self._size = 0
+        self._cols: Dict[str, np.ndarray] = {
+            name: np.empty(max(capacity, 1), dtype=TRADE_DTYPE[name]) for name in TRADE_DTYPE.names
+        }
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, extra: int) -> None:
+        need = self._size + extra
+        cap = len(self._cols["pips"])
+        if need <= cap:
+            return
+        while cap < need:
+            cap *= 2
+        for name, col in self._cols.items():
+            grown = np.empty(cap, dtype=col.dtype)
+            grown[: self._size] = col[: self._size]
+            self._cols[name] = grown
+
+    def append(
+        self, entry_ns: int, exit_ns: int, side: int, entry: float, exit: float, final_stop: float, pips: float, passed: bool = True
+    ) -> None:
+        self._reserve(1)
+        i = self._size
+        for name, value in zip(TRADE_DTYPE.names, (entry_ns, exit_ns, side, entry, exit, final_stop, pips, passed)):
+            self._cols[name][i] = value
+        self._size += 1
+
+    def extend(self, **columns: np.ndarray) -> None:
+        """Append equal-length arrays, one per TRADE_DTYPE field (passed defaults to True)."""
+        columns.setdefault("passed", np.ones(len(columns["pips"]), dtype=bool))
+        k = len(columns["pips"])
+        self._reserve(k)
+        for name in TRADE_DTYPE.names:
+            self._cols[name][self._size : self._size + k] = columns[name]
+        self._size += k
+
+    @classmethod
+    def concat(cls, tables: Iterable["TradeTable"]) -> "TradeTable":
+        tables = list(tables)
+        out = cls(sum(len(t) for t in tables))
+        for t in tables:
+            out.extend(**t.columns())
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """View of one field over the filled rows."""
+        return self._cols[name][: self._size]
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        return {name: self.column(name) for name in TRADE_DTYPE.names}
+
+    def to_structured(self) -> np.ndarray:
+        """Copy of the rows as one TRADE_DTYPE structured array."""
+        out = np.empty(self._size, dtype=TRADE_DTYPE)
+        for name in TRADE_DTYPE.names:
+            out[name] = self.column(name)
+        return out
+
+    def frame(self, with_filter_flag: bool = False) -> pd.DataFrame:
+        """DataFrame in the trades.csv layout, viewing the buffers (times, prices and pips are not copied).
+
+        with_filter_flag adds passed_news_filter. side is a long/short categorical over the int8 codes.
+        """
+        side = self.column("side")
+        data = {
+            "entry_time": utc_times(self.column("entry_ns")),
+            "exit_time": utc_times(self.column("exit_ns")),
+            "side": pd.Categorical.from_codes((side < 0).view(np.int8), SIDE_LABELS),
+            "entry": self.column("entry"),
+            "exit": self.column("exit"),
+            "final_stop": self.column("final_stop"),
+            "pips": self.column("pips"),
+        }
+        if with_filter_flag:
+            data["passed_news_filter"] = self.column("passed")
+        return pd.DataFrame(data, copy=False)
+
+    def to_csv(self, path_or_buf, with_filter_flag: bool = False, **kwargs) -> None:
+        self.frame(with_filter_flag).to_csv(path_or_buf, index=False, **kwargs)
+
+    def to_parquet(self, path: str, with_filter_flag: bool = False) -> None:
+        """Write the frame with pandas' Parquet writer (needs pyarrow or fastparquet)."""
+        self.frame(with_filter_flag).to_parquet(path, index=False)
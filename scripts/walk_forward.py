@@ -0,0 +1,281 @@
+"""
+Walk-forward optimisation for the SuperTrend strategy.
+
+The history is split into rolling in-sample / out-of-sample windows (calendar months). For each
+fold the parameter grid is optimised on the in-sample window and the winner is traded on the
+following out-of-sample window. Folds run concurrently in a process pool.
+
+SuperTrend is computed once per (st_length, st_multiplier) over the whole history and shared
+with the workers, so folds only slice existing indicator arrays instead of recomputing them per
+window. Each window is then run through the same array engine backtest_supertrend uses.
+
+Example (10 years, 12-month in-sample, monthly step):
+    python scripts/walk_forward.py --st-lengths 8,10,12 --st-multipliers 3.0,3.6,4.2 \
+        --max-sl-pips 300,520 --is-months 12 --oos-months 1 --workers 8
+"""
+
+import math
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from backtest_engine import BarArrays, index_ns, run_supertrend_trades
+from bar_set import load_bars
+from calendar_index import CalendarIndex, day_mask, hour_mask
+from indicators import supertrend_arrays
+from metrics import METRIC_COLUMNS, trade_metrics
+from ohlc_cache import DEFAULT_OHLC_CACHE_DIR
+from shared_arrays import SharedArrays
+from sweep import PIP_SIZE, SIDES, SweepPoint, build_grid, load_trend_days, parse_entry_hours, parse_list, share_bars
+from trade_table import TradeTable
+
+DEFAULT_OUT_DIR = os.path.join("results", "walk_forward")
+OBJECTIVES = ("profit_factor", "total_pips", "sharpe", "avg_pips")
+
+
+class Fold(NamedTuple):
+    fold: int
+    is_lo: int  # row ranges [lo, hi) into the bar arrays
+    is_hi: int
+    oos_lo: int
+    oos_hi: int
+
+
+def make_folds(ts_ns: np.ndarray, is_months: int, oos_months: int, step_months: int) -> List[Fold]:
+    """Rolling month-aligned windows: IS = [m, m + is), OOS = [m + is, m + is + oos), m += step."""
+    if len(ts_ns) == 0:
+        return []
+    first = pd.Timestamp(int(ts_ns[0]), tz="UTC")
+    last = pd.Timestamp(int(ts_ns[-1]), tz="UTC")
+    start = pd.Timestamp(year=first.year, month=first.month, day=1, tz="UTC")
+    folds = []
+    k = 0
+    while True:
+        is_start = start + pd.DateOffset(months=k * step_months)
+        is_end = is_start + pd.DateOffset(months=is_months)
+        oos_end = is_end + pd.DateOffset(months=oos_months)
+        if is_end > last:
+            break
+        bounds = np.searchsorted(ts_ns, [b.value for b in (is_start, is_end, oos_end)])
+        folds.append(Fold(k, int(bounds[0]), int(bounds[1]), int(bounds[1]), int(bounds[2])))
+        k += 1
+    return folds
+
+
+_WORKER: Dict[str, object] = {}
+
+
+def share_indicators(pairs: Sequence[Tuple[int, float]], n: int) -> SharedArrays:
+    """Shared direction / supertrend arrays, shape (pairs, n), for _compute_pair_task to fill."""
+    shape = (len(pairs), n)
+    return SharedArrays.allocate({"direction": (shape, np.float64), "supertrend": (shape, np.float64)})
+
+
+def _init_worker(bars_spec: Tuple[str, list], ind_spec: Tuple[str, list], pairs: Sequence[Tuple[int, float]]) -> None:
+    bars = SharedArrays.attach(*bars_spec)
+    _WORKER["bars"] = bars
+    _WORKER["ind"] = SharedArrays.attach(*ind_spec)
+    _WORKER["rows"] = {pair: i for i, pair in enumerate(pairs)}
+    _WORKER["cal"] = CalendarIndex.from_ns(bars["ts_ns"])
+
+
+def _compute_pair_task(pair: Tuple[int, float]) -> None:
+    bars: SharedArrays = _WORKER["bars"]
+    ind: SharedArrays = _WORKER["ind"]
+    row = _WORKER["rows"][pair]
+    ind["direction"][row], ind["supertrend"][row] = supertrend_arrays(bars["high"], bars["low"], bars["close"], *pair)
+
+
+def _run_window(
+    bars: SharedArrays,
+    ind: SharedArrays,
+    rows: Dict[Tuple[int, float], int],
+    hours: Dict[str, np.ndarray],
+    p: SweepPoint,
+    lo: int,
+    hi: int,
+) -> TradeTable:
+    row = rows[(p.st_length, p.st_multiplier)]
+    window = slice(lo, hi)
+    arrays = BarArrays(
+        bars["ts_ns"][window], bars["open"][window], bars["high"][window], bars["low"][window], bars["close"][window],
+        ind["direction"][row, window], ind["supertrend"][row, window],
+    )
+    return run_supertrend_trades(arrays, hours[p.entry_hours][window], SIDES[p.sides], p.max_sl_distance_pips, PIP_SIZE)
+
+
+def evaluate_fold(
+    bars: SharedArrays,
+    ind: SharedArrays,
+    rows: Dict[Tuple[int, float], int],
+    cal: CalendarIndex,
+    fold: Fold,
+    points: Sequence[SweepPoint],
+    objective: str,
+    min_trades: int,
+) -> Tuple[dict, TradeTable]:
+    """Optimise on the fold's in-sample rows, then trade the winner out-of-sample."""
+    hours = {h: hour_mask(cal, parse_entry_hours(h)) for h in {p.entry_hours for p in points}}
+    ts = bars["ts_ns"]
+    best: Optional[Tuple[float, SweepPoint, dict]] = None
+    for p in points:
+        trades = _run_window(bars, ind, rows, hours, p, fold.is_lo, fold.is_hi)
+        m = trade_metrics(trades.column("pips"), trades.column("entry_ns"))
+        score = m[objective]
+        if m["trades"] < min_trades or not (score == score):
+            continue
+        if best is None or score > best[0]:
+            best = (score, p, m)
+
+    def _bound(pos: int) -> Optional[pd.Timestamp]:
+        return pd.Timestamp(int(ts[pos]), tz="UTC") if pos < len(ts) else None
+
+    row = {
+        "fold": fold.fold,
+        "is_start": _bound(fold.is_lo),
+        "oos_start": _bound(fold.oos_lo),
+        "oos_end": _bound(fold.oos_hi - 1) if fold.oos_hi > fold.oos_lo else None,
+    }
+    if best is None:
+        return row, TradeTable(0)
+
+    _, p, is_metrics = best
+    trades = _run_window(bars, ind, rows, hours, p, fold.oos_lo, fold.oos_hi)
+    oos_metrics = trade_metrics(trades.column("pips"), trades.column("entry_ns"))
+    row.update(asdict(p))
+    row.update({f"is_{k}": v for k, v in is_metrics.items()})
+    row.update({f"oos_{k}": v for k, v in oos_metrics.items()})
+    return row, trades
+
+
+def _evaluate_fold_task(args) -> Tuple[dict, TradeTable]:
+    return evaluate_fold(_WORKER["bars"], _WORKER["ind"], _WORKER["rows"], _WORKER["cal"], *args)
+
+
+def run_walk_forward(
+    bars: SharedArrays,
+    points: Sequence[SweepPoint],
+    folds: Sequence[Fold],
+    objective: str = "profit_factor",
+    min_trades: int = 10,
+    workers: int = 1,
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Returns (folds table, concatenated out-of-sample trades)."""
+    pairs = sorted({(p.st_length, p.st_multiplier) for p in points})
+    ind = share_indicators(pairs, len(bars["ts_ns"]))
+    try:
+        if workers <= 1:
+            _init_worker(bars.spec(), ind.spec(), pairs)
+            try:
+                for pair in pairs:
+                    _compute_pair_task(pair)
+                results = [_evaluate_fold_task((f, points, objective, min_trades)) for f in folds]
+            finally:
+                _WORKER["bars"].release()
+                _WORKER["ind"].release()
+                _WORKER.clear()
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(bars.spec(), ind.spec(), pairs)) as pool:
+                list(pool.map(_compute_pair_task, pairs))
+                results = list(pool.map(_evaluate_fold_task, [(f, points, objective, min_trades) for f in folds]))
+    finally:
+        ind.release()
+
+    fold_columns = (
+        ["fold", "is_start", "oos_start", "oos_end"]
+        + list(SweepPoint.__dataclass_fields__)
+        + [f"is_{c}" for c in METRIC_COLUMNS]
+        + [f"oos_{c}" for c in METRIC_COLUMNS]
+    )
+    folds_df = pd.DataFrame([r for r, _ in results], columns=fold_columns)
+    tables = [t for _, t in results]
+    trades_df = TradeTable.concat(tables).frame()
+    trades_df.insert(0, "fold", np.repeat([r["fold"] for r, _ in results], [len(t) for t in tables]))
+    return folds_df, trades_df
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Walk-forward optimisation of the SuperTrend strategy.")
+    parser.add_argument("--input-csv", default=os.path.join("data", "combined_xauusd_1min_full.csv"))
+    parser.add_argument("--st-lengths", default="10", help="Comma-separated st_length values")
+    parser.add_argument("--st-multipliers", default="3.6", help="Comma-separated st_multiplier values")
+    parser.add_argument("--max-sl-pips", default="520", help="Comma-separated max_sl_distance_pips values")
+    parser.add_argument("--entry-hours", default="13-16", help="Comma-separated windows, each 'HH-HH' or 'all'")
+    parser.add_argument("--sides", default="long", help="Comma-separated from long,short,both")
+    parser.add_argument("--is-months", type=int, default=12, help="In-sample window length (months)")
+    parser.add_argument("--oos-months", type=int, default=1, help="Out-of-sample window length (months)")
+    parser.add_argument("--step-months", type=int, default=None, help="Fold step (months; default: --oos-months)")
+    parser.add_argument("--objective", choices=OBJECTIVES, default="profit_factor", help="In-sample metric to maximise")
+    parser.add_argument("--min-trades", type=int, default=10, help="Ignore in-sample configs with fewer trades")
+    parser.add_argument("--trend-csv", default=None, help="Optional date,trend file; only matching days are traded")
+    parser.add_argument("--trend", choices=["up", "down", "both"], default="up")
+    parser.add_argument("--date-start", default=None, help="Optional start date (UTC, YYYY-MM-DD)")
+    parser.add_argument("--date-end", default=None, help="Optional end date (UTC, YYYY-MM-DD, inclusive)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (1 = run in-process)")
+    parser.add_argument("--out-dir", default=DEFAULT_OUT_DIR)
+    parser.add_argument("--ohlc-cache-dir", default=DEFAULT_OHLC_CACHE_DIR)
+    parser.add_argument("--no-ohlc-cache", action="store_true")
+    args = parser.parse_args(argv)
+
+    for s in parse_list(args.sides, str):
+        if s not in SIDES:
+            raise SystemExit(f"Invalid --sides value: {s}. Use long, short or both.")
+    try:
+        hours = parse_list(args.entry_hours, str)
+        for h in hours:
+            parse_entry_hours(h)
+    except ValueError:
+        raise SystemExit("Invalid --entry-hours. Use 'all' or 'HH-HH' like 13-16 (comma-separated).")
+    points = build_grid(
+        parse_list(args.st_lengths, int),
+        parse_list(args.st_multipliers, float),
+        parse_list(args.max_sl_pips, float),
+        hours,
+        parse_list(args.sides, str),
+    )
+
+    if not os.path.exists(args.input_csv):
+        raise SystemExit(f"Input CSV not found: {args.input_csv}")
+    loaded = load_bars(args.input_csv, None if args.no_ohlc_cache else args.ohlc_cache_dir, args.date_start, args.date_end)
+    if args.trend_csv:
+        loaded = loaded.select(day_mask(loaded.cal, load_trend_days(args.trend_csv, args.trend)))
+        print(f"Trend filter ({args.trend}) from {args.trend_csv}: {len(loaded)} bars kept")
+    df, ts_ns = loaded.frame, loaded.ts_ns
+    del loaded
+
+    folds = make_folds(ts_ns, args.is_months, args.oos_months, args.step_months or args.oos_months)
+    if not folds:
+        raise SystemExit("History is shorter than one in-sample window; nothing to walk forward.")
+    print(f"Walk-forward: {len(folds)} folds x {len(points)} configs over {len(df)} bars with {args.workers} worker(s)")
+
+    bars = share_bars(ts_ns, df)
+    del df
+    try:
+        folds_df, trades_df = run_walk_forward(bars, points, folds, args.objective, args.min_trades, args.workers)
+    finally:
+        bars.release()
+
+    os.makedirs(args.out_dir, exist_ok=True)
+    folds_path = os.path.join(args.out_dir, "folds.csv")
+    trades_path = os.path.join(args.out_dir, "oos_trades.csv")
+    folds_df.to_csv(folds_path, index=False)
+    trades_df.to_csv(trades_path, index=False)
+    print(f"Saved folds to: {folds_path}")
+    print(f"Saved out-of-sample trades to: {trades_path}")
+
+    oos = trade_metrics(trades_df["pips"].to_numpy(), index_ns(pd.DatetimeIndex(trades_df["entry_time"])) if len(trades_df) else None)
+    print("\nOut-of-sample (all folds):")
+    for k in METRIC_COLUMNS:
+        v = oos[k]
+        print(f"- {k}: {v:.4g}" if isinstance(v, float) and not math.isnan(v) else f"- {k}: {v}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())